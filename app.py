@@ -1,75 +1,145 @@
 import streamlit as st
-import pandas as pd
-from src.predict import generate_predictions
-from src.api_client import AVAILABLE_LEAGUES
-import os
-import datetime
-
-CACHE_FILE = "data/processed/cached_predictions.csv"
-
-def get_all_predictions():
-    """Runs the prediction pipeline for all available leagues, using file-based caching."""
-    today = datetime.date.today()
-    all_preds_from_cache = []
-
-    if os.path.exists(CACHE_FILE):
-        file_mod_time = datetime.datetime.fromtimestamp(os.path.getmtime(CACHE_FILE)).date()
-        if file_mod_time == today:
-            st.info("Loading predictions from cache for today.")
-            try:
-                cached_df = pd.read_csv(CACHE_FILE)
-                cached_df['Probability'] = pd.to_numeric(cached_df['Probability'], errors='coerce')
-                all_preds_from_cache = cached_df.to_dict('records')
-                if all_preds_from_cache:
-                    return all_preds_from_cache
-                else:
-                    st.warning("Cache file was empty. Regenerating predictions.")
-            except Exception as e:
-                st.error(f"Error loading from cache: {e}. Regenerating predictions.")
+import requests
+from src import config
+from src.api_client import AVAILABLE_LEAGUES, get_api_key, get_quota_status
+from src.prediction_cache import PredictionCache
+from src.warmup import Warmup
+from concurrent.futures import as_completed
+import logging
+import time
+
+# A child of the 'src' logger, so use_streamlit's handler shows its records on the page.
+logger = logging.getLogger('src.app')
+
+class StreamlitHandler(logging.Handler):
+    """Shows the prediction pipeline's log records as Streamlit status messages."""
+
+    def emit(self, record):
+        message = self.format(record)
+        if record.levelno >= logging.ERROR:
+            st.error(message)
+        elif record.levelno >= logging.WARNING:
+            st.warning(message)
+        elif getattr(record, 'success', False):
+            st.success(message)
         else:
-            st.info(f"Cache file is from {file_mod_time}, regenerating predictions for {today}.")
-    else:
-        st.info("No cache file found. Generating new predictions.")
-
-    all_preds_new = []
-    for league_name, sport_key in AVAILABLE_LEAGUES.items():
-        st.write(f"Fetching predictions for {league_name}...")
-        preds = generate_predictions(sport_key)
-        if preds:
-            all_preds_new.extend(preds)
-
-    if all_preds_new:
-        cache_df = pd.DataFrame(all_preds_new)
-        os.makedirs(os.path.dirname(CACHE_FILE), exist_ok=True)
-        cache_df.to_csv(CACHE_FILE, index=False)
-        st.success(f"Generated and cached {len(all_preds_new)} new predictions.")
-    else:
+            st.info(message)
+
+def streamlit_secrets(name):
+    try:
+        return st.secrets.get(name)
+    except FileNotFoundError:
+        return None
+
+@st.cache_resource(show_spinner=False)
+def use_streamlit():
+    """Routes the pipeline's logs to the page and reads secrets from st.secrets first, once per server process."""
+    logger = logging.getLogger('src')
+    logger.setLevel(logging.INFO)
+    logger.addHandler(StreamlitHandler())
+    config.set_sources(streamlit_secrets, *config.get_sources())
+
+
+@st.cache_resource(show_spinner=False)
+def get_warmup():
+    """Starts loading the model and history, once per server process.
+
+    The API key is not passed here: it would be cached with the warm-up for
+    the life of the process. Odds are requested per run with the current key.
+    """
+    return Warmup(AVAILABLE_LEAGUES.values())
+
+@st.cache_resource(show_spinner=False)
+def get_prediction_cache():
+    """The per-game prediction cache shared by every session of this server process."""
+    return PredictionCache()
+
+def stream_predictions(warmup, api_key, on_league, prediction_cache=None):
+    """Predicts each league as soon as its odds arrive and calls on_league(league_name, predictions).
+
+    The odds come from the warm-up's concurrent requests, so a slow league
+    does not hold back the others, and a league whose odds or predictions
+    fail is logged and skipped while the others still render.
+    """
+    # Imported here, usually already loaded by the warm-up thread, so the page renders before pandas and the model code.
+    from src.predict import generate_predictions
+    league_names = {sport_key: league_name for league_name, sport_key in AVAILABLE_LEAGUES.items()}
+    pending = {future: sport_key for sport_key, future in warmup.odds_futures(api_key).items()}
+    all_predictions = []
+    for future in as_completed(pending):
+        sport_key = pending[future]
+        try:
+            games = future.result() or []
+            predictions = generate_predictions(sport_key, games, prediction_cache)
+        except requests.exceptions.RequestException as e:
+            logger.error(f"Error fetching data from The Odds API for {sport_key}: {e}")
+            predictions = []
+        except Exception as e:
+            logger.error(f"Could not predict {league_names[sport_key]} games: {type(e).__name__}: {e}")
+            predictions = []
+        all_predictions.extend(predictions)
+        on_league(league_names[sport_key], predictions)
+    return all_predictions
+
+def get_all_predictions(warmup, on_league=lambda league_name, predictions: None):
+    """Runs the prediction pipeline for all available leagues.
+
+    Games whose O/U line, model and history are unchanged come from the
+    shared prediction cache; the rest are predicted again, so line moves
+    during the day are picked up.
+    """
+    all_preds_new = stream_predictions(warmup, get_api_key(), on_league, get_prediction_cache())
+    if not all_preds_new:
         st.warning("No predictions generated for any league today.")
-
     return all_preds_new
 
+def render_league(container, league_name, predictions):
+    """Shows one league's predictions in container while the others are still running, and times the first one."""
+    if not predictions:
+        return
+    import pandas as pd
+    if 'first_prediction_seconds' not in st.session_state:
+        st.session_state['first_prediction_seconds'] = time.perf_counter() - st.session_state['page_loaded_at']
+    container.subheader(league_name)
+    league_df = pd.DataFrame(predictions).sort_values(by='Probability', ascending=False)
+    container.dataframe(league_df.style.format({'Probability': '{:.2%}'}), width='stretch')
+
 def main():
     """Streamlit application main function."""
+    if 'predictions' not in st.session_state:
+        st.session_state['predictions'] = None
+        st.session_state['page_loaded_at'] = time.perf_counter()
+
     st.set_page_config(
         page_title="AI Bet Analyzer",
         page_icon="🏀",
         layout="wide"
     )
 
+    use_streamlit()
+    warmup = get_warmup()
+
     st.title("🏀 AI Bet Analyzer")
     st.write("Get daily Over/Under predictions for basketball matches, powered by a hybrid ML model.")
 
-    if 'predictions' not in st.session_state:
-        st.session_state['predictions'] = None
-
     col1, col2 = st.columns([1, 2])
 
     with col1:
-        if st.button("Generate Today's Predictions", key="generate"):
-            with st.spinner("🧠 Generating new predictions for all leagues... This may take a moment."):
-                st.session_state['predictions'] = get_all_predictions()
+        regenerate = st.button("Generate Today's Predictions", key="generate")
+
+    # Filter and sort changes rerun the script; they only re-render the stored predictions.
+    if regenerate or st.session_state['predictions'] is None:
+        streamed = st.empty()
+        streamed_tables = streamed.container()
+        with st.spinner("🧠 Generating new predictions for all leagues... This may take a moment."):
+            st.session_state['predictions'] = get_all_predictions(
+                warmup, lambda league_name, predictions: render_league(streamed_tables, league_name, predictions)
+            )
+        # The per-league tables give way to the combined, filterable table below.
+        streamed.empty()
 
     if st.session_state['predictions'] is not None:
+        import pandas as pd
         all_predictions_df = pd.DataFrame(st.session_state['predictions'])
 
         if not all_predictions_df.empty:
@@ -103,8 +173,12 @@ def main():
                 st.warning(f"No predictions available for {selected_display_name} in the generated data.")
         else:
             st.info("No predictions were available for any league today.")
-    else:
-        st.info("Click the 'Generate Today's Predictions' button to begin.")
+
+    if 'first_prediction_seconds' in st.session_state:
+        st.caption(f"First predictions shown {st.session_state['first_prediction_seconds']:.2f} s after the page opened.")
+    quota = get_quota_status()
+    if quota.get('remaining') is not None:
+        st.caption(f"The Odds API requests remaining: {quota['remaining']} (used: {quota['used']})")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,150 @@
+import argparse
+import json
+import time
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.metrics import log_loss
+from scripts.feature_engineering import ROLLING_STAT_COLS, add_difference_features, clean_data, rolling_team_stats
+from scripts.train_model import FEATURES, MODEL_PATH, TARGET, train_halving_stack
+from src.storage import RAW_CSV, RAW_DATASET, read_games, resolve_games_path, season_of
+
+# A refit waits until this many featured games are known, and their slates go unscored until then.
+MIN_TRAINING_GAMES = 100
+
+def load_games(raw_path=None):
+    """Cleaned raw games in date order, with their season."""
+    games = clean_data(read_games(raw_path or resolve_games_path(RAW_DATASET, RAW_CSV)))
+    games = games.sort_values('Date', kind='stable').reset_index(drop=True)
+    games['Season'] = season_of(games['Date'], games['League'])
+    return games
+
+def walk_forward_features(games, start_date, window_size=10):
+    """Yields (date, featured day games) for every date from start_date on, using only earlier games.
+
+    Games before start_date are folded into the per-team rolling state in one
+    pass and yielded as a single warm-up batch with date None. After that
+    each day's slate gets its features from the state and then updates it,
+    so a game never sees its own result or a later one. Rows without full
+    windows for both teams are dropped, as in the training data.
+    """
+    state = {}
+    before = games['Date'] < pd.Timestamp(start_date)
+    batches = [(None, games[before])] + list(games[~before].groupby('Date', sort=True))
+    for date, day_games in batches:
+        stats, _ = rolling_team_stats(day_games, window_size, state)
+        featured = add_difference_features(pd.concat([day_games, stats], axis=1))
+        yield date, featured.dropna(subset=ROLLING_STAT_COLS)
+
+def _positive_class_probability(model, X):
+    probabilities = model.predict_proba(X)
+    return probabilities[:, list(model.classes_).index(1)]
+
+def run_backtest(games, league, season, model=None, refit_every=None, n_jobs=None, window_size=10):
+    """Replays one league season day by day and scores the model against the closing O/U lines.
+
+    With refit_every (days), a model is first trained on every featured game
+    before the season and retrained on all games seen so far whenever that
+    many days have passed, so no prediction uses a model that saw its game.
+    Early in the history there may be fewer than MIN_TRAINING_GAMES games
+    with full windows; the first fit then waits for them, and the slates
+    before it are counted as unscored. Without it, `model` (default: the saved ensemble) is used as is, which
+    may have been trained on some of the replayed games.
+
+    Returns (per-day DataFrame, summary dict).
+    """
+    in_season = (games['League'] == league) & (games['Season'] == season)
+    if not in_season.any():
+        raise ValueError(f"No {league} games in season {season}.")
+    season_dates = games.loc[in_season, 'Date']
+    start_date, end_date = season_dates.min(), season_dates.max()
+    games = games[games['Date'] <= end_date]
+
+    if refit_every is None and model is None:
+        model = joblib.load(MODEL_PATH)
+    training_games, training_count, last_fit = [], 0, None
+    days, refits, fit_seconds, unscored = [], 0, 0.0, 0
+    for date, featured in walk_forward_features(games, start_date, window_size):
+        if date is not None:
+            slate = featured[(featured['League'] == league) & (featured['Season'] == season)]
+            refit_due = refit_every is not None and (last_fit is None or (date - last_fit).days >= refit_every)
+            if refit_due and training_count >= MIN_TRAINING_GAMES:
+                history = pd.concat(training_games, ignore_index=True)
+                fit_start = time.perf_counter()
+                model = train_halving_stack(history[FEATURES], history[TARGET], n_jobs=n_jobs, trial_cache_dir=None)
+                fit_seconds += time.perf_counter() - fit_start
+                refits, last_fit = refits + 1, date
+            if len(slate) and model is None:
+                unscored += len(slate)
+            elif len(slate):
+                p_over = _positive_class_probability(model, slate[FEATURES])
+                days.append(_score_day(date, slate, p_over))
+        training_games.append(featured)
+        training_count += len(featured)
+
+    daily = pd.concat(days, ignore_index=True) if days else pd.DataFrame()
+    return daily, _summarize(daily, league, season, refits, fit_seconds, unscored)
+
+def _score_day(date, slate, p_over):
+    predicted_over = p_over > 0.5
+    total = slate['TotalPoints'].to_numpy(dtype=float)
+    line = slate['OU_Line'].to_numpy(dtype=float)
+    actual_over = slate[TARGET].to_numpy() == 1
+    push = total == line
+    won = np.where(predicted_over, total > line, total < line)
+    return pd.DataFrame({
+        'Date': date,
+        'HomeTeam': slate['HomeTeam'].astype(str).to_numpy(),
+        'AwayTeam': slate['AwayTeam'].astype(str).to_numpy(),
+        'OU_Line': line,
+        'TotalPoints': total,
+        'P_Over': p_over,
+        'Predicted_Over': predicted_over,
+        'Actual_Over': actual_over,
+        'Correct': predicted_over == actual_over,
+        'Push': push,
+        'Won': won & ~push,
+    })
+
+def _summarize(daily, league, season, refits, fit_seconds, unscored=0):
+    if daily.empty:
+        return {'league': league, 'season': int(season), 'games': 0, 'unscored_games': unscored}
+    decided = ~daily['Push']
+    return {
+        'league': league,
+        'season': int(season),
+        'days': int(daily['Date'].nunique()),
+        'games': int(len(daily)),
+        'accuracy': float(daily['Correct'].mean()),
+        'log_loss': float(log_loss(daily['Actual_Over'], daily['P_Over'], labels=[False, True])),
+        'hit_rate': float(daily.loc[decided, 'Won'].mean()) if decided.any() else None,
+        'pushes': int((~decided).sum()),
+        'unscored_games': unscored,
+        'refits': refits,
+        'fit_seconds': fit_seconds,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of the O/U model over one league season.")
+    parser.add_argument('--league', default='NBA', choices=['NBA', 'NCAAB', 'WNBA'])
+    parser.add_argument('--season', type=int, default=None, help="Season start year (calendar year for WNBA). Default: the latest.")
+    parser.add_argument('--refit-every', type=int, default=None, metavar='DAYS',
+                        help="Train before the season and retrain every DAYS days on games seen so far. Default: use the saved model.")
+    parser.add_argument('--n-jobs', type=int, default=None, help="CPU budget for each refit.")
+    parser.add_argument('--output', default=None, help="Write the per-game results to this CSV file.")
+    args = parser.parse_args()
+
+    games = load_games()
+    season = args.season if args.season is not None else int(games.loc[games['League'] == args.league, 'Season'].max())
+    start = time.perf_counter()
+    daily, summary = run_backtest(games, args.league, season, refit_every=args.refit_every, n_jobs=args.n_jobs)
+    summary['wall_seconds'] = time.perf_counter() - start
+
+    if args.output:
+        daily.to_csv(args.output, index=False)
+        print(f"Per-game results saved to '{args.output}'.")
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+from scripts import benchmark_first_prediction
+from scripts.benchmark_first_prediction import odds_payloads, start_stub_server
+
+IMPORT_CASES = {
+    'prediction core': 'import src.predict',
+    'Streamlit alone': 'import streamlit',
+}
+
+def import_seconds(statement, repeats):
+    """Median seconds a fresh interpreter spends on statement, measured inside it."""
+    code = f"import time; start = time.perf_counter(); {statement}; print(time.perf_counter() - start)"
+    return float(np.median([float(subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout)
+                            for _ in range(repeats)]))
+
+def cli_seconds(base_url, repeats):
+    """Median wall time of the batch command line for every league, from process start to exit."""
+    seconds = []
+    for _ in range(repeats):
+        with tempfile.TemporaryDirectory() as work_dir:
+            env = dict(os.environ, API_KEY='benchmark', ODDS_API_BASE_URL=base_url, ODDS_CACHE_DIR=os.path.join(work_dir, 'odds'),
+                       PREDICTION_CACHE_DIR=os.path.join(work_dir, 'predictions'))
+            start = time.perf_counter()
+            subprocess.run([sys.executable, '-m', 'src.predict', '--quiet', '--output', os.path.join(work_dir, 'predictions.json')],
+                           check=True, env=env)
+            seconds.append(time.perf_counter() - start)
+    return float(np.median(seconds))
+
+def main(repeats=5):
+    payloads = odds_payloads()
+    benchmark_first_prediction.STUB_LATENCY.update(dict.fromkeys(payloads, 0))
+    server, base_url = start_stub_server(payloads)
+    try:
+        for label, statement in IMPORT_CASES.items():
+            print(f"Import, {label + ':':<17} {import_seconds(statement, repeats):6.2f} s")
+        print(f"Batch run, all leagues:   {cli_seconds(base_url, repeats):6.2f} s (fresh process, odds stub without latency)")
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
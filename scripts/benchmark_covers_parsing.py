@@ -0,0 +1,42 @@
+import contextlib
+import io
+import time
+from scripts.scrape_covers import HTML_PARSER, parse_covers_page
+
+FIXTURE_PATH = 'data/raw/debug_covers_2023-01-01.html'
+
+def pages_per_second(html, repeats, **parse_options):
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            parse_covers_page(html, '2023-01-01', 'ncaab', **parse_options)
+        elapsed = time.perf_counter() - start
+    return repeats / elapsed
+
+def main(repeats=20):
+    with open(FIXTURE_PATH, encoding='utf-8') as f:
+        html = f.read()
+
+    backends = [
+        ('html.parser, full tree (previous behaviour)', dict(parser='html.parser', strain=False)),
+        ('html.parser, game cards only', dict(parser='html.parser', strain=True)),
+    ]
+    if HTML_PARSER == 'lxml':
+        backends += [
+            ('lxml, full tree', dict(parser='lxml', strain=False)),
+            ('lxml, game cards only (default)', dict(parser='lxml', strain=True)),
+        ]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        reference = parse_covers_page(html, '2023-01-01', 'ncaab', parser='html.parser', strain=False)
+        for label, options in backends:
+            games = parse_covers_page(html, '2023-01-01', 'ncaab', **options)
+            assert games == reference, f"{label} parsed different games than the previous parser"
+
+    print(f"Parsing {FIXTURE_PATH} ({len(reference)} games per page, {repeats} repeats)")
+    for label, options in backends:
+        print(f"  {label}: {pages_per_second(html, repeats, **options):.1f} pages/s")
+
+
+if __name__ == '__main__':
+    main()
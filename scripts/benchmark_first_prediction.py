@@ -0,0 +1,112 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_LATENCY = {'basketball_ncaab': 1.5, 'basketball_nba': 0.5, 'basketball_wnba': 1.0}
+GAMES_PER_LEAGUE = 8
+
+def odds_payloads():
+    """Per-league odds payloads whose matchups are the latest games of each league in the history."""
+    from src.storage import RAW_CSV, RAW_DATASET, resolve_games_path
+    from src.team_state import read_history
+    history = read_history(resolve_games_path(RAW_DATASET, RAW_CSV))
+    payloads = {}
+    for league in ['NCAAB', 'NBA', 'WNBA']:
+        latest = history[history['League'] == league].tail(GAMES_PER_LEAGUE)
+        payloads[f'basketball_{league.lower()}'] = [{
+            'id': f'{league}-{i}', 'home_team': str(game.HomeTeam), 'away_team': str(game.AwayTeam),
+            'bookmakers': [{'key': 'draftkings', 'markets': [{'key': 'totals', 'outcomes': [
+                {'name': 'Over', 'point': float(game.OU_Line)}, {'name': 'Under', 'point': float(game.OU_Line)}
+            ]}]}],
+        } for i, game in enumerate(latest.itertuples())]
+    return payloads
+
+def start_stub_server(payloads):
+    """Serves the payloads with a fixed per-league delay, like a slow upstream; other leagues fail."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            sport_key = self.path.split('/sports/')[1].split('/')[0]
+            if sport_key not in payloads:
+                self.send_error(503)
+                return
+            time.sleep(STUB_LATENCY[sport_key])
+            body = json.dumps(payloads[sport_key]).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def measure_blocking():
+    """The previous flow: fetch every league, predict them one after another, then render everything."""
+    from src.api_client import AVAILABLE_LEAGUES, get_upcoming_games_many
+    from src.predict import generate_predictions
+    start = time.perf_counter()
+    games_by_league = get_upcoming_games_many(AVAILABLE_LEAGUES.values(), api_key='benchmark')
+    predictions = [generate_predictions(sport_key, games_by_league[sport_key] or []) for sport_key in AVAILABLE_LEAGUES.values()]
+    assert any(predictions), "No predictions were generated"
+    return {'first_prediction_seconds': time.perf_counter() - start}
+
+def measure_streaming():
+    """The app as a first and a later visitor see it, run through Streamlit's AppTest."""
+    from streamlit.testing.v1 import AppTest
+    import src.predict  # noqa: F401 -- imported before the clock, as in measure_blocking
+    from src.prediction_cache import PredictionCache
+
+    def visit():
+        app = AppTest.from_file(os.path.abspath('app.py'), default_timeout=120)
+        app.secrets['API_KEY'] = 'benchmark'
+        app.run()
+        assert not app.exception, app.exception
+        return app.session_state['first_prediction_seconds']
+
+    # The first visit returns once every league is predicted, so the warm-up has finished by then.
+    results = {'first_visitor_seconds': visit()}
+    # Unchanged lines, model and history: every game comes from the prediction cache.
+    results['later_visitor_cached_seconds'] = visit()
+    # Without cached predictions, so the later visitor runs the whole pipeline on warm resources.
+    PredictionCache().clear()
+    results['later_visitor_seconds'] = visit()
+    return results
+
+def run_isolated(case, base_url):
+    """Runs one case in a fresh interpreter with empty odds and prediction caches."""
+    with tempfile.TemporaryDirectory() as work_dir:
+        env = dict(os.environ, ODDS_API_BASE_URL=base_url, ODDS_CACHE_DIR=os.path.join(work_dir, 'odds'),
+                   PREDICTION_CACHE_DIR=os.path.join(work_dir, 'predictions'))
+        output = subprocess.run([sys.executable, '-m', 'scripts.benchmark_first_prediction', '--measure', case],
+                                capture_output=True, text=True, check=True, env=env).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def main():
+    server, base_url = start_stub_server(odds_payloads())
+    try:
+        blocking = run_isolated('blocking', base_url)
+        streaming = run_isolated('streaming', base_url)
+    finally:
+        server.shutdown()
+    print(f"Odds latency per league: {STUB_LATENCY}")
+    print(f"Blocking (previous flow, after the click):  {blocking['first_prediction_seconds']:6.2f} s to the first prediction")
+    print(f"Streaming, first visitor after start:        {streaming['first_visitor_seconds']:6.2f} s")
+    print(f"Streaming, later visitor (cached):           {streaming['later_visitor_cached_seconds']:6.2f} s")
+    print(f"Streaming, later visitor (warm, uncached):   {streaming['later_visitor_seconds']:6.2f} s")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 3 and sys.argv[1] == '--measure':
+        print(json.dumps({'blocking': measure_blocking, 'streaming': measure_streaming}[sys.argv[2]]()))
+    else:
+        main()
@@ -0,0 +1,74 @@
+import json
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+from src.flat_model import FLAT_MODEL_PATH
+
+MODEL_PATH = 'models/xgb_lgbm_rf_stacking_model.joblib'
+
+BATCH_SIZES = [12, 692, 50_000]
+
+def measure_load(kind, path):
+    """Seconds to import the loader and load the model in this (fresh) process."""
+    start = time.perf_counter()
+    if kind == 'joblib':
+        import joblib
+        model = joblib.load(path)
+    else:
+        from src.flat_model import FlatStackingModel
+        model = FlatStackingModel.load(path)
+    elapsed = time.perf_counter() - start
+    return {'seconds': elapsed, 'classes': list(map(int, model.classes_))}
+
+def run_isolated(kind, path, repeats=5):
+    """Median cold load time over fresh interpreters, so no import is already cached."""
+    seconds = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, '-m', 'scripts.benchmark_flat_model', '--measure', kind, path],
+            capture_output=True, text=True, check=True
+        ).stdout
+        seconds.append(json.loads(output.strip().splitlines()[-1])['seconds'])
+    return float(np.median(seconds))
+
+def rows_per_second(model, X, min_seconds=0.5):
+    """Best rows/s of repeated predict_proba calls on X over at least min_seconds."""
+    best, elapsed_total = float('inf'), 0.0
+    while elapsed_total < min_seconds or best == float('inf'):
+        start = time.perf_counter()
+        model.predict_proba(X)
+        elapsed = time.perf_counter() - start
+        best, elapsed_total = min(best, elapsed), elapsed_total + elapsed
+    return len(X) / best
+
+def main():
+    import joblib
+    from scripts.train_model import load_training_data
+    from src.flat_model import FlatStackingModel
+
+    split = load_training_data()
+    if split is None:
+        return
+    X_test = split[1]
+    models = {'joblib': joblib.load(MODEL_PATH), 'flat': FlatStackingModel.load(FLAT_MODEL_PATH)}
+    paths = {'joblib': MODEL_PATH, 'flat': FLAT_MODEL_PATH}
+
+    print("--- Artifact ---")
+    for kind, path in paths.items():
+        print(f"{kind:>7}: {os.path.getsize(path) / 1e6:6.2f} MB, cold import + load {run_isolated(kind, path) * 1000:7.1f} ms")
+
+    print("--- Throughput (predict_proba) ---")
+    rng = np.random.default_rng(0)
+    for batch_size in BATCH_SIZES:
+        X = X_test.iloc[rng.integers(0, len(X_test), batch_size)] if batch_size != len(X_test) else X_test
+        rates = {kind: rows_per_second(model, X) for kind, model in models.items()}
+        print(f"{batch_size:>7} rows: joblib {rates['joblib']:10.0f} rows/s, flat {rates['flat']:10.0f} rows/s ({rates['flat'] / rates['joblib']:.1f}x)")
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4 and sys.argv[1] == '--measure':
+        print(json.dumps(measure_load(sys.argv[2], sys.argv[3])))
+    else:
+        main()
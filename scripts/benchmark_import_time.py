@@ -0,0 +1,83 @@
+import argparse
+import json
+import re
+import subprocess
+import sys
+import numpy as np
+
+# Median cumulative import time budget per module, in milliseconds, measured with -X importtime.
+IMPORT_BUDGET_MS = {
+    'src.team_names': 20,
+    'src.config': 20,
+    'src.api_client': 250,
+    'app': 800,
+    'scripts.train_model': 900,
+    'src.predict': 1100,
+}
+
+HEAVY_MODULES = ['numpy', 'pandas', 'pyarrow', 'joblib', 'sklearn', 'xgboost', 'lightgbm', 'streamlit']
+
+# Modules a module must not import; odds fetching and name resolution stay clear of the data and ML stacks.
+FORBIDDEN_IMPORTS = {
+    'src.team_names': HEAVY_MODULES,
+    'src.config': HEAVY_MODULES,
+    'src.api_client': HEAVY_MODULES,
+    'app': ['numpy', 'pandas', 'pyarrow', 'joblib', 'sklearn', 'xgboost', 'lightgbm'],
+    'scripts.train_model': ['sklearn', 'xgboost', 'lightgbm', 'joblib'],
+    'src.predict': ['sklearn', 'xgboost', 'lightgbm', 'joblib', 'streamlit'],
+}
+
+IMPORT_LINE = re.compile(r'^import time:\s+\d+ \|\s+(\d+) \| (\s*)(\S+)$')
+
+def measure_import(module):
+    """Cumulative import time of module in a fresh interpreter, and every module it imported."""
+    stderr = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            capture_output=True, text=True, check=True).stderr
+    cumulative, imported = None, set()
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            imported.add(match.group(3))
+            if match.group(3) == module and not match.group(2):
+                cumulative = int(match.group(1)) / 1000
+    return cumulative, imported
+
+def run(modules, repeats):
+    # One unmeasured import per module, so every run starts with compiled bytecode.
+    for module in modules:
+        measure_import(module)
+    results = {}
+    for module in modules:
+        samples = []
+        for _ in range(repeats):
+            milliseconds, imported = measure_import(module)
+            samples.append(milliseconds)
+        forbidden = sorted(name for name in FORBIDDEN_IMPORTS.get(module, []) if name in imported)
+        median = float(np.median(samples))
+        results[module] = {
+            'median_ms': median, 'budget_ms': IMPORT_BUDGET_MS.get(module),
+            'within_budget': median <= IMPORT_BUDGET_MS.get(module, float('inf')), 'forbidden_imports': forbidden,
+        }
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Time module imports with -X importtime and check them against a budget.")
+    parser.add_argument('modules', nargs='*', default=list(IMPORT_BUDGET_MS))
+    parser.add_argument('--repeats', type=int, default=7)
+    parser.add_argument('--json', help="Also write the results to this file.")
+    args = parser.parse_args()
+
+    results = run(args.modules, args.repeats)
+    print(f"{'module':<22} {'median ms':>10} {'budget ms':>10}  status")
+    for module, result in results.items():
+        problems = ([] if result['within_budget'] else ['over budget']) + [f"imports {name}" for name in result['forbidden_imports']]
+        print(f"{module:<22} {result['median_ms']:>10.1f} {result['budget_ms'] or '-':>10}  {', '.join(problems) or 'ok'}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'python': sys.version.split()[0], 'repeats': args.repeats, 'results': results}, f, indent=2)
+    failed = [module for module, result in results.items() if not result['within_budget'] or result['forbidden_imports']]
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
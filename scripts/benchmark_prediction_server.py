@@ -0,0 +1,87 @@
+import argparse
+import http.client
+import itertools
+import json
+import subprocess
+import sys
+import threading
+import time
+import numpy as np
+from scripts.benchmark_first_prediction import odds_payloads
+from src.predict import select_ou_line
+
+CONCURRENCY = [1, 4, 16, 64]
+SERVER_CONFIGS = {
+    'micro-batching (64, 5 ms)': ['--max-batch-size', '64', '--max-wait-ms', '5'],
+    'one request per batch': ['--max-batch-size', '1', '--max-wait-ms', '0'],
+}
+
+def prediction_requests():
+    return [{'league': league, 'home_team': game['home_team'], 'away_team': game['away_team'], 'ou_line': select_ou_line(game)}
+            for league, games in zip(['NCAAB', 'NBA', 'WNBA'], odds_payloads().values()) for game in games]
+
+def start_server(args):
+    """Runs the prediction server in its own process and returns (process, port) once it is listening."""
+    process = subprocess.Popen([sys.executable, '-m', 'src.prediction_server', '--port', '0', *args],
+                               stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    line = process.stdout.readline()
+    if not line.startswith('Serving'):
+        process.kill()
+        raise RuntimeError(f"The prediction server did not start: {line!r}")
+    return process, int(line.split('http://')[1].split()[0].rsplit(':', 1)[1])
+
+def run_load(port, bodies, concurrency, seconds):
+    """Sends requests from concurrency keep-alive clients for seconds; returns latencies and throughput."""
+    latencies = [[] for _ in range(concurrency)]
+    stop_at = time.perf_counter() + seconds
+
+    def client(worker):
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        for body in itertools.cycle(bodies[worker % len(bodies):] + bodies[:worker % len(bodies)]):
+            start = time.perf_counter()
+            if start >= stop_at:
+                break
+            connection.request('POST', '/predict', body, {'Content-Type': 'application/json'})
+            response = connection.getresponse()
+            response.read()
+            assert response.status == 200, response.status
+            latencies[worker].append(time.perf_counter() - start)
+        connection.close()
+
+    threads = [threading.Thread(target=client, args=(worker,)) for worker in range(concurrency)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    all_latencies = np.concatenate([np.array(worker, dtype=float) for worker in latencies])
+    return {
+        'requests': len(all_latencies),
+        'p50_ms': float(np.percentile(all_latencies, 50) * 1000),
+        'p99_ms': float(np.percentile(all_latencies, 99) * 1000),
+        'requests_per_second': len(all_latencies) / elapsed,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test the prediction server at increasing concurrency.")
+    parser.add_argument('--seconds', type=float, default=3.0, help="Duration of each concurrency level.")
+    parser.add_argument('--concurrency', type=int, nargs='+', default=CONCURRENCY)
+    args = parser.parse_args()
+
+    bodies = [json.dumps(request) for request in prediction_requests()]
+    for label, server_args in SERVER_CONFIGS.items():
+        process, port = start_server(server_args)
+        try:
+            print(f"\n{label}")
+            print(f"{'clients':>8} {'requests':>9} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+            for concurrency in args.concurrency:
+                result = run_load(port, bodies, concurrency, args.seconds)
+                print(f"{concurrency:>8} {result['requests']:>9} {result['p50_ms']:>8.2f} {result['p99_ms']:>8.2f} {result['requests_per_second']:>8.0f}")
+        finally:
+            process.terminate()
+            process.wait()
+
+
+if __name__ == '__main__':
+    main()
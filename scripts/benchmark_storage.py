@@ -0,0 +1,80 @@
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import pandas as pd
+from scripts.benchmark_team_history import enlarge_history
+from src.storage import RAW_CSV, read_games, write_games
+
+FEATURE_COLUMNS = ['Date', 'HomeTeam', 'AwayTeam', 'HomeScore', 'AwayScore', 'OU_Line']
+
+def peak_rss_kb():
+    """Peak resident set size of this process in kB.
+
+    Reads VmHWM on Linux because ru_maxrss is inherited from the parent
+    across fork and exec, which would hide the child's own peak.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def measure_read(path, options):
+    """Times one read_games call in this process and returns seconds, peak RSS growth in MB and rows."""
+    baseline = peak_rss_kb()
+    start = time.perf_counter()
+    df = read_games(path, **options)
+    elapsed = time.perf_counter() - start
+    peak = peak_rss_kb()
+    return {'seconds': elapsed, 'rss_mb': (peak - baseline) / 1024, 'rows': len(df)}
+
+def run_isolated(path, options):
+    """Runs measure_read in a fresh interpreter so peak RSS is not shared between cases."""
+    output = subprocess.run(
+        [sys.executable, '-m', 'scripts.benchmark_storage', '--measure', path, json.dumps(options)],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def benchmark(csv_path, dataset_dir, label):
+    cases = [
+        ('full table', {}),
+        ('projected, NBA only', {'columns': FEATURE_COLUMNS, 'leagues': ['NBA']}),
+        ('projected, last season', {'columns': FEATURE_COLUMNS, 'start_date': str(read_games(csv_path, columns=['Date'])['Date'].max() - pd.Timedelta(days=365))}),
+    ]
+    print(f"{label}: {os.path.getsize(csv_path) / 1e6:.1f} MB CSV, {_dir_size(dataset_dir) / 1e6:.1f} MB Parquet")
+    for case, options in cases:
+        csv_result = run_isolated(csv_path, options)
+        parquet_result = run_isolated(dataset_dir, options)
+        assert csv_result['rows'] == parquet_result['rows'], f"{case}: CSV and Parquet returned different row counts"
+        print(f"  {case} ({csv_result['rows']} rows)")
+        print(f"    CSV:     {csv_result['seconds'] * 1000:8.1f} ms, peak RSS +{csv_result['rss_mb']:.1f} MB")
+        print(f"    Parquet: {parquet_result['seconds'] * 1000:8.1f} ms, peak RSS +{parquet_result['rss_mb']:.1f} MB")
+
+def _dir_size(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+def main():
+    history = read_games(RAW_CSV)
+    with tempfile.TemporaryDirectory() as work_dir:
+        for factor, label in [(1, "Bundled history"), (100, "100x synthetic history")]:
+            csv_path = os.path.join(work_dir, f'history_{factor}.csv')
+            dataset_dir = os.path.join(work_dir, f'history_{factor}')
+            games = enlarge_history(history, factor)
+            games.to_csv(csv_path, index=False)
+            write_games(games, dataset_dir)
+            benchmark(csv_path, dataset_dir, label)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) == 4 and sys.argv[1] == '--measure':
+        print(json.dumps(measure_read(sys.argv[2], json.loads(sys.argv[3]))))
+    else:
+        main()
@@ -0,0 +1,192 @@
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from unittest import mock
+import numpy as np
+from scripts.synthetic_data import LEAGUE_PROFILES, synthetic_covers_page, synthetic_history, synthetic_odds_payloads, team_pool
+
+DEFAULT_SCALES = [10_000, 100_000]
+RESULTS_DIR = 'data/cache/benchmarks'
+NAME_LOOKUPS = 100_000
+FEATURE_GAMES = 200
+COVERS_PAGE_GAMES = [20, 150]
+SLATE_SIZE = 50
+
+def measure(run, repeats, items=None):
+    """Median and best wall time of repeats calls of run(), and items per second at the median."""
+    seconds = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        run()
+        seconds.append(time.perf_counter() - start)
+    result = {'seconds': float(np.median(seconds)), 'min_seconds': float(min(seconds)), 'repeats': repeats}
+    if items is not None:
+        result.update(items=items, items_per_second=items / result['seconds'])
+    return result
+
+def bench_team_names(repeats):
+    """standardize_team_name over bookmaker- and Covers-style names, before and after the memo is warm."""
+    from src.team_names import TEAM_NAME_MAP, standardize_team_name, team_name_resolver
+    odds_names = [game[side] for games in synthetic_odds_payloads(200).values() for game in games for side in ('home_team', 'away_team')]
+    pool = odds_names + [name for league in LEAGUE_PROFILES for name in team_pool(league)] + list(TEAM_NAME_MAP)
+    names = [pool[i] for i in np.random.default_rng(0).integers(0, len(pool), NAME_LOOKUPS)]
+
+    def resolve_all():
+        for name in names:
+            standardize_team_name(name)
+
+    def resolve_cold():
+        team_name_resolver.resolve.cache_clear()
+        resolve_all()
+
+    return {'first_pass': measure(resolve_cold, repeats, len(names)), 'memoized': measure(resolve_all, repeats, len(names))}
+
+def bench_covers_parsing(repeats):
+    """parse_covers_page on synthetic scoreboard pages of a quiet and a busy NCAAB day."""
+    from scripts.scrape_covers import parse_covers_page
+    games = synthetic_history(max(COVERS_PAGE_GAMES), seed=1, leagues=('NCAAB',))
+    results = {}
+    for n_games in COVERS_PAGE_GAMES:
+        page = synthetic_covers_page(games.head(n_games))
+        with contextlib.redirect_stdout(io.StringIO()):
+            assert len(parse_covers_page(page, '2025-01-01', 'ncaab')) == n_games, "The synthetic page did not parse"
+            results[f'{n_games}_games'] = measure(lambda: parse_covers_page(page, '2025-01-01', 'ncaab'), repeats, n_games)
+        results[f'{n_games}_games']['page_bytes'] = len(page)
+    return results
+
+def bench_model_load(repeats):
+    """Cold import plus load of the served artifacts, each in fresh interpreters."""
+    from scripts.benchmark_flat_model import MODEL_PATH, run_isolated
+    from src.flat_model import FLAT_MODEL_PATH
+    return {kind: {'seconds': run_isolated(kind, path, repeats), 'repeats': repeats, 'bytes': os.path.getsize(path)}
+            for kind, path in [('joblib', MODEL_PATH), ('flat', FLAT_MODEL_PATH)] if os.path.exists(path)}
+
+def bench_generate_predictions(repeats):
+    """generate_predictions per league, fetching a synthetic slate from a local odds stub on every call.
+
+    The bundled model and history are used, as in production; the odds
+    cache is redirected to a temporary directory and disabled.
+    """
+    from scripts import benchmark_first_prediction
+    from src.api_client import get_upcoming_games
+    from src.predict import generate_predictions, load_model, load_team_state
+
+    payloads = synthetic_odds_payloads(SLATE_SIZE)
+    benchmark_first_prediction.STUB_LATENCY.update(dict.fromkeys(payloads, 0))
+    server, base_url = benchmark_first_prediction.start_stub_server(payloads)
+    settings = {'ODDS_CACHE_DIR': tempfile.mkdtemp(), 'ODDS_CACHE_TTL': '0', 'ODDS_CACHE_STALE_TTL': '0'}
+    results = {'warm_up': measure(lambda: (load_model(), load_team_state()), 1)}
+    try:
+        with mock.patch.dict(os.environ, settings):
+            for sport_key in payloads:
+                results[sport_key] = measure(
+                    lambda: generate_predictions(sport_key, get_upcoming_games(sport_key, api_key='benchmark', base_url=base_url)),
+                    repeats, SLATE_SIZE)
+    finally:
+        server.shutdown()
+    return results
+
+def bench_history(n_games, repeats):
+    """The history-sized hot paths on a synthetic history of n_games."""
+    from scripts.feature_engineering import calculate_advanced_rolling_stats, clean_data
+    from src.predict import calculate_features_for_game, get_team_history
+    from src.team_state import TeamHistoryIndex
+
+    results = {}
+    start = time.perf_counter()
+    history = synthetic_history(n_games)
+    results['generate_history'] = {'seconds': time.perf_counter() - start, 'repeats': 1, 'items': n_games}
+
+    results['team_history_index'] = measure(lambda: TeamHistoryIndex(history), repeats, n_games)
+    teams = [name for league in LEAGUE_PROFILES for name in team_pool(league)]
+
+    def lookups():
+        # A fresh index each time, so lookups are not served from its memo.
+        team_index = TeamHistoryIndex(history)
+        start = time.perf_counter()
+        for team in teams:
+            get_team_history(team, history, team_index=team_index, n=10)
+        return time.perf_counter() - start
+
+    lookup_seconds = [lookups() for _ in range(repeats)]
+    median = float(np.median(lookup_seconds))
+    results['get_team_history'] = {'seconds': median, 'min_seconds': float(min(lookup_seconds)), 'repeats': repeats,
+                                   'items': len(teams), 'items_per_second': len(teams) / median}
+
+    team_index = TeamHistoryIndex(history)
+    matchups = list(history[['HomeTeam', 'AwayTeam']].tail(FEATURE_GAMES).itertuples(index=False))
+    results['calculate_features_for_game'] = measure(
+        lambda: [calculate_features_for_game(home, away, history, team_index=team_index) for home, away in matchups],
+        repeats, len(matchups))
+
+    cleaned = clean_data(history.copy())
+    results['calculate_advanced_rolling_stats'] = measure(lambda: calculate_advanced_rolling_stats(cleaned), repeats, len(cleaned))
+    return results
+
+def git_commit():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True, text=True).stdout.strip()
+        return commit + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def flatten(results, prefix=''):
+    """{'a': {'b': {'seconds': ...}}} -> {'a/b': seconds}, for printing and comparing runs."""
+    flat = {}
+    for name, value in results.items():
+        if isinstance(value, dict) and 'seconds' in value:
+            flat[prefix + name] = value['seconds']
+        elif isinstance(value, dict):
+            flat.update(flatten(value, f'{prefix}{name}/'))
+    return flat
+
+def print_results(results, previous=None):
+    current = flatten({'fixed': results['fixed'], 'scales': results['scales']})
+    before = flatten({'fixed': previous['fixed'], 'scales': previous['scales']}) if previous else {}
+    for name, seconds in current.items():
+        change = f"  {seconds / before[name]:5.2f}x of {previous['commit']}" if before.get(name) else ''
+        print(f"{name:<62} {seconds * 1000:10.1f} ms{change}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Time each hot path on synthetic NBA/NCAAB/WNBA data and save the results as JSON.")
+    parser.add_argument('--games', type=int, nargs='+', default=DEFAULT_SCALES, help="History sizes to generate, e.g. 10000 1000000 5000000.")
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--output', help=f"Results file (default: {RESULTS_DIR}/<commit>-<time>.json).")
+    parser.add_argument('--compare', help="A previous results file to show speed ratios against.")
+    parser.add_argument('--skip', nargs='+', default=[], choices=['team_names', 'covers', 'model_load', 'predictions', 'history'])
+    args = parser.parse_args()
+    logging.disable(logging.WARNING)
+
+    fixed_cases = {'team_names': bench_team_names, 'covers': bench_covers_parsing,
+                   'model_load': bench_model_load, 'predictions': bench_generate_predictions}
+    results = {
+        'commit': git_commit(), 'created_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(), 'platform': platform.platform(), 'cpus': os.cpu_count(), 'repeats': args.repeats,
+        'fixed': {name: bench(args.repeats) for name, bench in fixed_cases.items() if name not in args.skip},
+        'scales': {str(n_games): bench_history(n_games, args.repeats) for n_games in args.games if 'history' not in args.skip},
+    }
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{results['commit'] or 'unknown'}-{datetime.datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or '.', exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print_results(results, previous)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,59 @@
+import time
+import pandas as pd
+from src.predict import TEAM_NAME_MAP, TeamHistoryIndex, get_team_history, standardize_team_name
+
+def load_history(path='data/raw/historical_basketball_data.csv'):
+    """Loads and cleans the history the same way generate_predictions does."""
+    df = pd.read_csv(path, parse_dates=['Date'])
+    for col in ['HomeScore', 'AwayScore', 'OU_Line']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df.dropna(subset=['HomeScore', 'AwayScore', 'OU_Line'], inplace=True)
+    return df
+
+def enlarge_history(df, factor):
+    """Stacks shifted copies of the history to build a synthetic multi-season table."""
+    span = df['Date'].max() - df['Date'].min() + pd.Timedelta(days=1)
+    copies = []
+    for i in range(factor):
+        copy = df.copy()
+        copy['Date'] = copy['Date'] - span * i
+        copies.append(copy)
+    return pd.concat(copies, ignore_index=True)
+
+def scan_team_history(team_name, historical_df):
+    """The original full-table str.contains lookup, kept for comparison."""
+    std_team_name = standardize_team_name(team_name)
+    history = historical_df[
+        (historical_df['HomeTeam'].str.lower().str.contains(std_team_name)) |
+        (historical_df['AwayTeam'].str.lower().str.contains(std_team_name))
+    ].copy()
+    return history.sort_values(by='Date', ascending=False)
+
+def benchmark(df, label, teams):
+    start = time.perf_counter()
+    for team in teams:
+        scan_team_history(team, df).head(10)
+    scan_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    team_index = TeamHistoryIndex(df)
+    build_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for team in teams:
+        get_team_history(team, df, team_index=team_index, n=10)
+    index_time = time.perf_counter() - start
+
+    print(f"{label}: {len(df)} rows, {len(teams)} lookups")
+    print(f"  str.contains scan: {scan_time * 1000:.1f} ms")
+    print(f"  index build:       {build_time * 1000:.1f} ms")
+    print(f"  index lookups:     {index_time * 1000:.1f} ms")
+
+def main():
+    teams = list(TEAM_NAME_MAP)
+    history = load_history()
+    benchmark(history, "Bundled history", teams)
+    benchmark(enlarge_history(history, 10), "10x synthetic history", teams)
+
+
+if __name__ == '__main__':
+    main()
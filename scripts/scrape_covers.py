@@ -1,123 +1,238 @@
+import argparse
+import hashlib
+import json
 import requests
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
 import pandas as pd
+import threading
 import time
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 import re
 import os
+import shutil
+from src.storage import RAW_DATASET, import_csv, season_of, write_games
 
-def get_data_for_date(date_str, league_key):
-    """Fetches basketball game data for a given date and league from Covers.com."""
-    url = f"https://www.covers.com/sports/{league_key}/matchups?selectedDate={date_str}"
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-    }
-    
-    max_retries = 5
+COVERS_BASE_URL = "https://www.covers.com"
+REQUEST_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+}
+
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+def _has_classes(*class_names):
+    """Strainer filter matching tags whose class attribute contains every given class."""
+    def match(value):
+        classes = value.split() if isinstance(value, str) else (value or [])
+        return all(class_name in classes for class_name in class_names)
+    return match
+
+GAMEBOX_STRAINER = SoupStrainer('article', class_=_has_classes('gamebox'))
+GAME_CARD_STRAINER = SoupStrainer('div', class_=_has_classes('rc-Card', 'cmg_matchup_game_card'))
+
+MAX_WORKERS = 8
+MANIFEST_PATH = 'data/raw/scrape_manifest.json'
+CHECKPOINT_EVERY = 50
+REFRESH_DAYS = 2
+CSV_COLUMNS = ['Date', 'League', 'HomeTeam', 'AwayTeam', 'HomeScore', 'AwayScore', 'OU_Line']
+REQUESTS_PER_SECOND = 2.0
+BURST_SIZE = 4
+MAX_RETRIES = 5
+RETRY_BASE_SECONDS = 1.0
+
+class TokenBucket:
+    """Thread-safe token bucket shared by every scraper worker.
+
+    pause_for() stops all workers until the given delay has passed, which is
+    how a 429 or Retry-After from Covers slows the whole scrape down.
+    """
+
+    def __init__(self, rate=REQUESTS_PER_SECOND, capacity=BURST_SIZE):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last_refill = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if now >= self._paused_until:
+                    self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+                    self._last_refill = now
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+                else:
+                    wait = self._paused_until - now
+            time.sleep(wait)
+
+    def pause_for(self, seconds):
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+
+def make_session(pool_size=MAX_WORKERS):
+    session = requests.Session()
+    session.headers.update(REQUEST_HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+def _retry_after_seconds(response, default):
+    retry_after = response.headers.get('Retry-After')
+    if retry_after is None:
+        return default
+    try:
+        return max(0.0, float(retry_after))
+    except ValueError:
+        try:
+            return max(0.0, (parsedate_to_datetime(retry_after) - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return default
+
+def parse_covers_page(html, date_str, league_key, parser=None, strain=True):
+    """Parses the finished games out of a Covers matchups page.
+
+    By default only the game card subtrees are built (through a SoupStrainer),
+    using lxml when it is installed. The 'article.gamebox' selector is tried
+    first and the older 'cmg_matchup_game_card' layout is the fallback.
+    """
+    parser = parser or HTML_PARSER
+    games_data = []
+
+    soup = BeautifulSoup(html, parser, parse_only=GAMEBOX_STRAINER if strain else None)
+    game_cards = soup.find_all('article', class_='gamebox')
+
+    if not game_cards:
+        if strain:
+            soup = BeautifulSoup(html, parser, parse_only=GAME_CARD_STRAINER)
+        game_cards = soup.find_all('div', class_='rc-Card cmg_matchup_game_card')
+        if not game_cards:
+            print(f"No game cards found for {date_str} in league {league_key} with expected selectors.")
+            return []
+
+    print(f"Found {len(game_cards)} potential game cards for {date_str}.")
+
+    for card in game_cards:
+        try:
+            home_team_fullname = card.get('data-home-team-fullname', 'N/A')
+            away_team_fullname = card.get('data-away-team-fullname', 'N/A')
+
+            home_score = 'N/A'
+            away_score = 'N/A'
+
+            score_table = card.find('table')
+            if score_table and score_table.find('tbody'):
+                rows = score_table.find('tbody').find_all('tr')
+                if len(rows) == 2:
+                    away_score_cells = rows[0].find_all('td')
+                    home_score_cells = rows[1].find_all('td')
+                    if away_score_cells and home_score_cells:
+                        away_score = away_score_cells[-1].text.strip()
+                        home_score = home_score_cells[-1].text.strip()
+
+            if home_score == 'N/A' or away_score == 'N/A':
+                home_score_elem = card.find('strong', class_='team-score home')
+                away_score_elem = card.find('strong', class_='team-score away')
+                if home_score_elem and away_score_elem:
+                    home_score = home_score_elem.text.strip()
+                    away_score = away_score_elem.text.strip()
+
+            ou_summary_elem = card.find('p', class_='summary-box')
+            ou_line = 'N/A'
+            if ou_summary_elem:
+                match = re.search(r'was\s+(?:over|under)\s+([\d.]+)', ou_summary_elem.text)
+                if match:
+                    ou_line = match.group(1)
+
+            if home_team_fullname == 'N/A' or away_team_fullname == 'N/A' or home_score == 'N/A' or away_score == 'N/A' or ou_line == 'N/A':
+                continue
+
+            games_data.append({
+                'Date': date_str,
+                'League': league_key.upper(),
+                'HomeTeam': home_team_fullname.title(),
+                'AwayTeam': away_team_fullname.title(),
+                'HomeScore': home_score,
+                'AwayScore': away_score,
+                'OU_Line': ou_line
+            })
+        except Exception as e:
+            print(f"An unexpected error occurred while parsing a game card for {league_key} on {date_str}: {e}")
+            continue
+    return games_data
+
+def get_data_for_date(date_str, league_key, session=None, rate_limiter=None, base_url=COVERS_BASE_URL):
+    """Fetches basketball game data for a given date and league from Covers.com.
+
+    Returns a list of games ([] when the page has none), or None when the page
+    could not be fetched after all retries. Failed requests back off
+    exponentially through rate_limiter, like 429s without a Retry-After.
+    """
+    url = f"{base_url}/sports/{league_key}/matchups?selectedDate={date_str}"
+    session = session or make_session(pool_size=1)
+    rate_limiter = rate_limiter or TokenBucket()
+
+    max_retries = MAX_RETRIES
     for attempt in range(max_retries):
+        rate_limiter.acquire()
+        backoff = RETRY_BASE_SECONDS * 2 ** attempt
         try:
             print(f"Attempt {attempt + 1}/{max_retries}: Fetching data from: {url}")
-            response = requests.get(url, headers=headers, timeout=20)
+            response = session.get(url, timeout=20)
+            if response.status_code in (429, 503):
+                delay = _retry_after_seconds(response, default=backoff)
+                print(f"Rate limited ({response.status_code}) on {url}; pausing all workers for {delay:.1f} seconds.")
+                rate_limiter.pause_for(delay)
+                continue
             response.raise_for_status()
             
-            soup = BeautifulSoup(response.text, 'html.parser')
-            games_data = []
-
-            game_cards = soup.find_all('article', class_='gamebox')
-            
-            if not game_cards:
-                game_cards = soup.find_all('div', class_='rc-Card cmg_matchup_game_card')
-                if not game_cards:
-                    print(f"No game cards found for {date_str} in league {league_key} with expected selectors.")
-                    return []
-
-            print(f"Found {len(game_cards)} potential game cards for {date_str}.")
-
-            for card in game_cards:
-                try:
-                    home_team_fullname = card.get('data-home-team-fullname', 'N/A')
-                    away_team_fullname = card.get('data-away-team-fullname', 'N/A')
-
-                    home_score = 'N/A'
-                    away_score = 'N/A'
-                    
-                    score_table = card.find('table')
-                    if score_table and score_table.find('tbody'):
-                        rows = score_table.find('tbody').find_all('tr')
-                        if len(rows) == 2:
-                            away_score_cells = rows[0].find_all('td')
-                            home_score_cells = rows[1].find_all('td')
-                            if away_score_cells and home_score_cells:
-                                away_score = away_score_cells[-1].text.strip()
-                                home_score = home_score_cells[-1].text.strip()
-
-                    if home_score == 'N/A' or away_score == 'N/A':
-                        home_score_elem = card.find('strong', class_='team-score home')
-                        away_score_elem = card.find('strong', class_='team-score away')
-                        if home_score_elem and away_score_elem:
-                            home_score = home_score_elem.text.strip()
-                            away_score = away_score_elem.text.strip()
-                    
-                    ou_summary_elem = card.find('p', class_='summary-box')
-                    ou_line = 'N/A'
-                    if ou_summary_elem:
-                        match = re.search(r'was\s+(?:over|under)\s+([\d.]+)', ou_summary_elem.text)
-                        if match:
-                            ou_line = match.group(1)
-
-                    if home_team_fullname == 'N/A' or away_team_fullname == 'N/A' or home_score == 'N/A' or away_score == 'N/A' or ou_line == 'N/A':
-                        continue
-
-                    games_data.append({
-                        'Date': date_str,
-                        'League': league_key.upper(),
-                        'HomeTeam': home_team_fullname.title(),
-                        'AwayTeam': away_team_fullname.title(),
-                        'HomeScore': home_score,
-                        'AwayScore': away_score,
-                        'OU_Line': ou_line
-                    })
-                except Exception as e:
-                    print(f"An unexpected error occurred while parsing a game card for {league_key} on {date_str} (Attempt {attempt + 1}): {e}")
-                    continue
-            return games_data # Successfully fetched and parsed data for this date
+            return parse_covers_page(response.text, date_str, league_key)
 
         except requests.exceptions.RequestException as e:
             print(f"Attempt {attempt + 1}/{max_retries} failed for {url}: {e}")
-            if attempt < max_retries - 1:
-                sleep_time = 2 ** attempt
-                print(f"Retrying in {sleep_time} seconds...")
-                time.sleep(sleep_time)
-            else:
-                print(f"Failed to fetch data for {date_str} in league {league_key} after {max_retries} attempts.")
-                return [] # Return empty list if all retries fail
+            if attempt + 1 < max_retries:
+                print(f"Backing off for {backoff:.1f} seconds.")
+                rate_limiter.pause_for(backoff)
         except Exception as e: # Catch any other unexpected errors during parsing
             print(f"An unexpected error occurred for {date_str} in league {league_key} on attempt {attempt + 1}: {e}")
-            if attempt < max_retries - 1:
-                sleep_time = 2 ** attempt
-                print(f"Retrying in {sleep_time} seconds...")
-                time.sleep(sleep_time)
-            else:
-                print(f"Failed to process data for {date_str} in league {league_key} after {max_retries} attempts.")
-                return []
 
-    return games_data # Safeguard return
+    print(f"Failed to fetch data for {date_str} in league {league_key} after {max_retries} attempts.")
+    return None
 
-def scrape_historical_data(start_date, end_date, league_key, output_file):
-    """Scrapes basketball data for a given league and date range, saving it to a CSV file."""
+def scrape_games(tasks, max_workers=MAX_WORKERS, session=None, rate_limiter=None, base_url=COVERS_BASE_URL):
+    """Fetches many (date_str, league_key) pages concurrently.
+
+    Returns one list of games per task, in task order, however the fetches
+    complete, so the output stays deterministic.
+    """
+    session = session or make_session(pool_size=max_workers)
+    rate_limiter = rate_limiter or TokenBucket()
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(
+            lambda task: get_data_for_date(task[0], task[1], session=session, rate_limiter=rate_limiter, base_url=base_url),
+            tasks
+        ))
+
+def date_range(start_date, end_date):
     current_date = datetime.strptime(start_date, '%Y-%m-%d')
     end_date_dt = datetime.strptime(end_date, '%Y-%m-%d')
-    
-    all_games = []
-
     while current_date <= end_date_dt:
-        date_str = current_date.strftime('%Y-%m-%d')
-        games_for_date = get_data_for_date(date_str, league_key=league_key)
-        if games_for_date:
-            all_games.extend(games_for_date)
-        
+        yield current_date.strftime('%Y-%m-%d')
         current_date += timedelta(days=1)
-    
+
+def _append_games(all_games, league_key, output_file):
     if all_games:
         df = pd.DataFrame(all_games)
         
@@ -130,6 +245,152 @@ def scrape_historical_data(start_date, end_date, league_key, output_file):
     else:
         print(f"No games scraped for {league_key.upper()} in the specified date range.")
 
+def scrape_historical_data(start_date, end_date, league_key, output_file, **scrape_options):
+    """Scrapes basketball data for a given league and date range, saving it to a CSV file."""
+    scrape_leagues([(league_key, start_date, end_date)], output_file, **scrape_options)
+
+def scrape_leagues(leagues, output_file, **scrape_options):
+    """Scrapes several (league_key, start_date, end_date) ranges through one worker pool.
+
+    Rows are appended league by league in date order, exactly as a sequential
+    scrape would write them.
+    """
+    tasks = [(date_str, league_key) for league_key, start, end in leagues for date_str in date_range(start, end)]
+    results = scrape_games(tasks, **scrape_options)
+
+    games_by_league = {league_key: [] for league_key, _, _ in leagues}
+    for (_, league_key), games in zip(tasks, results):
+        games_by_league[league_key].extend(games or [])
+    for league_key, games in games_by_league.items():
+        _append_games(games, league_key, output_file)
+
+def load_manifest(manifest_path=MANIFEST_PATH):
+    """Loads the scrape manifest: {'leagues': {league_key: {date_str: {'games', 'hash', 'scraped_at'}}}}."""
+    try:
+        with open(manifest_path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {'leagues': {}}
+
+def _write_atomic(path, write):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+def save_manifest(manifest, manifest_path=MANIFEST_PATH):
+    def write(tmp_path):
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+    _write_atomic(manifest_path, write)
+
+def _games_hash(games):
+    return hashlib.sha1(json.dumps(games, sort_keys=True).encode()).hexdigest()
+
+def _settled(entry, date_str, refresh_days):
+    """Whether a manifest entry was scraped at least refresh_days after its date, when its games were final."""
+    scraped_at = entry.get('scraped_at') if isinstance(entry, dict) else None
+    if not scraped_at:
+        return False
+    settled_on = datetime.strptime(date_str, '%Y-%m-%d').date() + timedelta(days=refresh_days)
+    return datetime.fromisoformat(scraped_at).date() >= settled_on
+
+def pending_tasks(leagues, manifest, refresh_days=REFRESH_DAYS, today=None):
+    """(date_str, league_key) pairs that are not in the manifest or are recent enough to re-check.
+
+    A date is also re-checked when it was scraped less than refresh_days
+    after it, e.g. a future date recorded with no games, whatever today is.
+    """
+    today = today or datetime.now().date()
+    refresh_from = (today - timedelta(days=refresh_days)).strftime('%Y-%m-%d')
+    tasks = []
+    for league_key, start, end in leagues:
+        done = manifest['leagues'].get(league_key, {})
+        for date_str in date_range(start, end):
+            if date_str not in done or date_str >= refresh_from or not _settled(done[date_str], date_str, refresh_days):
+                tasks.append((date_str, league_key))
+    return tasks
+
+def since_last_ranges(leagues, manifest, refresh_days=REFRESH_DAYS, today=None):
+    """Extends each league from its last scraped date (minus the refresh window) up to today."""
+    today = today or datetime.now().date()
+    ranges = []
+    for league_key, start, _ in leagues:
+        done = manifest['leagues'].get(league_key)
+        if done:
+            last_date = datetime.strptime(max(done), '%Y-%m-%d').date()
+            start = max(start, (last_date - timedelta(days=refresh_days)).strftime('%Y-%m-%d'))
+        ranges.append((league_key, start, today.strftime('%Y-%m-%d')))
+    return ranges
+
+def _write_touched_partitions(history, new_rows, replaced, dataset_dir):
+    """Rewrites the League/Season partitions of dataset_dir that new_rows or the replaced (league, date) keys fall into."""
+    history_dates = pd.to_datetime(history['Date'], errors='coerce')
+    new_dates = pd.to_datetime(new_rows['Date'], errors='coerce')
+    replaced_leagues = pd.Series([league for league, _ in replaced], dtype=str)
+    replaced_dates = pd.to_datetime(pd.Series([date_str for _, date_str in replaced], dtype=str), errors='coerce')
+    history_keys = pd.MultiIndex.from_arrays([history['League'], season_of(history_dates, history['League'])])
+    touched = set(zip(new_rows['League'], season_of(new_dates, new_rows['League'])))
+    touched |= set(zip(replaced_leagues, season_of(replaced_dates, replaced_leagues)))
+    write_games(history[history_keys.isin(touched)], dataset_dir)
+    # A partition whose dates were all re-scraped with no games would otherwise keep its old rows.
+    for league, season in touched - set(history_keys):
+        shutil.rmtree(os.path.join(dataset_dir, f'League={league}', f'Season={season}'), ignore_errors=True)
+
+def scrape_incremental(leagues, output_file, manifest_path=MANIFEST_PATH, refresh_days=REFRESH_DAYS,
+                       checkpoint_every=CHECKPOINT_EVERY, today=None, dataset_dir=None, **scrape_options):
+    """Scrapes only the (league, date) pairs the manifest does not cover yet.
+
+    Work is committed every checkpoint_every pages: the CSV is rewritten
+    atomically with those dates' rows replaced, then the manifest is
+    updated. An interrupted run therefore resumes at the last checkpoint,
+    and a date scraped twice never duplicates rows. With dataset_dir set,
+    the League/Season partitions touched by each checkpoint are also
+    rewritten in that Parquet dataset. A dataset that does not exist yet is
+    built from the whole CSV first, because readers prefer the dataset over
+    the CSV once it exists.
+    """
+    manifest = load_manifest(manifest_path)
+    tasks = pending_tasks(leagues, manifest, refresh_days, today)
+    print(f"{len(tasks)} (league, date) pages to fetch; the rest are already in {manifest_path}.")
+    if not tasks:
+        return manifest
+
+    if os.path.exists(output_file):
+        history = pd.read_csv(output_file, dtype=str, keep_default_na=False)
+    else:
+        history = pd.DataFrame(columns=CSV_COLUMNS)
+    scrape_options.setdefault('session', make_session(pool_size=scrape_options.get('max_workers', MAX_WORKERS)))
+    scrape_options.setdefault('rate_limiter', TokenBucket())
+
+    for chunk_start in range(0, len(tasks), checkpoint_every):
+        chunk = tasks[chunk_start:chunk_start + checkpoint_every]
+        results = scrape_games(chunk, **scrape_options)
+        completed = [(task, games) for task, games in zip(chunk, results) if games is not None]
+        if not completed:
+            continue
+
+        replaced = {(league_key.upper(), date_str) for (date_str, league_key), _ in completed}
+        keep = [(league, date) not in replaced for league, date in zip(history['League'], history['Date'])]
+        new_rows = pd.DataFrame([game for _, games in completed for game in games], columns=CSV_COLUMNS)
+        history = pd.concat([history[keep], new_rows], ignore_index=True)
+        history = history.sort_values(['League', 'Date'], kind='stable').reset_index(drop=True)
+        _write_atomic(output_file, lambda tmp_path: history.to_csv(tmp_path, index=False))
+        if dataset_dir is not None and os.path.isdir(dataset_dir):
+            _write_touched_partitions(history, new_rows, replaced, dataset_dir)
+        elif dataset_dir is not None:
+            import_csv(output_file, dataset_dir)
+
+        scraped_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        for (date_str, league_key), games in completed:
+            manifest['leagues'].setdefault(league_key, {})[date_str] = {
+                'games': len(games), 'hash': _games_hash(games), 'scraped_at': scraped_at
+            }
+        save_manifest(manifest, manifest_path)
+        print(f"Checkpoint: {chunk_start + len(chunk)}/{len(tasks)} pages processed, {len(history)} games in {output_file}.")
+
+    return manifest
+
 if __name__ == "__main__":
     # Updated date ranges to include recent data up to December 24, 2025
     # NCAA season typically ends in early April, so extending to March 31, 2025 is reasonable.
@@ -140,15 +401,26 @@ if __name__ == "__main__":
         ('wnba', '2024-05-01', '2025-12-24'), # WNBA up to present date
     ]
     
+    parser = argparse.ArgumentParser(description="Scrape historical basketball results and O/U lines from Covers.com.")
+    parser.add_argument('--since-last', action='store_true', help="Extend each league from its last scraped date up to today.")
+    parser.add_argument('--full', action='store_true', help="Discard the CSV and manifest and re-scrape every range.")
+    parser.add_argument('--refresh-days', type=int, default=REFRESH_DAYS, help="Always re-check dates this many days back from today.")
+    args = parser.parse_args()
+
     output_filename = 'data/raw/historical_basketball_data.csv'
 
-    # Clear the file to start fresh with combined data
-    if os.path.exists(output_filename):
-        os.remove(output_filename)
-        print(f"Removed existing data file: {output_filename}")
+    if args.full:
+        for path in (output_filename, MANIFEST_PATH):
+            if os.path.exists(path):
+                os.remove(path)
+                print(f"Removed existing file: {path}")
+        if os.path.isdir(RAW_DATASET):
+            shutil.rmtree(RAW_DATASET)
+            print(f"Removed existing dataset: {RAW_DATASET}")
 
+    if args.since_last:
+        leagues_to_scrape = since_last_ranges(leagues_to_scrape, load_manifest(), args.refresh_days)
 
-    for league_key, start, end in leagues_to_scrape:
-        scrape_historical_data(start, end, league_key, output_filename)
+    scrape_incremental(leagues_to_scrape, output_filename, refresh_days=args.refresh_days, dataset_dir=RAW_DATASET)
 
     print("\n--- Scraping process complete for all defined leagues. ---")
@@ -0,0 +1,142 @@
+import math
+import numpy as np
+import pandas as pd
+from src.storage import RAW_CSV
+
+# Per league: teams, season window as (first month, length in days), mean score per team and its spread.
+LEAGUE_PROFILES = {
+    'NCAAB': {'teams': 362, 'season_start': (11, 1), 'season_days': 150, 'mean_score': 72.0, 'score_sd': 11.0, 'share': 0.70},
+    'NBA': {'teams': 30, 'season_start': (10, 20), 'season_days': 175, 'mean_score': 114.0, 'score_sd': 12.0, 'share': 0.22},
+    'WNBA': {'teams': 13, 'season_start': (5, 15), 'season_days': 125, 'mean_score': 82.0, 'score_sd': 10.0, 'share': 0.08},
+}
+# Seasons go back from the end date; larger histories pack more games into each season instead of
+# reaching past the years pandas timestamps can represent.
+MAX_SEASONS = 150
+GAMES_PER_TEAM = {'NCAAB': 31, 'NBA': 82, 'WNBA': 40}
+NICKNAMES = {'NCAAB': ['Wildcats', 'Bulldogs', 'Tigers', 'Eagles'], 'NBA': ['Celtics', 'Lakers', 'Knicks', 'Heat'],
+             'WNBA': ['Aces', 'Liberty', 'Storm', 'Sky']}
+
+def team_pool(league, history_path=RAW_CSV):
+    """The league's Covers-style team names from the bundled history, padded with synthetic ones to the league's size."""
+    try:
+        history = pd.read_csv(history_path, usecols=['League', 'HomeTeam', 'AwayTeam'])
+        league_games = history[history['League'] == league]
+        names = sorted(set(league_games['HomeTeam'].dropna()) | set(league_games['AwayTeam'].dropna()))
+    except (OSError, ValueError):
+        names = []
+    size = LEAGUE_PROFILES[league]['teams']
+    return names[:size] + [f"{league} Team {i:03d}" for i in range(len(names), size)]
+
+def synthetic_history(n_games, seed=0, end_date='2025-06-30', leagues=tuple(LEAGUE_PROFILES)):
+    """A raw history of n_games finished NCAAB/NBA/WNBA games with the columns of the scraped CSV.
+
+    Games are split between leagues by their share, spread over each
+    league's season windows going back from end_date, and sorted by date.
+    Every team has a fixed strength, so rolling features carry some signal,
+    and lines are the expected total plus noise, rounded to half points.
+    """
+    rng = np.random.default_rng(seed)
+    shares = np.array([LEAGUE_PROFILES[league]['share'] for league in leagues])
+    counts = np.floor(shares / shares.sum() * n_games).astype(int)
+    counts[0] += n_games - counts.sum()
+    end = pd.Timestamp(end_date)
+
+    frames = []
+    for league, count in zip(leagues, counts):
+        profile = LEAGUE_PROFILES[league]
+        teams = np.array(team_pool(league), dtype=object)
+        per_season = len(teams) * GAMES_PER_TEAM[league] // 2
+        seasons = min(max(1, math.ceil(count / per_season)), MAX_SEASONS)
+        month, day = profile['season_start']
+        last_start = pd.Timestamp(end.year, month, day)
+        if last_start + pd.Timedelta(days=profile['season_days']) > end:
+            last_start = pd.Timestamp(end.year - 1, month, day)
+        season = rng.integers(0, seasons, count)
+        season_start = np.array([last_start - pd.DateOffset(years=int(s)) for s in range(seasons)], dtype='datetime64[ns]')
+        dates = season_start[season] + rng.integers(0, profile['season_days'], count).astype('timedelta64[D]')
+
+        home = rng.integers(0, len(teams), count)
+        away = (home + rng.integers(1, len(teams), count)) % len(teams)
+        strength = rng.normal(0, profile['score_sd'] / 3, len(teams))
+        expected_home = profile['mean_score'] + 2 + strength[home] - strength[away] / 2
+        expected_away = profile['mean_score'] + strength[away] - strength[home] / 2
+        home_score = np.maximum(np.rint(rng.normal(expected_home, profile['score_sd'])), 30).astype(int)
+        away_score = np.maximum(np.rint(rng.normal(expected_away, profile['score_sd'])), 30).astype(int)
+        ou_line = np.round((expected_home + expected_away + rng.normal(0, 4, count)) * 2) / 2
+
+        frames.append(pd.DataFrame({
+            'Date': dates, 'League': league, 'HomeTeam': teams[home], 'AwayTeam': teams[away],
+            'HomeScore': home_score, 'AwayScore': away_score, 'OU_Line': ou_line,
+        }))
+    return pd.concat(frames, ignore_index=True).sort_values('Date', kind='stable').reset_index(drop=True)
+
+def _odds_team_name(league, name, rng):
+    """A bookmaker-style full name: the Covers name plus a nickname."""
+    return f"{name} {NICKNAMES[league][rng.integers(0, len(NICKNAMES[league]))]}"
+
+def synthetic_odds_payloads(games_per_league, seed=0, commence_time='2025-07-01T00:00:00Z'):
+    """Odds API responses (sport key -> list of games) with h2h and totals markets from several bookmakers.
+
+    Some games lack a totals market at the preferred bookmakers, as in real
+    payloads, so line selection falls back through the bookmaker order.
+    """
+    rng = np.random.default_rng(seed)
+    payloads = {}
+    for league, profile in LEAGUE_PROFILES.items():
+        teams = team_pool(league)
+        games = []
+        for i in range(games_per_league):
+            home, away = rng.choice(len(teams), 2, replace=False)
+            line = float(np.round(rng.normal(2 * profile['mean_score'], 8) * 2) / 2)
+            bookmakers = []
+            for key in ['fanduel', 'draftkings', 'betmgm', 'bovada', 'williamhill_us']:
+                markets = [{'key': 'h2h', 'outcomes': [{'name': teams[home], 'price': 1.91}, {'name': teams[away], 'price': 1.91}]}]
+                if rng.random() < 0.8:
+                    point = line + float(rng.choice([-0.5, 0, 0.5]))
+                    markets.append({'key': 'totals', 'outcomes': [{'name': 'Over', 'price': 1.91, 'point': point},
+                                                                  {'name': 'Under', 'price': 1.91, 'point': point}]})
+                bookmakers.append({'key': key, 'title': key.title(), 'markets': markets})
+            games.append({
+                'id': f"{league.lower()}-{seed}-{i}", 'sport_key': f'basketball_{league.lower()}', 'commence_time': commence_time,
+                'home_team': _odds_team_name(league, teams[home], rng), 'away_team': _odds_team_name(league, teams[away], rng),
+                'bookmakers': bookmakers,
+            })
+        payloads[f'basketball_{league.lower()}'] = games
+    return payloads
+
+GAMEBOX_TEMPLATE = """<article class="gamebox postgamebox position-relative bg-white w-100 mb-3 rounded notranslate {league}" id="{league}-{game_id}"
+ data-away-team-fullname="{away}" data-home-team-fullname="{home}" data-url="/sports/game/{game_id}">
+<p class="gamebox-header rounded-top text-white px-3 py-2 w-100 lh-base m-0 fst-normal"><strong class="text-uppercase">{away} @ {home}</strong></p>
+<div class="article-content p-3"><div class="d-flex flex-row justify-content-between align-items-start mb-2">
+<a class="gamebox-team-anchor" href="/sport/basketball/{league}/teams/main/{game_id}-away"><span class="text-nowrap">{away}</span>
+<strong class="team-score away position-relative fs-5 d-xl-none basketball">{away_score}</strong></a>
+<div class="gamebox-time text-center lh-1 m-1 m-xl-0"><strong class="covers-badge post-game-status">Final</strong></div>
+<a class="gamebox-team-anchor" href="/sport/basketball/{league}/teams/main/{game_id}-home"><span class="text-nowrap">{home}</span>
+<strong class="team-score home position-relative fs-5 d-xl-none basketball">{home_score}</strong></a></div>
+<table class="d-none d-xl-table w-100 fs-8 text-center"><thead><tr><th scope="col">Team</th><th scope="col">1</th><th scope="col">2</th><th scope="col">Score</th></tr></thead>
+<tbody><tr><th class="text-start py-1 px-2 ps-4">{away}</th><td>{away_half}</td><td>{away_rest}</td><td class="highlight-score">{away_score}</td></tr>
+<tr><th class="text-start py-1 px-2 ps-4">{home}</th><td>{home_half}</td><td>{home_rest}</td><td>{home_score}</td></tr></tbody></table>
+<p class="m-0 summary-box border rounded py-2 pe-2 ps-5">The total score of {total} was <strong>{side} {line}</strong>.</p>
+</div></article>
+"""
+
+def synthetic_covers_page(games, league='ncaab', padding_bytes=400_000):
+    """A Covers scoreboard page in the 'article.gamebox' layout for rows of a synthetic history.
+
+    padding_bytes of inline style and script stand in for the page chrome
+    that makes up most of a real page.
+    """
+    cards = []
+    for game_id, game in enumerate(games.itertuples(index=False)):
+        total = game.HomeScore + game.AwayScore
+        cards.append(GAMEBOX_TEMPLATE.format(
+            league=league, game_id=100000 + game_id, home=game.HomeTeam.lower(), away=game.AwayTeam.lower(),
+            home_score=game.HomeScore, away_score=game.AwayScore, home_half=game.HomeScore // 2,
+            home_rest=game.HomeScore - game.HomeScore // 2, away_half=game.AwayScore // 2,
+            away_rest=game.AwayScore - game.AwayScore // 2, total=total,
+            side='over' if total > game.OU_Line else 'under', line=game.OU_Line,
+        ))
+    chrome = '.gamebox .team-logo-box{width:36px;height:36px;background-size:contain}\n' * (padding_bytes // 120)
+    script = 'window.dataLayer=window.dataLayer||[];\n' * (padding_bytes // 80)
+    return (f"<!DOCTYPE html><html><head><title>Scores</title><style>{chrome}</style><script>{script}</script></head>"
+            f"<body><main><section class=\"covers-CoversScoreboard\">{''.join(cards)}</section></main></body></html>")
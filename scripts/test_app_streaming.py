@@ -0,0 +1,79 @@
+import logging
+import os
+import tempfile
+from concurrent.futures import Future
+from unittest import mock
+from scripts.benchmark_first_prediction import odds_payloads, start_stub_server
+
+def test_app_streaming():
+    """Checks that the app predicts on page load and that filter and sort reruns do not run the pipeline again."""
+    server, base_url = start_stub_server(odds_payloads())
+    work_dir = tempfile.mkdtemp()
+    settings = {'ODDS_API_BASE_URL': base_url, 'ODDS_CACHE_DIR': os.path.join(work_dir, 'odds'),
+                'PREDICTION_CACHE_DIR': os.path.join(work_dir, 'predictions')}
+    from streamlit.testing.v1 import AppTest
+    try:
+        with mock.patch.dict(os.environ, settings):
+            app = AppTest.from_file(os.path.abspath('app.py'), default_timeout=120)
+            app.secrets['API_KEY'] = 'test'
+            app.run()
+            assert not app.exception, app.exception
+            predictions = app.session_state['predictions']
+            assert {prediction['League'] for prediction in predictions} == {'NCAAB', 'NBA', 'WNBA'}, "Every league should be predicted on page load"
+            assert app.session_state['first_prediction_seconds'] > 0
+            assert any('Successfully generated' in element.value for element in app.success), "Pipeline logs should show on the page"
+            assert len(os.listdir(settings['PREDICTION_CACHE_DIR'])) == 3, "Every league's predictions should be cached"
+
+            for label, value in [("Filter by League", 'NBA'), ("Sort Predictions By:", "Lowest Probability First")]:
+                next(box for box in app.selectbox if box.label == label).select(value).run()
+                assert not app.exception, app.exception
+                messages = [element.value for element in app.info]
+                assert not any('Generating predictions' in message or 'cache' in message for message in messages), f"Changing '{label}' re-ran the pipeline"
+                assert app.session_state['predictions'] is predictions
+            shown = app.dataframe[0].value
+            assert set(shown['League']) == {'NBA'} and shown['Probability'].is_monotonic_increasing
+    finally:
+        server.shutdown()
+    print(f"SUCCESS: {len(predictions)} predictions streamed on page load; filter and sort reruns reuse them.")
+
+
+class FailingWarmup:
+    """Stands in for the warm-up, with one league's odds raising and the others finished."""
+
+    def odds_futures(self, api_key):
+        futures = {sport_key: Future() for sport_key in ('basketball_ncaab', 'basketball_nba', 'basketball_wnba')}
+        futures['basketball_ncaab'].set_exception(KeyError('fetched_at'))
+        futures['basketball_nba'].set_result([{'id': 'nba-1'}])
+        futures['basketball_wnba'].set_result([{'id': 'wnba-1'}])
+        return futures
+
+def test_failing_league_is_skipped():
+    """Checks that an unexpected error in one league is logged and the other leagues are still predicted."""
+    from app import stream_predictions
+
+    def generate_predictions(sport_key, games, prediction_cache=None):
+        if sport_key == 'basketball_wnba':
+            raise RuntimeError("model failed to load")
+        return [{'League': 'NBA', 'Game': game['id']} for game in games]
+
+    records = []
+    handler = logging.Handler()
+    handler.emit = records.append
+    logging.getLogger('src').addHandler(handler)
+    rendered = {}
+    try:
+        with mock.patch('src.predict.generate_predictions', generate_predictions):
+            predictions = stream_predictions(FailingWarmup(), 'test', lambda league, preds: rendered.update({league: preds}))
+    finally:
+        logging.getLogger('src').removeHandler(handler)
+
+    assert predictions == [{'League': 'NBA', 'Game': 'nba-1'}]
+    assert set(rendered) == {'NCAAB', 'NBA', 'WNBA'} and rendered['NCAAB'] == rendered['WNBA'] == []
+    messages = [record.getMessage() for record in records if record.levelno == logging.ERROR]
+    assert any('KeyError' in message for message in messages) and any('RuntimeError' in message for message in messages), messages
+    print("SUCCESS: failing leagues were logged and skipped; the others were predicted.")
+
+
+if __name__ == '__main__':
+    test_app_streaming()
+    test_failing_league_is_skipped()
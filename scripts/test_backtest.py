@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+from scripts.backtest import MIN_TRAINING_GAMES, run_backtest, walk_forward_features
+from scripts.feature_engineering import ROLLING_STAT_COLS, add_difference_features, calculate_advanced_rolling_stats, clean_data
+from scripts.test_feature_parity import build_synthetic_games
+from src.storage import season_of
+
+def featured_by_walk_forward(games, start_date):
+    return pd.concat([featured for _, featured in walk_forward_features(games, start_date)]).reset_index(drop=True)
+
+def test_walk_forward_features():
+    """Checks that day-by-day features equal the one-pass pipeline and never depend on later games."""
+    games = clean_data(build_synthetic_games(20_000, n_teams=200)).sort_values('Date', kind='stable').reset_index(drop=True)
+    start_date = games['Date'].quantile(0.5, interpolation='nearest')
+
+    expected = add_difference_features(calculate_advanced_rolling_stats(games.copy())).reset_index(drop=True)
+    actual = featured_by_walk_forward(games, start_date)
+    pd.testing.assert_frame_equal(actual, expected, check_exact=True)
+
+    cut_date = games['Date'].quantile(0.75, interpolation='nearest')
+    tampered = games.copy()
+    later = tampered['Date'] > cut_date
+    tampered.loc[later, ['HomeScore', 'AwayScore']] = np.random.default_rng(1).integers(0, 300, (later.sum(), 2))
+    before_cut = actual['Date'] <= cut_date
+    tampered_features = featured_by_walk_forward(tampered, start_date)
+    pd.testing.assert_frame_equal(
+        tampered_features.loc[tampered_features['Date'] <= cut_date, ROLLING_STAT_COLS].reset_index(drop=True),
+        actual.loc[before_cut, ROLLING_STAT_COLS].reset_index(drop=True), check_exact=True
+    )
+    print(f"SUCCESS: walk-forward features for {len(actual)} games match the one-pass pipeline and ignore later results.")
+
+
+def test_refit_from_first_season():
+    """Checks that a refitting backtest of the first season waits for training data instead of failing."""
+    games = clean_data(build_synthetic_games(24_000, n_teams=20)).sort_values('Date', kind='stable').reset_index(drop=True)
+    games['Season'] = season_of(games['Date'], games['League'])
+    first_season = games['Season'].min()
+
+    daily, summary = run_backtest(games, 'NBA', first_season, refit_every=10_000, n_jobs=1)
+    assert summary['refits'] == 1 and summary['unscored_games'] > 0 and summary['games'] > 0
+    featured = featured_by_walk_forward(games, games['Date'].min())
+    first_scored = daily['Date'].min()
+    assert (featured['Date'] < first_scored).sum() >= MIN_TRAINING_GAMES, "The first fit should wait for enough featured games"
+    print(f"SUCCESS: season {first_season} scored {summary['games']} games after waiting for training data ({summary['unscored_games']} unscored).")
+
+
+if __name__ == '__main__':
+    test_walk_forward_features()
+    test_refit_from_first_season()
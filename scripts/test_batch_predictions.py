@@ -0,0 +1,68 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import pandas as pd
+from scripts import benchmark_first_prediction
+from scripts.benchmark_first_prediction import odds_payloads, start_stub_server
+from src.predict import EXIT_CONFIG_ERROR, EXIT_ODDS_FAILED, EXIT_OK, EXIT_PARTIAL, PREDICTION_COLUMNS
+
+def run_cli(args, work_dir, base_url, api_key='test'):
+    env = {name: value for name, value in os.environ.items() if name != 'API_KEY'}
+    env.update(ODDS_API_BASE_URL=base_url, ODDS_CACHE_DIR=os.path.join(work_dir, 'odds'), ODDS_CACHE_TTL='0', ODDS_CACHE_STALE_TTL='0',
+               PREDICTION_CACHE_DIR=os.path.join(work_dir, 'predictions'), SECRETS_FILE=os.path.join(work_dir, 'secrets.toml'))
+    if api_key:
+        env['API_KEY'] = api_key
+    return subprocess.run([sys.executable, '-m', 'src.predict', *args], capture_output=True, text=True, env=env)
+
+def test_batch_predictions():
+    """Checks the headless command line: outputs, exit codes, secrets sources and that Streamlit is never imported."""
+    payloads = odds_payloads()
+    benchmark_first_prediction.STUB_LATENCY.update(dict.fromkeys(payloads, 0))
+    server, base_url = start_stub_server(payloads)
+    partial_server, partial_url = start_stub_server({'basketball_nba': payloads['basketball_nba']})
+    work_dir = tempfile.mkdtemp()
+    try:
+        json_path, parquet_path = os.path.join(work_dir, 'out', 'predictions.json'), os.path.join(work_dir, 'predictions.parquet')
+        result = run_cli(['--output', json_path], work_dir, base_url)
+        assert result.returncode == EXIT_OK, result.stderr
+        with open(json_path) as f:
+            predictions = json.load(f)
+        assert {prediction['League'] for prediction in predictions} == {'NCAAB', 'NBA', 'WNBA'}
+        assert 'Successfully generated' in result.stderr and not result.stdout
+
+        result = run_cli(['--output', parquet_path, '--leagues', 'NBA', '--no-cache', '--quiet'], work_dir, base_url)
+        assert result.returncode == EXIT_OK and not result.stderr, result.stderr
+        frame = pd.read_parquet(parquet_path)
+        assert list(frame.columns) == PREDICTION_COLUMNS
+        assert frame.to_dict('records') == [prediction for prediction in predictions if prediction['League'] == 'NBA']
+
+        result = run_cli(['--leagues', 'WNBA'], work_dir, base_url, api_key=None)
+        assert result.returncode == EXIT_CONFIG_ERROR and 'API_KEY' in result.stderr, result.stderr
+        with open(os.path.join(work_dir, 'secrets.toml'), 'w') as f:
+            f.write('API_KEY = "from-secrets-file"\n')
+        result = run_cli(['--leagues', 'WNBA'], work_dir, base_url, api_key=None)
+        assert result.returncode == EXIT_OK, "The secrets file should provide the API key"
+        assert json.loads(result.stdout) == [prediction for prediction in predictions if prediction['League'] == 'WNBA']
+
+        result = run_cli(['--output', json_path], work_dir, partial_url)
+        assert result.returncode == EXIT_PARTIAL, result.stderr
+        with open(json_path) as f:
+            assert {prediction['League'] for prediction in json.load(f)} == {'NBA'}
+        result = run_cli(['--leagues', 'NCAAB', 'WNBA', '--output', parquet_path], work_dir, partial_url)
+        assert result.returncode == EXIT_ODDS_FAILED, result.stderr
+        assert len(pd.read_parquet(parquet_path)) == len(frame), "A failed run should leave the previous output alone"
+        assert not [name for name in os.listdir(work_dir) if name.endswith('.tmp')]
+    finally:
+        server.shutdown()
+        partial_server.shutdown()
+
+    imported = subprocess.run([sys.executable, '-c', "import sys, src.predict; print('streamlit' in sys.modules)"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    assert imported == 'False', "The prediction core should not import Streamlit"
+    print(f"SUCCESS: {len(predictions)} predictions written as JSON and Parquet; exit codes and secrets sources behave as expected.")
+
+
+if __name__ == '__main__':
+    test_batch_predictions()
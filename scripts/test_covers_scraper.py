@@ -0,0 +1,243 @@
+import os
+import random
+import tempfile
+import threading
+import time
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pandas as pd
+from scripts.scrape_covers import (MAX_RETRIES, RETRY_BASE_SECONDS, TokenBucket, date_range, get_data_for_date, load_manifest,
+                                   pending_tasks, scrape_games, scrape_incremental)
+from src.storage import read_games
+
+FIXTURE_PATH = 'data/raw/debug_covers_2023-01-01.html'
+RATE_LIMITED_DATES = {'2023-01-03', '2023-01-07'}
+FAILING_DATE = '2023-02-01'
+
+class StubCoversHandler(BaseHTTPRequestHandler):
+    """Serves the recorded Covers page for every date with random latency.
+
+    The first request for each date in RATE_LIMITED_DATES gets a 429 with
+    Retry-After, so the scraper's global backoff is exercised. FAILING_DATE
+    always gets a 500, and (league, date) pairs in empty_pages a page with
+    no games.
+    """
+
+    page = open(FIXTURE_PATH, 'rb').read()
+    empty_pages = set()
+    seen_dates = set()
+    request_count = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        date_str = parse_qs(url.query)['selectedDate'][0]
+        league = url.path.split('/sports/')[1].split('/')[0]
+        with StubCoversHandler.lock:
+            StubCoversHandler.request_count += 1
+            first_request = date_str not in StubCoversHandler.seen_dates
+            StubCoversHandler.seen_dates.add(date_str)
+        time.sleep(random.uniform(0.05, 0.3))
+
+        if date_str == FAILING_DATE:
+            self.send_response(500)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if first_request and date_str in RATE_LIMITED_DATES:
+            self.send_response(429)
+            self.send_header('Retry-After', '1')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        page = b'<html><body></body></html>' if (league, date_str) in StubCoversHandler.empty_pages else self.page
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(page)))
+        self.end_headers()
+        self.wfile.write(page)
+
+    def log_message(self, format, *args):
+        pass
+
+class CrashingTokenBucket(TokenBucket):
+    """Token bucket that raises after a fixed number of requests, simulating a killed scrape."""
+
+    def __init__(self, crash_after):
+        super().__init__(rate=100, capacity=100)
+        self.remaining = crash_after
+
+    def acquire(self):
+        with self._lock:
+            self.remaining -= 1
+            if self.remaining < 0:
+                raise RuntimeError("Simulated crash")
+        super().acquire()
+
+class RecordingTokenBucket(TokenBucket):
+    """Token bucket that records pause_for delays instead of waiting them out."""
+
+    def __init__(self):
+        super().__init__(rate=100, capacity=100)
+        self.pauses = []
+
+    def pause_for(self, seconds):
+        self.pauses.append(seconds)
+
+def start_stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubCoversHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def test_covers_scraper():
+    """Checks that the parallel scrape returns the same date-ordered games as a sequential one."""
+    server, base_url = start_stub_server()
+    tasks = [(date_str, league) for league in ['ncaab', 'nba'] for date_str in date_range('2023-01-01', '2023-01-10')]
+
+    try:
+        start = time.perf_counter()
+        sequential = scrape_games(tasks, max_workers=1, rate_limiter=TokenBucket(rate=100, capacity=100), base_url=base_url)
+        sequential_time = time.perf_counter() - start
+
+        StubCoversHandler.seen_dates.clear()
+        start = time.perf_counter()
+        parallel = scrape_games(tasks, max_workers=8, rate_limiter=TokenBucket(rate=100, capacity=100), base_url=base_url)
+        parallel_time = time.perf_counter() - start
+    finally:
+        server.shutdown()
+
+    assert parallel == sequential, "Parallel scrape output differs from the sequential scrape"
+    for (date_str, league), games in zip(tasks, parallel):
+        assert games, f"No games parsed for {league} on {date_str}"
+        assert all(game['Date'] == date_str and game['League'] == league.upper() for game in games), \
+            f"Games for {league} on {date_str} are out of order"
+    game_count = sum(len(games) for games in parallel)
+    print(f"SUCCESS: {len(tasks)} pages, {game_count} games; sequential {sequential_time:.2f}s, parallel {parallel_time:.2f}s.")
+
+
+def test_failed_requests_back_off():
+    """Checks that server errors are retried with exponentially growing pauses, not straight away."""
+    server, base_url = start_stub_server()
+    rate_limiter = RecordingTokenBucket()
+    try:
+        games = get_data_for_date(FAILING_DATE, 'nba', rate_limiter=rate_limiter, base_url=base_url)
+    finally:
+        server.shutdown()
+
+    assert games is None, "A page that always fails should return None"
+    assert rate_limiter.pauses == [RETRY_BASE_SECONDS * 2 ** attempt for attempt in range(MAX_RETRIES - 1)], rate_limiter.pauses
+    print(f"SUCCESS: failed requests backed off for {rate_limiter.pauses} seconds.")
+
+
+def test_incremental_scrape():
+    """Checks crash recovery, skipping of finished dates and the refresh window of scrape_incremental."""
+    StubCoversHandler.seen_dates.update(RATE_LIMITED_DATES)
+    server, base_url = start_stub_server()
+    work_dir = tempfile.mkdtemp()
+    output_file = os.path.join(work_dir, 'history.csv')
+    manifest_path = os.path.join(work_dir, 'manifest.json')
+    dataset_dir = os.path.join(work_dir, 'raw_games')
+    leagues = [('ncaab', '2023-01-01', '2023-01-12'), ('nba', '2023-01-01', '2023-01-12')]
+    today = date(2023, 1, 12)
+    options = dict(manifest_path=manifest_path, refresh_days=2, checkpoint_every=6, today=today, base_url=base_url,
+                   max_workers=4, dataset_dir=dataset_dir)
+
+    try:
+        try:
+            scrape_incremental(leagues, output_file, rate_limiter=CrashingTokenBucket(crash_after=15), **options)
+            raise AssertionError("The simulated crash did not happen")
+        except RuntimeError:
+            pass
+        checkpointed = sum(len(dates) for dates in load_manifest(manifest_path)['leagues'].values())
+        assert checkpointed == 12, f"Expected two checkpoints (12 pages) before the crash, got {checkpointed}"
+
+        StubCoversHandler.request_count = 0
+        scrape_incremental(leagues, output_file, rate_limiter=TokenBucket(rate=100, capacity=100), **options)
+        assert StubCoversHandler.request_count == 24 - 12 + 3, "The resumed run should fetch unfinished pages plus the refresh window"
+        after_resume = pd.read_csv(output_file, dtype=str)
+
+        StubCoversHandler.request_count = 0
+        scrape_incremental(leagues, output_file, rate_limiter=TokenBucket(rate=100, capacity=100), **options)
+        assert StubCoversHandler.request_count == 2 * 3, "A re-run should only re-check the refresh window"
+        after_refresh = pd.read_csv(output_file, dtype=str)
+    finally:
+        server.shutdown()
+
+    assert len(after_resume) == 24 * 18 and not after_resume.duplicated().any(), "Every page should be stored exactly once"
+    assert after_refresh.equals(after_resume), "Refreshing recent dates must not duplicate or reorder rows"
+    from_dataset = read_games(dataset_dir).sort_values(['League', 'Date'], kind='stable').reset_index(drop=True)
+    from_csv = read_games(output_file).sort_values(['League', 'Date'], kind='stable').reset_index(drop=True)
+    pd.testing.assert_frame_equal(from_dataset, from_csv, check_categorical=False)
+    print(f"SUCCESS: resumed after crash at {checkpointed}/24 pages; refresh re-checked 6 pages; {len(after_refresh)} games.")
+
+
+def test_incremental_scrape_builds_missing_dataset():
+    """Checks that the first run with a dataset directory stores the whole CSV, not only the new pages."""
+    server, base_url = start_stub_server()
+    work_dir = tempfile.mkdtemp()
+    output_file = os.path.join(work_dir, 'history.csv')
+    dataset_dir = os.path.join(work_dir, 'raw_games')
+    options = dict(manifest_path=os.path.join(work_dir, 'manifest.json'), refresh_days=0, today=date(2023, 1, 12),
+                   base_url=base_url, max_workers=4, rate_limiter=TokenBucket(rate=100, capacity=100))
+
+    try:
+        scrape_incremental([('ncaab', '2022-12-01', '2022-12-04')], output_file, **options)
+        assert not os.path.exists(dataset_dir)
+        scrape_incremental([('nba', '2023-01-01', '2023-01-03')], output_file, dataset_dir=dataset_dir, **options)
+    finally:
+        server.shutdown()
+
+    from_dataset = read_games(dataset_dir).sort_values(['League', 'Date'], kind='stable').reset_index(drop=True)
+    from_csv = read_games(output_file).sort_values(['League', 'Date'], kind='stable').reset_index(drop=True)
+    assert set(from_dataset['League']) == {'NCAAB', 'NBA'}, "Games scraped before the dataset existed are missing from it"
+    pd.testing.assert_frame_equal(from_dataset, from_csv, check_categorical=False)
+    print(f"SUCCESS: the new dataset holds all {len(from_dataset)} games of the CSV.")
+
+
+def test_pending_tasks_rechecks_unsettled_dates():
+    """Checks that dates scraped before their games were final are fetched again, however long ago."""
+    leagues = [('nba', '2025-01-05', '2025-01-20')]
+    manifest = {'leagues': {'nba': {date_str: {'games': 0, 'hash': '', 'scraped_at': '2025-01-10T18:00:00+00:00'}
+                                    for date_str in date_range('2025-01-05', '2025-01-20')}}}
+    tasks = pending_tasks(leagues, manifest, refresh_days=2, today=date(2025, 1, 25))
+    assert tasks == [(date_str, 'nba') for date_str in date_range('2025-01-09', '2025-01-20')], tasks
+    print(f"SUCCESS: {len(tasks)} dates scraped too early are fetched again.")
+
+
+def test_rescraped_empty_dates_leave_dataset():
+    """Checks that rows of a date re-scraped with no games are removed from the dataset, as from the CSV."""
+    server, base_url = start_stub_server()
+    work_dir = tempfile.mkdtemp()
+    output_file = os.path.join(work_dir, 'history.csv')
+    dataset_dir = os.path.join(work_dir, 'raw_games')
+    leagues = [('ncaab', '2023-01-10', '2023-01-11'), ('nba', '2023-01-11', '2023-01-11')]
+    options = dict(manifest_path=os.path.join(work_dir, 'manifest.json'), refresh_days=2, today=date(2023, 1, 12),
+                   base_url=base_url, max_workers=4, rate_limiter=TokenBucket(rate=100, capacity=100), dataset_dir=dataset_dir)
+
+    try:
+        scrape_incremental(leagues, output_file, **options)
+        assert set(read_games(dataset_dir)['League']) == {'NCAAB', 'NBA'}
+        StubCoversHandler.empty_pages.update({('nba', '2023-01-11'), ('ncaab', '2023-01-11')})
+        scrape_incremental(leagues, output_file, **options)
+    finally:
+        StubCoversHandler.empty_pages.clear()
+        server.shutdown()
+
+    from_dataset = read_games(dataset_dir).sort_values(['League', 'Date'], kind='stable').reset_index(drop=True)
+    from_csv = read_games(output_file).sort_values(['League', 'Date'], kind='stable').reset_index(drop=True)
+    assert set(from_csv['League']) == {'NCAAB'} and (from_csv['Date'] == '2023-01-10').all()
+    assert not os.path.exists(os.path.join(dataset_dir, 'League=NBA')) or not os.listdir(os.path.join(dataset_dir, 'League=NBA')), \
+        "The emptied NBA partition should be removed"
+    pd.testing.assert_frame_equal(from_dataset, from_csv, check_categorical=False)
+    print(f"SUCCESS: dates re-scraped with no games left the dataset; {len(from_dataset)} games remain.")
+
+
+if __name__ == '__main__':
+    test_covers_scraper()
+    test_failed_requests_back_off()
+    test_incremental_scrape()
+    test_incremental_scrape_builds_missing_dataset()
+    test_pending_tasks_rechecks_unsettled_dates()
+    test_rescraped_empty_dates_leave_dataset()
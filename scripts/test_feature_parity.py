@@ -0,0 +1,243 @@
+import os
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from scripts.feature_engineering import calculate_advanced_rolling_stats, clean_data, rolling_team_stats
+from src.predict import (
+    FEATURE_COLS, TEAM_NAME_MAP, TeamHistoryIndex, calculate_slate_features, standardize_team_name
+)
+from src.team_state import TeamState
+
+def load_history(path='data/raw/historical_basketball_data.csv'):
+    df = pd.read_csv(path, parse_dates=['Date'])
+    for col in ['HomeScore', 'AwayScore', 'OU_Line']:
+        df[col] = pd.to_numeric(df[col], errors='coerce')
+    df.dropna(subset=['HomeScore', 'AwayScore', 'OU_Line'], inplace=True)
+    return df
+
+def legacy_features_for_game(home_team, away_team, historical_df, window_size=10):
+    """The original per-game iterrows implementation of calculate_features_for_game."""
+    def team_history(team_name):
+        std_team_name = standardize_team_name(team_name)
+        history = historical_df[
+            (historical_df['HomeTeam'].str.lower().str.contains(std_team_name, regex=False)) |
+            (historical_df['AwayTeam'].str.lower().str.contains(std_team_name, regex=False))
+        ].copy()
+        return history.sort_values(by='Date', ascending=False, kind='stable')
+
+    home_history = team_history(home_team)
+    away_history = team_history(away_team)
+    std_home_team = standardize_team_name(home_team)
+    std_away_team = standardize_team_name(away_team)
+
+    if len(home_history) == 0 and len(away_history) == 0:
+        return None
+
+    home_stats = {'mov': [], 'pts_for': [], 'pts_against': [], 'ou_hits': []}
+    for _, game in home_history.head(window_size).iterrows():
+        ou_line_val = game.get('OU_Line', 0)
+        if pd.isna(ou_line_val):
+            ou_line_val = 0
+        ou_hit = 1 if (game['HomeScore'] + game['AwayScore']) > ou_line_val else 0
+        if std_home_team in game['HomeTeam'].lower():
+            home_stats['mov'].append(game['HomeScore'] - game['AwayScore'])
+            home_stats['pts_for'].append(game['HomeScore'])
+            home_stats['pts_against'].append(game['AwayScore'])
+        else:
+            home_stats['mov'].append(game['AwayScore'] - game['HomeScore'])
+            home_stats['pts_for'].append(game['AwayScore'])
+            home_stats['pts_against'].append(game['HomeScore'])
+        home_stats['ou_hits'].append(ou_hit)
+
+    away_stats = {'mov': [], 'pts_for': [], 'pts_against': [], 'ou_hits': []}
+    for _, game in away_history.head(window_size).iterrows():
+        ou_line_val = game.get('OU_Line', 0)
+        if pd.isna(ou_line_val):
+            ou_line_val = 0
+        ou_hit = 1 if (game['HomeScore'] + game['AwayScore']) > ou_line_val else 0
+        if std_away_team in game['AwayTeam'].lower():
+            away_stats['mov'].append(game['AwayScore'] - game['HomeScore'])
+            away_stats['pts_for'].append(game['AwayScore'])
+            away_stats['pts_against'].append(game['HomeScore'])
+        else:
+            away_stats['mov'].append(game['HomeScore'] - game['AwayScore'])
+            away_stats['pts_for'].append(game['HomeScore'])
+            away_stats['pts_against'].append(game['HomeScore'])
+        away_stats['ou_hits'].append(ou_hit)
+
+    features = {}
+    for prefix, stats in [('Home', home_stats), ('Away', away_stats)]:
+        features[f'{prefix}_Avg_MOV'] = np.mean(stats['mov']) if stats['mov'] else 0
+        features[f'{prefix}_Avg_Pts_For'] = np.mean(stats['pts_for']) if stats['pts_for'] else 0
+        features[f'{prefix}_Avg_Pts_Against'] = np.mean(stats['pts_against']) if stats['pts_against'] else 0
+        features[f'{prefix}_Avg_OU_Hit_Rate'] = np.mean(stats['ou_hits']) if stats['ou_hits'] else 0
+    features['Avg_MOV_Diff'] = features['Home_Avg_MOV'] - features['Away_Avg_MOV']
+    features['Avg_Pts_For_Diff'] = features['Home_Avg_Pts_For'] - features['Away_Avg_Pts_For']
+    features['Avg_Pts_Against_Diff'] = features['Home_Avg_Pts_Against'] - features['Away_Avg_Pts_Against']
+    features['Avg_OU_Hit_Rate_Diff'] = features['Home_Avg_OU_Hit_Rate'] - features['Away_Avg_OU_Hit_Rate']
+    return features
+
+def legacy_rolling_stats(df, window_size=10):
+    """The original iterrows implementation of calculate_advanced_rolling_stats.
+
+    Sorts stably like the current code; the original quicksort left the order
+    of same-day games unspecified.
+    """
+    df = df.sort_values('Date', kind='stable').reset_index(drop=True)
+    
+    team_history = {}
+    
+    rolling_stats = []
+
+    for index, row in df.iterrows():
+        home_team = row['HomeTeam']
+        away_team = row['AwayTeam']
+        
+        home_stats = {'mov': np.nan, 'pts_for': np.nan, 'pts_against': np.nan, 'ou_hits': np.nan}
+        away_stats = {'mov': np.nan, 'pts_for': np.nan, 'pts_against': np.nan, 'ou_hits': np.nan}
+
+        if home_team in team_history and len(team_history[home_team]) >= window_size:
+            history = team_history[home_team][-window_size:]
+            home_stats['mov'] = np.mean([g['mov'] for g in history])
+            home_stats['pts_for'] = np.mean([g['pts_for'] for g in history])
+            home_stats['pts_against'] = np.mean([g['pts_against'] for g in history])
+            home_stats['ou_hits'] = np.mean([g['ou_hit'] for g in history])
+            
+        if away_team in team_history and len(team_history[away_team]) >= window_size:
+            history = team_history[away_team][-window_size:]
+            away_stats['mov'] = np.mean([g['mov'] for g in history])
+            away_stats['pts_for'] = np.mean([g['pts_for'] for g in history])
+            away_stats['pts_against'] = np.mean([g['pts_against'] for g in history])
+            away_stats['ou_hits'] = np.mean([g['ou_hit'] for g in history])
+
+        rolling_stats.append({
+            'Home_Avg_MOV': home_stats['mov'], 'Home_Avg_Pts_For': home_stats['pts_for'], 
+            'Home_Avg_Pts_Against': home_stats['pts_against'], 'Home_Avg_OU_Hit_Rate': home_stats['ou_hits'],
+            'Away_Avg_MOV': away_stats['mov'], 'Away_Avg_Pts_For': away_stats['pts_for'],
+            'Away_Avg_Pts_Against': away_stats['pts_against'], 'Away_Avg_OU_Hit_Rate': away_stats['ou_hits']
+        })
+
+        ou_hit = 1 if (row['HomeScore'] + row['AwayScore']) > row['OU_Line'] else 0
+        
+        if home_team not in team_history: team_history[home_team] = []
+        team_history[home_team].append({
+            'mov': row['HomeScore'] - row['AwayScore'], 
+            'pts_for': row['HomeScore'], 'pts_against': row['AwayScore'], 'ou_hit': ou_hit
+        })
+        
+        if away_team not in team_history: team_history[away_team] = []
+        team_history[away_team].append({
+            'mov': row['AwayScore'] - row['HomeScore'], 
+            'pts_for': row['AwayScore'], 'pts_against': row['HomeScore'], 'ou_hit': ou_hit
+        })
+
+    stats_df = pd.DataFrame(rolling_stats)
+    df = pd.concat([df, stats_df], axis=1)
+    
+    df.dropna(inplace=True)
+    return df
+
+def build_synthetic_games(n_games, n_teams=400, seed=0):
+    """Random date-ordered games, including some where a team meets itself as truncated names do."""
+    rng = np.random.default_rng(seed)
+    teams = np.array([f'Team {i}' for i in range(n_teams)], dtype=object)
+    home = rng.integers(0, n_teams, n_games)
+    away = np.where(rng.random(n_games) < 0.01, home, rng.integers(0, n_teams, n_games))
+    return pd.DataFrame({
+        'Date': pd.Timestamp('2000-01-01') + pd.to_timedelta(np.sort(rng.integers(0, 20 * 365, n_games)), unit='D'),
+        'League': 'NBA',
+        'HomeTeam': teams[home],
+        'AwayTeam': teams[away],
+        'HomeScore': rng.integers(60, 140, n_games),
+        'AwayScore': rng.integers(60, 140, n_games),
+        'OU_Line': rng.integers(280, 460, n_games) / 2,
+    })
+
+def build_slate(size, seed=42):
+    """Random (home, away) pairs over the mapped team names plus a few names with no history."""
+    teams = list(TEAM_NAME_MAP) + ['Nowhere Nobodies', 'Atlantis Tridents']
+    rng = np.random.default_rng(seed)
+    pairs = rng.choice(len(teams), size=(size, 2))
+    return [(teams[home], teams[away]) for home, away in pairs]
+
+def test_feature_parity():
+    """Checks calculate_slate_features against the legacy per-game loop, value for value."""
+    historical_df = load_history()
+    team_index = TeamHistoryIndex(historical_df)
+    matchups = build_slate(300) + [('Nowhere Nobodies', 'Atlantis Tridents')]
+
+    batched = calculate_slate_features(matchups, historical_df, team_index=team_index)
+    mismatches = 0
+    for row, (home_team, away_team) in enumerate(matchups):
+        expected = legacy_features_for_game(home_team, away_team, historical_df)
+        actual = batched.iloc[row]
+        if expected is None:
+            ok = actual.isna().all()
+        else:
+            ok = np.array_equal(actual[FEATURE_COLS].to_numpy(), np.array([expected[c] for c in FEATURE_COLS], dtype=float))
+        if not ok:
+            mismatches += 1
+            print(f"MISMATCH: {home_team} vs {away_team}")
+    assert mismatches == 0, f"{mismatches} of {len(matchups)} matchups differ from the legacy features"
+    print(f"SUCCESS: {len(matchups)} matchups match the legacy features exactly.")
+
+    big_slate = build_slate(5000, seed=7)
+    start = time.perf_counter()
+    calculate_slate_features(big_slate, historical_df, team_index=team_index)
+    print(f"Built features for {len(big_slate)} matchups in {(time.perf_counter() - start) * 1000:.1f} ms.")
+
+
+def test_team_state_parity():
+    """Checks that features looked up in a saved TeamState equal the ones computed from the history."""
+    historical_df = load_history()
+    team_index = TeamHistoryIndex(historical_df)
+    with tempfile.TemporaryDirectory() as work_dir:
+        state_path = os.path.join(work_dir, 'team_state.parquet')
+        TeamState.from_index(team_index).save(state_path)
+        team_state = TeamState.load(state_path)
+
+    matchups = build_slate(300) + [('Nowhere Nobodies', 'Atlantis Tridents')]
+    expected = calculate_slate_features(matchups, historical_df, team_index=team_index)
+    actual = calculate_slate_features(matchups, team_index=team_index, team_state=team_state)
+    pd.testing.assert_frame_equal(actual, expected, check_exact=True)
+
+    mapped_slate = [(home, away) for home, away in build_slate(5000, seed=7) if home in TEAM_NAME_MAP and away in TEAM_NAME_MAP]
+    start = time.perf_counter()
+    calculate_slate_features(mapped_slate, team_state=team_state)
+    lookup_time = time.perf_counter() - start
+    start = time.perf_counter()
+    calculate_slate_features(mapped_slate, historical_df, team_index=TeamHistoryIndex(historical_df))
+    history_time = time.perf_counter() - start
+    print(f"SUCCESS: {len(matchups)} matchups match through the team-state snapshot "
+          f"({len(team_state.teams)} keys); {len(mapped_slate)} matchups in {lookup_time * 1000:.1f} ms "
+          f"from the snapshot vs {history_time * 1000:.1f} ms from a fresh history index.")
+
+
+def test_rolling_stats_parity():
+    """Checks the streaming rolling-stats engine against the legacy iterrows loop, column for column."""
+    raw_df = pd.read_csv('data/raw/historical_basketball_data.csv')
+    datasets = {
+        'bundled history': clean_data(raw_df.copy()),
+        'synthetic games': build_synthetic_games(20_000),
+    }
+    for label, df in datasets.items():
+        expected = legacy_rolling_stats(df.copy())
+        actual = calculate_advanced_rolling_stats(df.copy())
+        pd.testing.assert_frame_equal(actual, expected, check_exact=True)
+
+        chunked, _ = rolling_team_stats(df.sort_values('Date').reset_index(drop=True), chunk_size=997)
+        unchunked, _ = rolling_team_stats(df.sort_values('Date').reset_index(drop=True))
+        pd.testing.assert_frame_equal(chunked, unchunked, check_exact=True)
+        print(f"SUCCESS: {label} ({len(df)} games) matches the legacy rolling stats exactly.")
+
+    big_df = build_synthetic_games(2_000_000, n_teams=1_000)
+    start = time.perf_counter()
+    rolling_team_stats(big_df)
+    print(f"Rolling stats for {len(big_df)} games in {time.perf_counter() - start:.2f} s.")
+
+
+if __name__ == '__main__':
+    test_feature_parity()
+    test_team_state_parity()
+    test_rolling_stats_parity()
@@ -0,0 +1,73 @@
+import os
+import subprocess
+import sys
+import tempfile
+import joblib
+import numpy as np
+from sklearn.ensemble import StackingClassifier
+from sklearn.linear_model import LogisticRegression
+from scripts.train_model import FEATURES, MODEL_PATH, base_estimators, load_training_data
+from src.ensemble import OutOfFoldStackingModel
+from src.flat_model import FlatStackingModel
+
+TOLERANCE = 1e-6
+
+def small_stacks(X_train, y_train):
+    """A StackingClassifier and an OutOfFoldStackingModel with few, deep trees, quick to fit."""
+    estimators = base_estimators()
+    estimators['xgb'].set_params(n_estimators=30, max_depth=6)
+    estimators['lgbm'].set_params(n_estimators=30, num_leaves=63, verbose=-1)
+    estimators['rf'].set_params(n_estimators=30, min_samples_leaf=3)
+    stacking = StackingClassifier(list(estimators.items()), final_estimator=LogisticRegression(solver='liblinear'), cv=3)
+    stacking.fit(X_train, y_train)
+    meta_learner = LogisticRegression(solver='liblinear').fit(stacking.transform(X_train), y_train)
+    return {'StackingClassifier': stacking, 'OutOfFoldStackingModel': OutOfFoldStackingModel(stacking.named_estimators_.items(), meta_learner)}
+
+def assert_parity(label, model, flat_model, X):
+    difference = np.abs(flat_model.predict_proba(X) - model.predict_proba(X)).max()
+    assert difference <= TOLERANCE, f"{label}: probabilities differ by {difference:.2e}"
+    assert np.array_equal(flat_model.predict(X), model.predict(X)), f"{label}: predicted classes differ"
+    print(f"  {label}: max probability difference {difference:.1e} on {len(X)} rows")
+
+def test_flat_model_parity():
+    """Checks that the exported model reproduces the ensemble on the held-out split, with and without missing values."""
+    split = load_training_data()
+    assert split is not None, "Run the feature engineering script first."
+    X_train, X_test, y_train, _ = split
+    models = small_stacks(X_train, y_train)
+    if os.path.exists(MODEL_PATH):
+        models['saved model'] = joblib.load(MODEL_PATH)
+
+    X_missing = X_test.copy()
+    X_missing.iloc[::3, 0] = np.nan
+    X_missing.iloc[::5, 8] = np.nan
+    with tempfile.TemporaryDirectory() as work_dir:
+        for label, model in models.items():
+            path = os.path.join(work_dir, 'flat.npz')
+            FlatStackingModel.from_stacking(model, FEATURES).save(path)
+            flat_model = FlatStackingModel.load(path)
+            assert_parity(label, model, flat_model, X_test)
+            assert_parity(f"{label}, missing values", model, flat_model, X_missing)
+            assert_parity(f"{label}, one row", model, flat_model, X_test.iloc[:1])
+    print("SUCCESS: flat models match their ensembles on the held-out split.")
+
+def test_serving_imports():
+    """Checks that loading and scoring a flat model imports none of the training libraries."""
+    split = load_training_data()
+    X_train, X_test, y_train, _ = split
+    with tempfile.TemporaryDirectory() as work_dir:
+        path = os.path.join(work_dir, 'flat.npz')
+        FlatStackingModel.from_stacking(small_stacks(X_train, y_train)['StackingClassifier'], FEATURES).save(path)
+        code = (
+            "import sys, numpy as np; from src.flat_model import FlatStackingModel; "
+            f"FlatStackingModel.load({path!r}).predict_proba(np.zeros((3, {len(FEATURES)}))); "
+            "print(sorted(name for name in ('xgboost', 'lightgbm', 'sklearn') if name in sys.modules))"
+        )
+        imported = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout.strip()
+    assert imported == '[]', f"Serving imported {imported}"
+    print("SUCCESS: the flat model loads and predicts without XGBoost, LightGBM or scikit-learn.")
+
+
+if __name__ == '__main__':
+    test_flat_model_parity()
+    test_serving_imports()
@@ -0,0 +1,90 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+import joblib
+import numpy as np
+from scripts.test_flat_model import small_stacks
+from scripts.train_model import FEATURES, load_training_data
+from scripts.trial_cache import data_fingerprint
+from src.flat_model import FlatStackingModel
+from src.model_registry import ModelRegistry
+from src.predict import load_model
+
+def test_model_registry():
+    """Checks versioning, the active pointer, manifests and memory-mapped loading of registered models."""
+    X_train, X_test, y_train, _ = load_training_data()
+    stacking = small_stacks(X_train, y_train)['StackingClassifier']
+    flat_model = FlatStackingModel.from_stacking(stacking, FEATURES)
+
+    with tempfile.TemporaryDirectory() as root:
+        registry = ModelRegistry(root)
+        assert registry.active_version() is None and registry.versions() == []
+        first = registry.register(stacking, FEATURES, data_fingerprint(X_train, y_train), {'roc_auc': 0.5}, flat_model=flat_model)
+        second = registry.register(stacking, FEATURES, flat_model=None, activate=False, benchmark=False)
+        assert (first, second) == ('v0001', 'v0002') and registry.versions() == [first, second]
+        assert registry.active_version() == first
+        assert not any(name.startswith('.staging') for name in os.listdir(root)), "A staging directory was left behind"
+
+        manifest = registry.manifest(first)
+        assert manifest['version'] == first and manifest['features'] == FEATURES and manifest['metrics'] == {'roc_auc': 0.5}
+        assert manifest['data_fingerprint'] == data_fingerprint(X_train, y_train)
+        assert set(manifest['load_seconds']) == {'joblib', 'joblib_mmap', 'flat', 'flat_mmap'}
+        with open(os.path.join(root, first, 'flat', 'metadata.json')) as f:
+            assert json.load(f)['features'] == FEATURES
+
+        mapped = registry.load()
+        assert isinstance(mapped, FlatStackingModel)
+        assert all(isinstance(model.threshold, np.memmap) for model in mapped.base_models), "Flat arrays were not memory-mapped"
+        assert np.abs(mapped.predict_proba(X_test) - stacking.predict_proba(X_test)).max() <= 1e-6
+
+        served = load_model(registry=registry)
+        assert load_model(registry=registry) is served, "The served model was reloaded without a change"
+        registry.benchmark(first, repeats=1)
+        assert load_model(registry=registry) is served, "Re-benchmarking the active version reloaded it"
+
+        joblib_path = os.path.join(root, 'explicit.joblib')
+        joblib.dump(stacking, joblib_path)
+        with mock.patch('src.predict.ModelRegistry', lambda: registry):
+            assert load_model() is served, "The registry should be served by default"
+            explicit = load_model(path=joblib_path, flat_path=os.path.join(root, 'missing'))
+        assert not isinstance(explicit, FlatStackingModel), "An explicit path was ignored for the active registry version"
+
+        registry.activate(second)
+        served = load_model(registry=registry)
+        assert not isinstance(served, FlatStackingModel), "A version without a flat export should load from joblib"
+        assert np.array_equal(served.predict_proba(X_test), stacking.predict_proba(X_test))
+        try:
+            registry.activate('v0099')
+        except ValueError:
+            pass
+        else:
+            raise AssertionError("Activating a missing version should fail")
+        assert registry.active_version() == second
+    print("SUCCESS: registered versions, the active pointer and memory-mapped loading behave as expected.")
+
+
+def test_registry_cli():
+    """Checks that the CLI registers an OutOfFoldStackingModel and refuses to benchmark without an active version."""
+    X_train, _, y_train, _ = load_training_data()
+    out_of_fold = small_stacks(X_train, y_train)['OutOfFoldStackingModel']
+
+    with tempfile.TemporaryDirectory() as root:
+        def run(*args):
+            return subprocess.run([sys.executable, '-m', 'src.model_registry', '--root', root, *args], capture_output=True, text=True)
+
+        benchmark = run('benchmark')
+        assert benchmark.returncode == 2 and 'No active model' in benchmark.stderr, benchmark.stderr
+        model_path = os.path.join(root, 'halving.joblib')
+        joblib.dump(out_of_fold, model_path)
+        register = run('register', model_path)
+        assert register.returncode == 0, register.stderr
+        assert ModelRegistry(root).manifest('v0001')['features'] == FEATURES
+    print("SUCCESS: the registry CLI registers out-of-fold stacks and reports a missing active version.")
+
+
+if __name__ == '__main__':
+    test_model_registry()
+    test_registry_cli()
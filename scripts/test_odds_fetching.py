@@ -0,0 +1,145 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from src.api_client import get_quota_status, get_upcoming_games, get_upcoming_games_many
+
+STUB_LATENCY = 0.5
+FAILING_SPORT = 'basketball_wnba'
+
+class StubOddsHandler(BaseHTTPRequestHandler):
+    """Serves a fake odds payload per sport after a fixed delay; one sport always fails."""
+
+    request_count = 0
+
+    def do_GET(self):
+        sport_key = self.path.split('/sports/')[1].split('/')[0]
+        StubOddsHandler.request_count += 1
+        time.sleep(STUB_LATENCY)
+        if sport_key == FAILING_SPORT:
+            body, status = {'message': 'Simulated upstream failure'}, 500
+        else:
+            body, status = [{'id': f'{sport_key}-1', 'home_team': 'Boston Celtics', 'away_team': 'Miami Heat', 'bookmakers': []}], 200
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.send_header('x-requests-remaining', str(500 - StubOddsHandler.request_count))
+        self.send_header('x-requests-used', str(StubOddsHandler.request_count))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubOddsHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def test_odds_fetching():
+    """Checks concurrent fetching and per-league error isolation against a local stub server."""
+    server, base_url = start_stub_server()
+    sport_keys = ['basketball_ncaab', 'basketball_nba', 'basketball_wnba']
+    settings = {'ODDS_CACHE_DIR': tempfile.mkdtemp(), 'ODDS_CACHE_TTL': '0', 'ODDS_CACHE_STALE_TTL': '0'}
+    try:
+        with mock.patch.dict(os.environ, settings):
+            start = time.perf_counter()
+            sequential = {sport_key: get_upcoming_games(sport_key, api_key='test', base_url=base_url) for sport_key in sport_keys}
+            sequential_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            concurrent = get_upcoming_games_many(sport_keys, api_key='test', base_url=base_url)
+            concurrent_time = time.perf_counter() - start
+    finally:
+        server.shutdown()
+
+    assert concurrent == sequential, "Concurrent results differ from sequential results"
+    assert concurrent[FAILING_SPORT] is None, "The failing league should map to None"
+    assert all(concurrent[sport_key] for sport_key in sport_keys if sport_key != FAILING_SPORT), "Healthy leagues should still return games"
+    assert concurrent_time < sequential_time / 2, "Concurrent fetch should take about one round trip, not three"
+    print(f"SUCCESS: sequential {sequential_time:.2f}s, concurrent {concurrent_time:.2f}s, failing league isolated.")
+
+
+def test_odds_cache():
+    """Checks that cached leagues cost no upstream requests and that quota headers are recorded."""
+    server, base_url = start_stub_server()
+    sport_keys = ['basketball_ncaab', 'basketball_nba']
+    settings = {'ODDS_CACHE_DIR': tempfile.mkdtemp(), 'ODDS_CACHE_TTL': '60', 'ODDS_CACHE_STALE_TTL': '60'}
+    try:
+        with mock.patch.dict(os.environ, settings):
+            first = get_upcoming_games_many(sport_keys, api_key='test', base_url=base_url)
+            requests_after_first = StubOddsHandler.request_count
+
+            start = time.perf_counter()
+            second = get_upcoming_games_many(sport_keys, api_key='test', base_url=base_url)
+            cached_time = time.perf_counter() - start
+            assert StubOddsHandler.request_count == requests_after_first, "Fresh cache entries should not hit upstream"
+            assert second == first
+
+            os.environ['ODDS_CACHE_TTL'] = '0'
+            start = time.perf_counter()
+            stale = get_upcoming_games_many(sport_keys, api_key='test', base_url=base_url)
+            stale_time = time.perf_counter() - start
+            assert stale == first and stale_time < STUB_LATENCY, "Stale entries should be served without waiting"
+            time.sleep(STUB_LATENCY * 2)
+            assert StubOddsHandler.request_count == requests_after_first + len(sport_keys), "Stale entries should refresh in the background"
+    finally:
+        server.shutdown()
+
+    quota = get_quota_status()
+    assert quota['used'] == str(StubOddsHandler.request_count), "Quota should reflect the latest response headers"
+    print(f"SUCCESS: cached fetch {cached_time * 1000:.1f} ms, stale fetch {stale_time * 1000:.1f} ms, quota {quota['remaining']} remaining.")
+
+
+def test_corrupt_odds_cache():
+    """Checks that cache files that are not valid entries are fetched again instead of raising."""
+    server, base_url = start_stub_server()
+    cache_dir = tempfile.mkdtemp()
+    settings = {'ODDS_CACHE_DIR': cache_dir, 'ODDS_CACHE_TTL': '60', 'ODDS_CACHE_STALE_TTL': '60'}
+    entries = ['{}', '{"games": []}', '{"fetched_at": "yesterday", "games": []}', '[1, 2]', 'not json']
+    try:
+        with mock.patch.dict(os.environ, settings):
+            games = get_upcoming_games('basketball_nba', api_key='test', base_url=base_url)
+            cache_file, = [name for name in os.listdir(cache_dir) if name.startswith('basketball_nba')]
+            for entry in entries:
+                with open(os.path.join(cache_dir, cache_file), 'w') as f:
+                    f.write(entry)
+                assert get_upcoming_games('basketball_nba', api_key='test', base_url=base_url) == games, f"Cache entry {entry!r} was not refetched"
+                with open(os.path.join(cache_dir, cache_file)) as f:
+                    assert json.load(f)['games'] == games, "The refetched games should replace the bad entry"
+    finally:
+        server.shutdown()
+    print(f"SUCCESS: {len(entries)} malformed cache entries refetched.")
+
+
+def test_warmup_odds():
+    """Checks that the warm-up takes the API key per call, retries failed leagues and reuses the others."""
+    from src.warmup import Warmup
+    server, base_url = start_stub_server()
+    sport_keys = ['basketball_nba', FAILING_SPORT]
+    settings = {'ODDS_API_BASE_URL': base_url, 'ODDS_CACHE_DIR': tempfile.mkdtemp(), 'ODDS_CACHE_TTL': '60'}
+    try:
+        with mock.patch.dict(os.environ, settings):
+            warmup = Warmup(sport_keys)
+            assert warmup.odds_futures(None) == {}, "No odds should be requested without a key"
+            first = warmup.odds_futures('test')
+            warmup.wait(30)
+            assert first['basketball_nba'].result() and first[FAILING_SPORT].exception() is not None
+            second = warmup.odds_futures('test')
+            assert second['basketball_nba'] is first['basketball_nba'], "Fetched leagues should be reused within the TTL"
+            assert second[FAILING_SPORT] is not first[FAILING_SPORT], "A failed league should be requested again"
+            assert warmup.odds_futures('other-key')['basketball_nba'] is not first['basketball_nba'], "A new key should fetch again"
+    finally:
+        server.shutdown()
+    print("SUCCESS: the warm-up retries failed leagues and uses the current API key.")
+
+
+if __name__ == '__main__':
+    test_odds_fetching()
+    test_odds_cache()
+    test_corrupt_odds_cache()
+    test_warmup_odds()
@@ -0,0 +1,69 @@
+import copy
+import json
+import os
+import tempfile
+import threading
+from scripts.benchmark_first_prediction import odds_payloads
+from src.prediction_cache import PredictionCache
+from src.predict import generate_predictions
+
+SPORT_KEY = 'basketball_nba'
+
+def move_line(game, points):
+    game = copy.deepcopy(game)
+    for bookmaker in game['bookmakers']:
+        for outcome in bookmaker['markets'][0]['outcomes']:
+            outcome['point'] += points
+    return game
+
+def same_predictions(actual, expected):
+    """Equal records, with probabilities compared to within the rounding of a differently sized batch."""
+    return len(actual) == len(expected) and all(
+        {**a, 'Probability': 0} == {**e, 'Probability': 0} and abs(a['Probability'] - e['Probability']) <= 1e-12
+        for a, e in zip(actual, expected))
+
+def test_prediction_cache():
+    """Checks that cached predictions match fresh ones and that only changed games are predicted again."""
+    games = odds_payloads()[SPORT_KEY]
+    games.append(dict(games[0], id='unknown', home_team='Nowhere Team', away_team='Nobody Team'))
+    expected = generate_predictions(SPORT_KEY, games)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache = PredictionCache(cache_dir)
+        assert generate_predictions(SPORT_KEY, games, cache) == expected
+        assert (cache.hits, cache.misses) == (0, len(games))
+        assert generate_predictions(SPORT_KEY, games, cache) == expected
+        assert (cache.hits, cache.misses) == (len(games), len(games)), "An unchanged slate should come from the cache"
+
+        moved = [move_line(games[1], 2.5)] + games[2:]
+        predictions = generate_predictions(SPORT_KEY, moved, cache)
+        assert (cache.hits, cache.misses) == (2 * len(games) - 2, len(games) + 1), "Only the moved line should be predicted again"
+        assert same_predictions(predictions, generate_predictions(SPORT_KEY, moved))
+        with open(cache.path(SPORT_KEY)) as f:
+            assert len(json.load(f)['entries']) == len(moved), "Games no longer on the slate should be dropped"
+
+        game, line = games[0], 220.5
+        key = PredictionCache.entry_key(game, line, 'model-a', 'history-a')
+        assert key == PredictionCache.entry_key(game, 220.50, 'model-a', 'history-a')
+        assert key != PredictionCache.entry_key(game, line, 'model-b', 'history-a'), "A new model should invalidate the entry"
+        assert key != PredictionCache.entry_key(game, line, 'model-a', 'history-b'), "New results should invalidate the entry"
+
+        cache.clear()
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(generate_predictions(SPORT_KEY, games, cache))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert all(result == expected for result in results), "Concurrent sessions disagreed"
+        assert cache.misses == len(games) + 1 + len(games), "Concurrent sessions should predict the slate once"
+        assert sorted(os.listdir(cache_dir)) == [f'{SPORT_KEY}.json'], "A temporary file was left behind"
+
+        with open(cache.path(SPORT_KEY), 'w') as f:
+            f.write('{"entries": ')
+        assert generate_predictions(SPORT_KEY, games, cache) == expected, "A corrupt cache file should be ignored"
+    print(f"SUCCESS: {len(games)} cached predictions match fresh ones and only changed games are predicted again.")
+
+
+if __name__ == '__main__':
+    test_prediction_cache()
@@ -0,0 +1,72 @@
+import http.client
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from scripts.benchmark_first_prediction import odds_payloads
+from src.predict import load_model, load_team_state, predict_slate, select_ou_line
+from src.prediction_server import MicroBatcher, make_server
+
+def post(port, path, body):
+    connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    connection.request('POST', path, json.dumps(body), {'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+def test_micro_batcher():
+    """Checks that concurrent submissions are grouped up to the batch size and keep their own results."""
+    sizes = []
+    release = threading.Event()
+
+    def predict_batch(items):
+        release.wait()
+        sizes.append(len(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(predict_batch, max_batch_size=8, max_wait=0.05)
+    futures = [batcher.submit(i) for i in range(20)]
+    release.set()
+    assert [future.result(5) for future in futures] == [i * 2 for i in range(20)]
+    batcher.close()
+    # The first item is taken alone while predict_batch blocks; the rest queue up behind it.
+    assert sum(sizes) == 20 and max(sizes) == 8 and len(sizes) <= 4, sizes
+
+def test_prediction_server():
+    """Checks the HTTP service against direct predictions, its batching and its error responses."""
+    requests = [{'league': league, 'home_team': game['home_team'], 'away_team': game['away_team'], 'ou_line': select_ou_line(game)}
+                for league, games in zip(['NCAAB', 'NBA', 'WNBA'], odds_payloads().values()) for game in games]
+    expected = predict_slate([(f"basketball_{request['league'].lower()}", request, request['ou_line']) for request in requests],
+                             load_model(), load_team_state())
+
+    server = make_server(port=0, max_batch_size=16, max_wait=0.02)
+    port = server.server_address[1]
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        with ThreadPoolExecutor(max_workers=len(requests)) as executor:
+            responses = list(executor.map(lambda request: post(port, '/predict', request), requests))
+        assert all(status == 200 for status, _ in responses), responses
+        for (_, record), reference in zip(responses, expected):
+            assert {**record, 'Probability': 0} == {**reference, 'Probability': 0}
+            assert abs(record['Probability'] - reference['Probability']) <= 1e-12
+        assert server.batcher.batches < len(requests), "Concurrent requests should share batches"
+
+        status, records = post(port, '/predict', requests[:3])
+        assert status == 200 and len(records) == 3 and records[0]['Match'] == expected[0]['Match']
+        status, body = post(port, '/predict', dict(requests[0], home_team='Nowhere Team', away_team='Nobody Team'))
+        assert status == 422 and 'error' in body
+        for bad in [dict(requests[0], league='NFL'), dict(requests[0], ou_line='high'), {'league': 'NBA'}, 'text']:
+            assert post(port, '/predict', bad)[0] == 400, bad
+
+        connection = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+        connection.request('GET', '/health')
+        health = json.loads(connection.getresponse().read())
+        assert health['status'] == 'ok' and health['requests'] == len(requests) + 4
+    finally:
+        server.shutdown()
+        server.server_close()
+        server.batcher.close()
+    print(f"SUCCESS: {len(requests)} concurrent requests answered in {health['batches']} batches, matching direct predictions.")
+
+
+if __name__ == '__main__':
+    test_micro_batcher()
+    test_prediction_server()
@@ -0,0 +1,50 @@
+import os
+import tempfile
+import threading
+import time
+from src.resource_cache import ResourceCache
+
+def test_resource_cache():
+    """Checks reuse, reload on change, and that a slow load does not block other resources."""
+    work_dir = tempfile.mkdtemp()
+    model_path, history_path = os.path.join(work_dir, 'model.bin'), os.path.join(work_dir, 'history.csv')
+    for path in (model_path, history_path):
+        with open(path, 'w') as f:
+            f.write(path)
+    cache = ResourceCache()
+    assert cache.get('history', history_path, lambda path: 'v1') == 'v1'
+    assert cache.get('history', history_path, lambda path: 'v2') == 'v1', "An unchanged file should not be reloaded"
+
+    loading, release = threading.Event(), threading.Event()
+
+    def slow_loader(path):
+        loading.set()
+        release.wait(10)
+        return 'model'
+
+    model_thread = threading.Thread(target=cache.get, args=('model', model_path, slow_loader))
+    model_thread.start()
+    loading.wait(10)
+    start = time.perf_counter()
+    assert cache.get('history', history_path, lambda path: 'v2') == 'v1'
+    cache.fingerprint(history_path)
+    blocked_seconds = time.perf_counter() - start
+    release.set()
+    model_thread.join()
+    assert blocked_seconds < 1, "Looking up another resource waited for the model load"
+
+    with open(history_path, 'a') as f:
+        f.write('new game')
+    assert cache.get('history', history_path, lambda path: 'v2') == 'v2', "A changed file should be reloaded"
+    stats = cache.stats()['history']
+    assert (stats['hits'], stats['misses'], stats['loads']) == (2, 2, 2)
+    try:
+        cache.get('missing', os.path.join(work_dir, 'missing.csv'), lambda path: None)
+        raise AssertionError("A missing file should raise FileNotFoundError")
+    except FileNotFoundError:
+        pass
+    print(f"SUCCESS: lookups of other resources took {blocked_seconds * 1000:.1f} ms during a blocked model load.")
+
+
+if __name__ == '__main__':
+    test_resource_cache()
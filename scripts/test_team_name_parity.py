@@ -0,0 +1,81 @@
+import time
+import pandas as pd
+from src.team_names import TEAM_NAME_MAP, standardize_team_name, team_name_resolver
+
+def legacy_standardize_team_name(team_name):
+    """The original linear-scan implementation of standardize_team_name."""
+    normalized_input = team_name.title()
+
+    if normalized_input in TEAM_NAME_MAP:
+        return TEAM_NAME_MAP[normalized_input].lower()
+    
+    for key, value in TEAM_NAME_MAP.items():
+        if normalized_input == key.title():
+             return value.lower()
+
+    team_name_lower = team_name.lower()
+    
+    common_suffixes = [
+        ' state', ' tech', ' a&m', ' am', ' red storm', ' roadrunners', ' bears', ' gaels', ' trojans', ' rebels',
+        ' buckeyes', ' wolfpack', ' tigers', ' cougars', ' ramblers', ' knights', ' spartans', ' beavers',
+        ' wildcats', ' cowboys', ' seminoles', ' sun devils', ' yellow jackets', ' hokies', ' mountaineers',
+        ' nittany lions', ' bulldogs', ' golden flashes', ' cyclones', ' pirates', ' gamecocks', ' blue raiders',
+        ' eagles', ' seahawks', ' lumberjacks', ' salukis', ' leathernecks', ' redhawks', ' broncos', ' chippewas',
+        ' panthers', ' river hawks', ' thunderbirds', ' vaqueros', ' anteaters', ' gauchos', ' matadors',
+        ' banana slugs', ' fighting hawaiians', ' shockers', ' monarchs', ' blazers', ' hilltoppers', ' owls',
+        ' mean green', ' cardinals', ' huskie', ' bobcats', ' zips', ' aggies', ' bearkats', ' 49ers',
+        ' green wave', ' grizzlies', ' heat', ' bucks', ' timberwolves', ' pelicans', ' knicks', ' thunder',
+        ' magic', ' 76ers', ' suns', ' trail blazers', ' kings', ' spurs', ' raptors', ' jazz', ' wizards',
+        ' dream', ' sky', ' sun', ' wings', ' fever', ' aces', ' sparks', ' lynx', ' liberty', ' mercury',
+        ' storm', ' mystics'
+    ]
+    city_suffixes = [
+        ' lakers', ' clippers', ' nets', ' celtics', ' hornets', ' bulls', ' cavaliers', ' mavericks',
+        ' pistons', ' warriors', ' rockets', ' pacers', ' grizzlies', ' heat', ' bucks', ' timberwolves',
+        ' pelicans', ' knicks', ' thunder', ' magic', ' 76ers', ' suns', ' trail blazers', ' kings',
+        ' spurs', ' raptors', ' jazz', ' wizards', ' dream', ' sky', ' sun', ' wings', ' fever', ' aces',
+        ' sparks', ' lynx', ' liberty', ' mercury', ' storm', ' mystics'
+    ]
+
+    for suffix in common_suffixes + city_suffixes:
+        if team_name_lower.endswith(suffix):
+            base_name = team_name_lower.replace(suffix, '').strip()
+            if base_name:
+                return base_name
+
+    return team_name_lower.split(' ')[0] if team_name_lower else team_name_lower
+
+
+def collect_names():
+    """Every name in TEAM_NAME_MAP and the historical CSV, as given and in lower/title case."""
+    names = set(TEAM_NAME_MAP) | set(TEAM_NAME_MAP.values())
+    history = pd.read_csv('data/raw/historical_basketball_data.csv')
+    names |= set(history['HomeTeam'].dropna()) | set(history['AwayTeam'].dropna())
+    names |= {name.lower() for name in names} | {name.title() for name in names}
+    names |= {'Portland Trail Blazers', 'Arizona State Sun Devils', 'State', 'Sun', ''}
+    return sorted(names)
+
+def test_team_name_parity():
+    """Checks the compiled resolver against the legacy function on every known name."""
+    names = collect_names()
+    mismatches = [name for name in names if standardize_team_name(name) != legacy_standardize_team_name(name)]
+    for name in mismatches:
+        print(f"MISMATCH: {name!r} -> {standardize_team_name(name)!r}, legacy {legacy_standardize_team_name(name)!r}")
+    assert not mismatches, f"{len(mismatches)} of {len(names)} names differ from the legacy resolver"
+    assert team_name_resolver.resolve_many(names) == [legacy_standardize_team_name(name) for name in names]
+    print(f"SUCCESS: {len(names)} names resolve exactly as before.")
+
+    slate = names * 20
+    start = time.perf_counter()
+    for name in slate:
+        legacy_standardize_team_name(name)
+    legacy_time = time.perf_counter() - start
+    team_name_resolver.resolve.cache_clear()
+    start = time.perf_counter()
+    team_name_resolver.resolve_many(slate)
+    resolver_time = time.perf_counter() - start
+    print(f"Resolved {len(slate)} names: legacy {legacy_time * 1000:.1f} ms, resolver {resolver_time * 1000:.1f} ms.")
+
+
+if __name__ == '__main__':
+    test_team_name_parity()
@@ -0,0 +1,75 @@
+import contextlib
+import io
+import os
+import tempfile
+import time
+import numpy as np
+from scripts.train_model import RF_PARAM_GRID, base_estimators, load_training_data, random_search, train_random_search_stack
+from scripts.trial_cache import TrialCache, prune_trial_cache
+
+def test_random_search_reuses_trials():
+    """Checks that a second random-search run on the same data fits no trial again and builds the same model."""
+    X_train, X_test, y_train, _ = load_training_data()
+    X_train, y_train = X_train.head(600), y_train.head(600)
+    cache_dir = tempfile.mkdtemp()
+
+    start = time.perf_counter()
+    first = train_random_search_stack(X_train, y_train, trial_cache_dir=cache_dir)
+    first_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    second = train_random_search_stack(X_train, y_train, trial_cache_dir=cache_dir)
+    second_seconds = time.perf_counter() - start
+
+    np.testing.assert_allclose(second.predict_proba(X_test), first.predict_proba(X_test), atol=1e-12)
+    assert second_seconds < first_seconds, "The cached run should skip the search fits"
+    print(f"SUCCESS: random search {first_seconds:.1f} s, with cached trials {second_seconds:.1f} s.")
+
+def test_random_search_warm_starts():
+    """Checks that a random search on new data starts from the best trials of the previous data."""
+    from concurrent.futures import ThreadPoolExecutor
+    from sklearn.model_selection import StratifiedKFold
+    X_train, _, y_train, _ = load_training_data()
+    estimator = base_estimators()['rf'].set_params(n_jobs=1, n_estimators=10)
+    grid = {name: values for name, values in RF_PARAM_GRID.items() if name != 'n_estimators'}
+    folds, cache_dir = StratifiedKFold(n_splits=3), tempfile.mkdtemp()
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        old_cache = TrialCache('rf', estimator, X_train.head(300), y_train.head(300), repr(folds), cache_dir)
+        old_best, _ = random_search(estimator, grid, X_train.head(300), y_train.head(300), folds, executor, old_cache, 'RandomForest')
+        new_cache = TrialCache('rf', estimator, X_train.head(400), y_train.head(400), repr(folds), cache_dir)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            random_search(estimator, grid, X_train.head(400), y_train.head(400), folds, executor, new_cache, 'RandomForest')
+
+    assert 'warm-starting from 3 best configurations' in output.getvalue(), output.getvalue()
+    assert new_cache.previous_best(1) == [old_best], "The previous data's winner should seed the new search"
+    assert new_cache.misses == 10, "The new data's trials should all be evaluated"
+    print(f"SUCCESS: the random search on new data was seeded with {old_best}.")
+
+def test_prune_trial_cache():
+    """Checks that old datasets are deleted by age and size, but never a family's most recent one."""
+    cache_dir = tempfile.mkdtemp()
+    now = time.time()
+    ages_days = {'old': 60, 'older': 90, 'recent': 1, 'newest': 0}
+    for name, age in ages_days.items():
+        path = os.path.join(cache_dir, 'xgb', 'family', name)
+        os.makedirs(path)
+        with open(os.path.join(path, 'trial.npy'), 'wb') as f:
+            f.write(b'\0' * 1000)
+        os.utime(path, (now - age * 86400, now - age * 86400))
+    lone = os.path.join(cache_dir, 'rf', 'family', 'only')
+    os.makedirs(lone)
+    os.utime(lone, (now - 365 * 86400, now - 365 * 86400))
+
+    assert prune_trial_cache(cache_dir, max_age_days=30) == 2
+    assert sorted(os.listdir(os.path.join(cache_dir, 'xgb', 'family'))) == ['newest', 'recent']
+    assert os.path.isdir(lone), "A family's most recent dataset must be kept, however old"
+    assert prune_trial_cache(cache_dir, max_age_days=30, max_bytes=1500) == 1
+    assert os.listdir(os.path.join(cache_dir, 'xgb', 'family')) == ['newest']
+    print("SUCCESS: old and oversized trial datasets pruned; the latest of each family kept.")
+
+
+if __name__ == '__main__':
+    test_prune_trial_cache()
+    test_random_search_warm_starts()
+    test_random_search_reuses_trials()
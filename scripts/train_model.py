@@ -1,96 +1,149 @@
-import pandas as pd
-import xgboost as xgb
-import lightgbm as lgb
-from sklearn.ensemble import RandomForestClassifier, StackingClassifier
-from sklearn.linear_model import LogisticRegression
-from sklearn.model_selection import train_test_split, RandomizedSearchCV
-from sklearn.metrics import accuracy_score, classification_report, roc_auc_score
-import joblib
+import argparse
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
 import os
 import numpy as np
+from scripts.trial_cache import TRIAL_CACHE_DIR, TrialCache, data_fingerprint, prune_trial_cache
+from src.ensemble import OutOfFoldStackingModel
+from src.flat_model import FLAT_MODEL_PATH, FlatStackingModel
+from src.model_registry import ModelRegistry
+from src.resource_cache import resource_cache
+from src.storage import FEATURED_CSV, FEATURED_DATASET, read_games, resolve_games_path
 
-def train_ensemble_model():
-    """Trains and tunes a StackingClassifier on advanced feature-engineered data."""
-    print("Starting ENSEMBLE model training and hyperparameter tuning...")
+FEATURES = [
+    'Home_Avg_MOV', 'Home_Avg_Pts_For', 'Home_Avg_Pts_Against', 'Home_Avg_OU_Hit_Rate',
+    'Away_Avg_MOV', 'Away_Avg_Pts_For', 'Away_Avg_Pts_Against', 'Away_Avg_OU_Hit_Rate',
+    'Avg_MOV_Diff', 'Avg_Pts_For_Diff', 'Avg_Pts_Against_Diff', 'Avg_OU_Hit_Rate_Diff'
+]
+TARGET = 'OU_Result'
+MODEL_PATH = 'models/xgb_lgbm_rf_stacking_model.joblib'
+
+XGB_PARAM_GRID = {
+    'n_estimators': [100, 200, 300],
+    'learning_rate': [0.05, 0.1, 0.2],
+    'max_depth': [3, 5],
+    'subsample': [0.7, 0.9],
+    'colsample_bytree': [0.7, 0.9],
+    'gamma': [0, 0.1]
+}
+LGBM_PARAM_GRID = {
+    'n_estimators': [100, 200, 300],
+    'learning_rate': [0.05, 0.1, 0.2],
+    'max_depth': [3, 5, 7],
+    'subsample': [0.7, 0.9],
+    'colsample_bytree': [0.7, 0.9],
+}
+RF_PARAM_GRID = {
+    'n_estimators': [100, 200, 300],
+    'max_depth': [5, 10, 15],
+    'min_samples_leaf': [1, 5, 10],
+    'min_samples_split': [2, 5, 10]
+}
+
+# Successive halving: HALVING_CANDIDATES configurations start on 1/HALVING_FACTOR**2
+# of the largest n_estimators and the best third survives each round.
+HALVING_CANDIDATES = 9
+HALVING_FACTOR = 3
+# XGBoost and LightGBM fits in the halving search hold out this share of each training fold
+# and stop adding trees once its log loss has not improved for EARLY_STOPPING_ROUNDS rounds.
+EARLY_STOPPING_ROUNDS = 20
+EARLY_STOPPING_FRACTION = 0.15
+
+# XGBoost, LightGBM, scikit-learn and joblib are imported by the functions that use them,
+# so parsing the arguments, --help and the data checks do not wait for them.
 
+def base_estimators():
+    import lightgbm as lgb
+    import xgboost as xgb
+    from sklearn.ensemble import RandomForestClassifier
+    return {
+        'xgb': xgb.XGBClassifier(objective='binary:logistic', use_label_encoder=False, eval_metric='logloss', random_state=42),
+        'lgbm': lgb.LGBMClassifier(objective='binary', random_state=42),
+        'rf': RandomForestClassifier(random_state=42),
+    }
+
+def load_training_data():
+    """Loads the featured games and returns the stratified (X_train, X_test, y_train, y_test) split, or None."""
+    from sklearn.model_selection import train_test_split
     try:
-        df = pd.read_csv('data/processed/featured_basketball_data_advanced.csv')
+        df = read_games(resolve_games_path(FEATURED_DATASET, FEATURED_CSV), columns=FEATURES + [TARGET])
         print(f"Loaded {len(df)} games from advanced processed data.")
     except FileNotFoundError:
-        print("Error: 'data/processed/featured_basketball_data_advanced.csv' not found.")
+        print(f"Error: '{FEATURED_CSV}' not found.")
         print("Please run the advanced feature engineering script first.")
-        return
+        return None
 
-    features = [
-        'Home_Avg_MOV', 'Home_Avg_Pts_For', 'Home_Avg_Pts_Against', 'Home_Avg_OU_Hit_Rate',
-        'Away_Avg_MOV', 'Away_Avg_Pts_For', 'Away_Avg_Pts_Against', 'Away_Avg_OU_Hit_Rate',
-        'Avg_MOV_Diff', 'Avg_Pts_For_Diff', 'Avg_Pts_Against_Diff', 'Avg_OU_Hit_Rate_Diff'
-    ]
-    target = 'OU_Result'
-
-    X = df[features]
-    y = df[target]
+    X = df[FEATURES]
+    y = df[TARGET]
 
     print("Features used for training:")
     print(X.columns.tolist())
-    
+
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=0.2, random_state=42, stratify=y
     )
 
     print(f"Data split into training ({len(X_train)} samples) and testing ({len(X_test)} samples).")
+    return X_train, X_test, y_train, y_test
 
-    print("--- Training and Tuning XGBoost Base Model ---")
-    xgb_param_grid = {
-        'n_estimators': [100, 200, 300],
-        'learning_rate': [0.05, 0.1, 0.2],
-        'max_depth': [3, 5],
-        'subsample': [0.7, 0.9],
-        'colsample_bytree': [0.7, 0.9],
-        'gamma': [0, 0.1]
-    }
-    xgb_base = xgb.XGBClassifier(objective='binary:logistic', use_label_encoder=False, eval_metric='logloss', random_state=42)
-    xgb_search = RandomizedSearchCV(xgb_base, xgb_param_grid, n_iter=10, scoring='roc_auc', cv=3, verbose=0, random_state=42, n_jobs=-1)
-    xgb_search.fit(X_train, y_train)
-    best_xgb = xgb_search.best_estimator_
-    print(f"Best XGBoost Params: {xgb_search.best_params_}")
-
-    print("--- Training and Tuning LightGBM Base Model ---")
-    lgbm_param_grid = {
-        'n_estimators': [100, 200, 300],
-        'learning_rate': [0.05, 0.1, 0.2],
-        'max_depth': [3, 5, 7],
-        'subsample': [0.7, 0.9],
-        'colsample_bytree': [0.7, 0.9],
-    }
-    lgbm_base = lgb.LGBMClassifier(objective='binary', random_state=42)
-    lgbm_search = RandomizedSearchCV(lgbm_base, lgbm_param_grid, n_iter=10, scoring='roc_auc', cv=3, verbose=0, random_state=42, n_jobs=-1)
-    lgbm_search.fit(X_train, y_train)
-    best_lgbm = lgbm_search.best_estimator_
-    print(f"Best LightGBM Params: {lgbm_search.best_params_}")
-
-    print("--- Training and Tuning RandomForest Base Model ---")
-    rf_param_grid = {
-        'n_estimators': [100, 200, 300],
-        'max_depth': [5, 10, 15],
-        'min_samples_leaf': [1, 5, 10],
-        'min_samples_split': [2, 5, 10]
+def random_search(estimator, param_grid, X, y, folds, executor, trial_cache=None, label='', n_iter=10, random_state=42):
+    """Random search over param_grid, scored by mean fold AUC; returns (best_params, its score).
+
+    The candidates are the same ParameterSampler sample RandomizedSearchCV
+    draws, except that the best params of the previous data's trials, when
+    trial_cache has them, take the first places.
+    """
+    candidates, seeded = _warm_start_candidates(param_grid, n_iter, random_state, trial_cache, n_iter // 3)
+    if seeded:
+        print(f"  {label}: warm-starting from {seeded} best configurations of the previous data\n", end='')
+    scores, _, _ = cross_validate_candidates(estimator, candidates, X, y, folds, executor, trial_cache)
+    best = int(np.argmax(scores))
+    return candidates[best], scores[best]
+
+def train_random_search_stack(X_train, y_train, n_jobs=None, trial_cache_dir=TRIAL_CACHE_DIR):
+    """The original path: three random searches, then a StackingClassifier that refits every base model.
+
+    Each search scores 10 candidates with the same 3-fold AUC as
+    RandomizedSearchCV(n_iter=10, cv=3) did. The three searches run
+    concurrently and share a pool of n_jobs workers (all CPUs by default).
+    With trial_cache_dir set, every trial is stored on disk, later runs on
+    the same data reuse it instead of fitting it again, and runs on new
+    data are warm-started from the previous data's best trials.
+    """
+    from sklearn.base import clone
+    from sklearn.ensemble import StackingClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import StratifiedKFold
+    n_jobs = n_jobs or os.cpu_count()
+    estimators = base_estimators()
+    folds = StratifiedKFold(n_splits=3)
+    searches = [('xgb', 'XGBoost', XGB_PARAM_GRID), ('lgbm', 'LightGBM', LGBM_PARAM_GRID), ('rf', 'RandomForest', RF_PARAM_GRID)]
+    trial_caches = {
+        name: TrialCache(name, clone(estimators[name]).set_params(n_jobs=1), X_train, y_train, repr(folds), trial_cache_dir)
+        if trial_cache_dir else None
+        for name, _, _ in searches
     }
-    rf_base = RandomForestClassifier(random_state=42)
-    rf_search = RandomizedSearchCV(rf_base, rf_param_grid, n_iter=10, scoring='roc_auc', cv=3, verbose=0, random_state=42, n_jobs=-1)
-    rf_search.fit(X_train, y_train)
-    best_rf = rf_search.best_estimator_
-    print(f"Best RandomForest Params: {rf_search.best_params_}")
+
+    print(f"--- Tuning XGBoost, LightGBM and RandomForest Base Models Concurrently on {n_jobs} Workers ---")
+    with ThreadPoolExecutor(max_workers=n_jobs) as fit_pool, ThreadPoolExecutor(max_workers=len(searches)) as search_pool:
+        search_futures = {
+            name: search_pool.submit(random_search, clone(estimators[name]).set_params(n_jobs=1), param_grid, X_train, y_train,
+                                     folds, fit_pool, trial_caches[name], label)
+            for name, label, param_grid in searches
+        }
+        best_estimators = []
+        for name, label, _ in searches:
+            best_params, score = search_futures[name].result()
+            print(f"Best {label} Params: {best_params} (CV AUC {score:.4f})")
+            if trial_caches[name] is not None:
+                print(f"Trial cache for {name}: {trial_caches[name].hits} reused, {trial_caches[name].misses} evaluated.")
+            # StackingClassifier clones and fits each estimator itself.
+            best_estimators.append((name, clone(estimators[name]).set_params(**best_params)))
 
     print("--- Building Stacking Ensemble Model ---")
-    estimators = [
-        ('xgb', best_xgb),
-        ('lgbm', best_lgbm),
-        ('rf', best_rf)
-    ]
-    
     stk_model = StackingClassifier(
-        estimators=estimators, 
+        estimators=best_estimators,
         final_estimator=LogisticRegression(random_state=42, solver='liblinear'),
         cv=3,
         n_jobs=-1,
@@ -99,25 +152,320 @@ def train_ensemble_model():
 
     print("Fitting Stacking Ensemble Model...")
     stk_model.fit(X_train, y_train)
+    return stk_model
 
-    print("Evaluating Stacking Ensemble Model performance...")
-    y_pred = stk_model.predict(X_test)
-    y_pred_proba = stk_model.predict_proba(X_test)[:, 1]
+def _fit_early_stopping(model, X_fit, y_fit, X_valid, y_valid, rounds):
+    """Fits an XGBoost or LightGBM classifier that stops when X_valid stops improving; returns it and its tree count."""
+    if type(model).__module__.startswith('lightgbm'):
+        import lightgbm as lgb
+        model.fit(X_fit, y_fit, eval_set=[(X_valid, y_valid)], callbacks=[lgb.early_stopping(rounds, verbose=False)])
+        return model, model.best_iteration_
+    model.set_params(early_stopping_rounds=rounds).fit(X_fit, y_fit, eval_set=[(X_valid, y_valid)], verbose=False)
+    return model, model.best_iteration + 1
+
+def _fit_fold(estimator, X, y, train_rows, test_rows, early_stopping_rounds=None):
+    """Fits one fold; returns the test rows' probabilities, the fit time and the trees kept by early stopping (or None)."""
+    from sklearn.base import clone
+    from sklearn.model_selection import train_test_split
+    start = time.perf_counter()
+    model, best_iteration = clone(estimator), None
+    if early_stopping_rounds:
+        fit_rows, valid_rows = train_test_split(train_rows, test_size=EARLY_STOPPING_FRACTION, stratify=y.iloc[train_rows], random_state=42)
+        model, best_iteration = _fit_early_stopping(model, X.iloc[fit_rows], y.iloc[fit_rows], X.iloc[valid_rows], y.iloc[valid_rows],
+                                                    early_stopping_rounds)
+    else:
+        model.fit(X.iloc[train_rows], y.iloc[train_rows])
+    return model.predict_proba(X.iloc[test_rows])[:, 1], time.perf_counter() - start, best_iteration
+
+def cross_validate_candidates(estimator, candidates, X, y, folds, executor, trial_cache=None, early_stopping_rounds=None):
+    """Fits every candidate on every fold as tasks on executor, skipping trials already in trial_cache.
+
+    Returns (mean fold AUC per candidate, out-of-fold positive-class
+    probabilities per candidate, trees per fold kept by early stopping per
+    candidate), the second aligned with the rows of X. The last is None
+    for each candidate unless early_stopping_rounds is set.
+    """
+    from sklearn.base import clone
+    from sklearn.metrics import roc_auc_score
+    splits = list(folds.split(X, y))
+    cached = [trial_cache.get(params) if trial_cache is not None else None for params in candidates]
+    futures = {
+        (candidate, fold): executor.submit(_fit_fold, clone(estimator).set_params(**params), X, y, train_rows, test_rows,
+                                           early_stopping_rounds)
+        for candidate, params in enumerate(candidates) if cached[candidate] is None
+        for fold, (train_rows, test_rows) in enumerate(splits)
+    }
+
+    scores, oof_probabilities, best_iterations = [], [], []
+    for candidate, params in enumerate(candidates):
+        if cached[candidate] is not None:
+            scores.append(cached[candidate]['mean_score'])
+            oof_probabilities.append(cached[candidate]['oof'])
+            best_iterations.append(cached[candidate].get('best_iterations'))
+            continue
+        oof = np.empty(len(X))
+        fold_scores, fit_seconds, fold_iterations = [], 0.0, []
+        for fold, (train_rows, test_rows) in enumerate(splits):
+            probabilities, seconds, best_iteration = futures[candidate, fold].result()
+            oof[test_rows] = probabilities
+            fold_scores.append(roc_auc_score(y.iloc[test_rows], probabilities))
+            fit_seconds += seconds
+            fold_iterations.append(best_iteration)
+        fold_iterations = fold_iterations if early_stopping_rounds else None
+        if trial_cache is not None:
+            trial_cache.put(params, fold_scores, fit_seconds, oof, fold_iterations)
+        scores.append(np.mean(fold_scores))
+        oof_probabilities.append(oof)
+        best_iterations.append(fold_iterations)
+    return np.array(scores), oof_probabilities, best_iterations
 
-    accuracy = accuracy_score(y_test, y_pred)
-    roc_auc = roc_auc_score(y_test, y_pred_proba)
-    
+def _warm_start_candidates(param_grid, n_candidates, random_state, trial_cache, seed_count, resource=None):
+    """The best params from the previous dataset's trials first, then a fixed random sample."""
+    from sklearn.model_selection import ParameterSampler
+    seeds = trial_cache.previous_best(seed_count, resource) if trial_cache is not None else []
+    candidates = list(seeds)
+    for params in ParameterSampler(param_grid, n_iter=n_candidates, random_state=random_state):
+        if len(candidates) < n_candidates and params not in candidates:
+            candidates.append(params)
+    return candidates, len(seeds)
+
+def successive_halving_search(estimator, param_grid, X, y, folds, executor, trial_cache=None, label='',
+                              n_candidates=HALVING_CANDIDATES, factor=HALVING_FACTOR, resource='n_estimators', random_state=42,
+                              early_stopping_rounds=None):
+    """Successive-halving search over param_grid with the number of trees as the budget.
+
+    All candidates are first cross-validated with few trees; only the best
+    1/factor move on to factor times more trees, so weak configurations stop
+    early. The last round allows the largest n_estimators in the grid. With
+    early_stopping_rounds, every fit also stops adding trees once a
+    validation split of its training fold stops improving, and the winner's
+    n_estimators becomes the mean tree count its folds kept. Returns
+    (best_params, mean fold AUC, out-of-fold probabilities of the winner).
+    """
+    sampled_grid = {name: values for name, values in param_grid.items() if name != resource}
+    candidates, seeded = _warm_start_candidates(sampled_grid, n_candidates, random_state, trial_cache, n_candidates // factor, resource)
+    if seeded:
+        print(f"  {label}: warm-starting from {seeded} best configurations of the previous data\n", end='')
+    max_resource = max(param_grid[resource])
+    n_rounds = 1
+    while factor ** (n_rounds - 1) < len(candidates):
+        n_rounds += 1
+
+    for round_number in range(n_rounds):
+        budget = max(1, max_resource // factor ** (n_rounds - 1 - round_number))
+        candidates = [{**params, resource: budget} for params in candidates]
+        scores, oof_probabilities, best_iterations = cross_validate_candidates(
+            estimator, candidates, X, y, folds, executor, trial_cache, early_stopping_rounds)
+        ranking = np.argsort(-scores, kind='stable')
+        # One write per line, since the three searches print from concurrent threads.
+        print(f"  {label} round {round_number + 1}/{n_rounds}: {len(candidates)} candidates x {budget} {resource}, best AUC {scores[ranking[0]]:.4f}\n", end='')
+        survivors = 1 if round_number == n_rounds - 1 else math.ceil(len(candidates) / factor)
+        candidates = [candidates[i] for i in ranking[:survivors]]
+    best = ranking[0]
+    best_params = candidates[0]
+    if best_iterations[best]:
+        best_params = {**best_params, resource: max(1, round(float(np.mean(best_iterations[best]))))}
+    return best_params, scores[best], oof_probabilities[best]
+
+def _fit_out_of_bag(estimator, X, y):
+    from sklearn.base import clone
+    start = time.perf_counter()
+    model = clone(estimator).set_params(oob_score=True).fit(X, y)
+    oob = model.oob_decision_function_[:, 1]
+    # A row left out of every bootstrap sample has no out-of-bag vote; give it the base rate.
+    return model, np.where(np.isnan(oob), y.mean(), oob), time.perf_counter() - start
+
+def out_of_bag_search(estimator, param_grid, X, y, executor, trial_cache=None, n_iter=10, random_state=42):
+    """Random search for a bagging forest scored on out-of-bag predictions instead of k folds.
+
+    Each candidate is fit once on all of X. Returns (best fitted model, its
+    out-of-bag AUC, its out-of-bag positive-class probabilities). A winner
+    taken from trial_cache is refit once, which reproduces it exactly.
+    """
+    from sklearn.base import clone
+    from sklearn.metrics import roc_auc_score
+    candidates, seeded = _warm_start_candidates(param_grid, n_iter, random_state, trial_cache, n_iter // 3)
+    if seeded:
+        print(f"  RandomForest: warm-starting from {seeded} best configurations of the previous data\n", end='')
+    cached = [trial_cache.get(params) if trial_cache is not None else None for params in candidates]
+    futures = {
+        candidate: executor.submit(_fit_out_of_bag, clone(estimator).set_params(**params), X, y)
+        for candidate, params in enumerate(candidates) if cached[candidate] is None
+    }
+
+    models, scores, oof_probabilities = {}, [], []
+    for candidate, params in enumerate(candidates):
+        if cached[candidate] is not None:
+            scores.append(cached[candidate]['mean_score'])
+            oof_probabilities.append(cached[candidate]['oof'])
+            continue
+        models[candidate], oob, seconds = futures[candidate].result()
+        scores.append(roc_auc_score(y, oob))
+        oof_probabilities.append(oob)
+        if trial_cache is not None:
+            trial_cache.put(params, [scores[-1]], seconds, oob)
+
+    best = int(np.argmax(scores))
+    model = models.get(best) or executor.submit(_fit_out_of_bag, clone(estimator).set_params(**candidates[best]), X, y).result()[0]
+    return model, scores[best], oof_probabilities[best]
+
+def train_halving_stack(X_train, y_train, n_jobs=None, trial_cache_dir=TRIAL_CACHE_DIR):
+    """Successive-halving searches whose winners' out-of-fold predictions train the meta-learner directly.
+
+    XGBoost and LightGBM are tuned by successive halving with early
+    stopping and refit once on the full training data with the tree count
+    early stopping settled on. RandomForest candidates are each fit once on the
+    full training data and scored on their out-of-bag predictions, so the
+    winner needs no refit. The logistic-regression meta-learner is fit on
+    the cached out-of-fold (or out-of-bag) probabilities, so nothing is refit
+    per fold again as StackingClassifier(cv=3) would.
+
+    The three searches run concurrently. Every single-threaded fit goes
+    through one pool of n_jobs workers (all CPUs by default), so together
+    they never use more than that budget. With trial_cache_dir set, every
+    trial is stored on disk and reused by later runs on the same data.
+    """
+    from sklearn.base import clone
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.model_selection import StratifiedKFold
+    n_jobs = n_jobs or os.cpu_count()
+    estimators = {name: estimator.set_params(n_jobs=1) for name, estimator in base_estimators().items()}
+    folds = StratifiedKFold(n_splits=3, shuffle=True, random_state=42)
+    early_stopping = {'xgb': EARLY_STOPPING_ROUNDS, 'lgbm': EARLY_STOPPING_ROUNDS}
+    cv_descriptions = {name: repr(folds) + (f' early_stopping={early_stopping[name]}/{EARLY_STOPPING_FRACTION}' if name in early_stopping else '')
+                       for name in estimators}
+    trial_caches = {
+        name: TrialCache(name, estimator, X_train, y_train, cv_descriptions[name], trial_cache_dir) if trial_cache_dir else None
+        for name, estimator in estimators.items()
+    }
+
+    print(f"--- Searching XGBoost, LightGBM and RandomForest Concurrently on {n_jobs} Workers ---")
+    with ThreadPoolExecutor(max_workers=n_jobs) as fit_pool, ThreadPoolExecutor(max_workers=len(estimators)) as searches:
+        search_futures = {
+            name: searches.submit(successive_halving_search, estimators[name], param_grid, X_train, y_train, folds,
+                                  fit_pool, trial_caches[name], label, early_stopping_rounds=early_stopping[name])
+            for name, label, param_grid in [('xgb', 'XGBoost', XGB_PARAM_GRID), ('lgbm', 'LightGBM', LGBM_PARAM_GRID)]
+        }
+        rf_future = searches.submit(out_of_bag_search, estimators['rf'], RF_PARAM_GRID, X_train, y_train, fit_pool, trial_caches['rf'])
+
+        best_params, oof_columns = {}, []
+        for name, label in [('xgb', 'XGBoost'), ('lgbm', 'LightGBM')]:
+            best_params[name], score, oof = search_futures[name].result()
+            oof_columns.append(oof)
+            print(f"Best {label} Params: {best_params[name]} (CV AUC {score:.4f})")
+        rf_model, score, oof = rf_future.result()
+        oof_columns.append(oof)
+        print(f"Best RandomForest Params: { {name: rf_model.get_params()[name] for name in RF_PARAM_GRID} } (OOB AUC {score:.4f})")
+
+        print("--- Building Stacking Ensemble Model from Out-of-Fold Predictions ---")
+        refits = [fit_pool.submit(clone(estimators[name]).set_params(**best_params[name]).fit, X_train, y_train) for name in ('xgb', 'lgbm')]
+        fitted = [future.result() for future in refits]
+
+    if trial_cache_dir:
+        for name, trial_cache in trial_caches.items():
+            print(f"Trial cache for {name}: {trial_cache.hits} reused, {trial_cache.misses} evaluated.")
+    meta_learner = LogisticRegression(random_state=42, solver='liblinear').fit(np.column_stack(oof_columns), y_train)
+    return OutOfFoldStackingModel(list(zip(('xgb', 'lgbm'), fitted)) + [('rf', rf_model)], meta_learner)
+
+def evaluate_model(model, X_test, y_test):
+    from sklearn.metrics import accuracy_score, roc_auc_score
+    y_pred = model.predict(X_test)
+    y_pred_proba = model.predict_proba(X_test)[:, 1]
+    return accuracy_score(y_test, y_pred), roc_auc_score(y_test, y_pred_proba), y_pred
+
+def export_flat_model(model, X_check, model_path=MODEL_PATH, path=FLAT_MODEL_PATH, tolerance=1e-6):
+    """Writes the NumPy-only copy of the saved model that predict.py serves.
+
+    The copy records the content hash of the joblib file it was exported
+    from, so a stale export is ignored. Raises ValueError if its
+    probabilities on X_check differ from the model's by more than tolerance.
+    """
+    flat_model = FlatStackingModel.from_stacking(model, FEATURES, source=resource_cache.fingerprint(model_path))
+    difference = np.abs(flat_model.predict_proba(X_check) - model.predict_proba(X_check)).max()
+    if difference > tolerance:
+        raise ValueError(f"Flat model differs from the ensemble by {difference:.2e} on the check rows.")
+    flat_model.save(path)
+    print(f"Flat model saved to '{path}' ({os.path.getsize(path) / 1e6:.1f} MB, max probability difference {difference:.1e}).")
+    return flat_model
+
+TRAINERS = {'random': train_random_search_stack, 'halving': train_halving_stack}
+
+def train_ensemble_model(search='random', compare=False, n_jobs=None, trial_cache_dir=TRIAL_CACHE_DIR, activate=True):
+    """Trains and tunes a stacking ensemble on advanced feature-engineered data.
+
+    search='random' runs the original random search + StackingClassifier
+    path; search='halving' runs train_halving_stack. Both run their three
+    searches concurrently on the given CPU budget and use the trial cache,
+    including its warm start. With compare=True both run on the same split and their
+    wall time and test AUC are reported; the model from `search` is saved
+    either way. It is also registered as a new version in the model
+    registry, and made the served model unless activate is False.
+    """
+    import joblib
+    from sklearn.metrics import classification_report
+    print("Starting ENSEMBLE model training and hyperparameter tuning...")
+
+    split = load_training_data()
+    if split is None:
+        return
+    X_train, X_test, y_train, y_test = split
+
+    results = {}
+    for name in (list(TRAINERS) if compare else [search]):
+        start = time.perf_counter()
+        model = TRAINERS[name](X_train, y_train, n_jobs=n_jobs, trial_cache_dir=trial_cache_dir)
+        elapsed = time.perf_counter() - start
+        results[name] = (model, elapsed) + evaluate_model(model, X_test, y_test)
+    if trial_cache_dir:
+        removed = prune_trial_cache(trial_cache_dir)
+        if removed:
+            print(f"Removed the trials of {removed} old datasets from '{trial_cache_dir}'.")
+
+    stk_model, _, accuracy, roc_auc, y_pred = results[search]
+    print("Evaluating Stacking Ensemble Model performance...")
     print(f"Ensemble Model Accuracy: {accuracy:.4f}")
     print(f"Ensemble Model AUC-ROC Score: {roc_auc:.4f}")
-    
+
     print("Ensemble Model Classification Report:")
     print(classification_report(y_test, y_pred, target_names=['Under', 'Over']))
 
+    if compare:
+        print("--- Search Comparison ---")
+        for name, (_, elapsed, accuracy, roc_auc, _) in results.items():
+            print(f"{name:>8}: {elapsed:7.1f} s, accuracy {accuracy:.4f}, AUC-ROC {roc_auc:.4f}")
+        speedup = results['random'][1] / results['halving'][1]
+        print(f"Halving search is {speedup:.1f}x faster; AUC change {results['halving'][3] - results['random'][3]:+.4f}.")
+
     os.makedirs('models', exist_ok=True)
-    model_path = 'models/xgb_lgbm_rf_stacking_model.joblib'
-    joblib.dump(stk_model, model_path)
-    
-    print(f"Ensemble model saved successfully to '{model_path}'")
+    joblib.dump(stk_model, MODEL_PATH)
+
+    print(f"Ensemble model saved successfully to '{MODEL_PATH}'")
+    flat_model = export_flat_model(stk_model, X_test)
+
+    _, elapsed, accuracy, roc_auc, _ = results[search]
+    version = ModelRegistry().register(
+        stk_model, FEATURES, data_fingerprint(X_train, y_train),
+        metrics={'accuracy': float(accuracy), 'roc_auc': float(roc_auc)},
+        details={'search': search, 'train_seconds': elapsed, 'training_rows': len(X_train), 'test_rows': len(X_test)},
+        flat_model=flat_model, activate=activate
+    )
+    print(f"Registered as model version {version}{' (active)' if activate else ''}.")
 
 if __name__ == "__main__":
-    train_ensemble_model()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Train the XGBoost/LightGBM/RandomForest stacking ensemble.")
+    parser.add_argument('--search', choices=sorted(TRAINERS), default='random',
+                        help="'random': random search + StackingClassifier; 'halving': successive halving with out-of-fold reuse.")
+    parser.add_argument('--compare', action='store_true', help="Train with both searches and report wall time and AUC.")
+    parser.add_argument('--n-jobs', type=int, default=None, help="CPU budget shared by the search fits (default: all CPUs).")
+    parser.add_argument('--no-trial-cache', action='store_true', help=f"Do not read or write evaluated trials in '{TRIAL_CACHE_DIR}'.")
+    parser.add_argument('--no-activate', action='store_true', help="Register the new model without making it the served one.")
+    parser.add_argument('--export-only', action='store_true', help=f"Only export the saved '{MODEL_PATH}' to '{FLAT_MODEL_PATH}'.")
+    args = parser.parse_args()
+    if args.export_only:
+        split = load_training_data()
+        if split is not None:
+            import joblib
+            export_flat_model(joblib.load(MODEL_PATH), split[1])
+    else:
+        train_ensemble_model(search=args.search, compare=args.compare, n_jobs=args.n_jobs,
+                             trial_cache_dir=None if args.no_trial_cache else TRIAL_CACHE_DIR, activate=not args.no_activate)
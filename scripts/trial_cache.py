@@ -0,0 +1,150 @@
+import glob
+import hashlib
+import importlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+
+TRIAL_CACHE_DIR = 'data/cache/trials'
+# Trials of datasets not used for this long are deleted, then the oldest until the cache fits in the size cap.
+TRIAL_CACHE_MAX_AGE_DAYS = 30
+TRIAL_CACHE_MAX_BYTES = 512 * 1024 * 1024
+
+# Parameters that change how fast an estimator fits but not what it learns.
+RUNTIME_PARAMS = {'n_jobs', 'nthread', 'verbose', 'verbosity'}
+
+def _digest(*parts):
+    digest = hashlib.blake2b(digest_size=8)
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else str(part).encode())
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+def estimator_version(estimator):
+    """Class path, package version and fixed parameters of an estimator, as one string."""
+    estimator_class = type(estimator)
+    package = importlib.import_module(estimator_class.__module__.split('.')[0])
+    fixed_params = {name: value for name, value in estimator.get_params().items() if name not in RUNTIME_PARAMS}
+    params = json.dumps(fixed_params, sort_keys=True, default=repr)
+    return f"{estimator_class.__module__}.{estimator_class.__qualname__}=={getattr(package, '__version__', '?')} {params}"
+
+def data_fingerprint(X, y):
+    """Hash of the training rows, their order, the feature names and the labels."""
+    row_hashes = pd.util.hash_pandas_object(X, index=False).to_numpy()
+    label_hashes = pd.util.hash_pandas_object(y, index=False).to_numpy()
+    return _digest(list(X.columns), row_hashes.tobytes(), label_hashes.tobytes())
+
+class TrialCache:
+    """On-disk record of evaluated hyperparameter trials for one search.
+
+    Trials live under cache_dir/name/<family>/<data>/, where family hashes
+    the feature set, the cross-validation scheme and the estimator's class,
+    package version and fixed parameters, and data hashes the training rows.
+    Each trial is a JSON file (params, fold scores, fit time, trees kept by
+    early stopping per fold) plus a .npy of its out-of-fold probabilities,
+    written atomically, so concurrent searches and interrupted runs never
+    leave partial records.
+    """
+
+    def __init__(self, name, estimator, X, y, cv_description, cache_dir=TRIAL_CACHE_DIR):
+        self.family_dir = os.path.join(cache_dir, name, _digest(list(X.columns), cv_description, estimator_version(estimator)))
+        self.trial_dir = os.path.join(self.family_dir, data_fingerprint(X, y))
+        self.hits = 0
+        self.misses = 0
+        if os.path.isdir(self.trial_dir):
+            # Marks the trials as used, so prune_trial_cache keeps them.
+            os.utime(self.trial_dir)
+
+    @staticmethod
+    def trial_key(params):
+        return _digest(json.dumps(params, sort_keys=True, default=repr))
+
+    def get(self, params):
+        """Returns the cached trial for params, with its 'oof' probabilities, or None."""
+        path = os.path.join(self.trial_dir, self.trial_key(params))
+        try:
+            with open(f'{path}.json') as f:
+                trial = json.load(f)
+            trial['oof'] = np.load(f'{path}.npy')
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return trial
+
+    def put(self, params, fold_scores, fit_seconds, oof, best_iterations=None):
+        os.makedirs(self.trial_dir, exist_ok=True)
+        path = os.path.join(self.trial_dir, self.trial_key(params))
+        self._write_atomic(f'{path}.npy', lambda f: np.save(f, np.asarray(oof, dtype=float)))
+        trial = {'params': params, 'fold_scores': list(fold_scores), 'mean_score': float(np.mean(fold_scores)), 'fit_seconds': fit_seconds,
+                 'best_iterations': best_iterations}
+        self._write_atomic(f'{path}.json', lambda f: f.write(json.dumps(trial, sort_keys=True, default=repr).encode()))
+
+    def _write_atomic(self, path, write):
+        fd, tmp_path = tempfile.mkstemp(dir=self.trial_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def previous_best(self, count, resource=None):
+        """Params of the best trials from the most recent other dataset in this family.
+
+        Used to warm-start a search after the data changed: trials run with the
+        largest budget rank first, then by mean score. resource, if given, is
+        dropped from the returned params.
+        """
+        candidates = [path for path in glob.glob(os.path.join(self.family_dir, '*')) if path != self.trial_dir]
+        if not candidates or count <= 0:
+            return []
+        trials = []
+        for path in glob.glob(os.path.join(max(candidates, key=os.path.getmtime), '*.json')):
+            try:
+                with open(path) as f:
+                    trials.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        trials.sort(key=lambda trial: (trial['params'].get(resource, 0), trial['mean_score']), reverse=True)
+        best = []
+        for trial in trials:
+            params = {name: value for name, value in trial['params'].items() if name != resource}
+            if params not in best:
+                best.append(params)
+        return best[:count]
+
+def _directory_bytes(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names)
+
+def prune_trial_cache(cache_dir=TRIAL_CACHE_DIR, max_age_days=TRIAL_CACHE_MAX_AGE_DAYS, max_bytes=TRIAL_CACHE_MAX_BYTES):
+    """Deletes the trials of datasets that were not used recently, oldest first.
+
+    A dataset's trials go when they were last used more than max_age_days
+    ago, or while the whole cache is larger than max_bytes. The most
+    recently used dataset of each family is always kept, since the next
+    search on new data warm-starts from it. Returns the number deleted.
+    """
+    data_dirs, newest = [], set()
+    for family_dir in glob.glob(os.path.join(cache_dir, '*', '*')):
+        family = [path for path in glob.glob(os.path.join(family_dir, '*')) if os.path.isdir(path)]
+        if family:
+            newest.add(max(family, key=os.path.getmtime))
+            data_dirs.extend(family)
+
+    sizes = {path: _directory_bytes(path) for path in data_dirs}
+    total = sum(sizes.values())
+    cutoff = time.time() - max_age_days * 24 * 60 * 60
+    removed = 0
+    for path in sorted(data_dirs, key=os.path.getmtime):
+        if path in newest or (os.path.getmtime(path) >= cutoff and total <= max_bytes):
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+        total -= sizes[path]
+        removed += 1
+    return removed
@@ -1,7 +1,15 @@
+import json
+import logging
 import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 import requests
-#from dotenv import load_dotenv
-import streamlit as st
+from requests.adapters import HTTPAdapter
+from src.config import get_secret, get_setting
+
+logger = logging.getLogger(__name__)
 
 AVAILABLE_LEAGUES = {
     'NCAAB': 'basketball_ncaab',
@@ -9,77 +17,243 @@ AVAILABLE_LEAGUES = {
     'WNBA': 'basketball_wnba'
 }
 
-def get_upcoming_games(sport_key):
-    """Fetches upcoming games and their odds from The Odds API."""
-    #load_dotenv()
-    
-    api_key = st.secrets["API_KEY"]
-    
+DEFAULT_ODDS_API_BASE_URL = "https://api.the-odds-api.com/v4"
+DEFAULT_REGIONS = 'us'
+DEFAULT_MARKETS = 'h2h,totals'
+
+DEFAULT_ODDS_CACHE_DIR = 'data/cache/odds'
+DEFAULT_ODDS_CACHE_TTL = 30 * 60
+DEFAULT_ODDS_CACHE_STALE_TTL = 6 * 60 * 60
+
+# Settings are read on every use rather than at import, so a changed environment or config source takes effect.
+def odds_api_base_url():
+    return get_setting('ODDS_API_BASE_URL', DEFAULT_ODDS_API_BASE_URL)
+
+def odds_cache_dir():
+    return get_setting('ODDS_CACHE_DIR', DEFAULT_ODDS_CACHE_DIR)
+
+def odds_cache_ttl():
+    return float(get_setting('ODDS_CACHE_TTL', DEFAULT_ODDS_CACHE_TTL))
+
+def odds_cache_stale_ttl():
+    return float(get_setting('ODDS_CACHE_STALE_TTL', DEFAULT_ODDS_CACHE_STALE_TTL))
+
+_quota = {}
+_quota_lock = threading.Lock()
+_refreshes_in_flight = set()
+_refreshes_lock = threading.Lock()
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session(pool_size=10):
+    """Returns the process-wide keep-alive session used for all Odds API requests."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            _session.mount('https://', adapter)
+            _session.mount('http://', adapter)
+        return _session
+
+def get_api_key():
+    api_key = get_secret('API_KEY')
     if not api_key or api_key == 'YOUR_API_KEY_HERE':
-        st.error("Error: API_KEY not found or not set in .env file.")
-        st.error("Please make sure to add your API key from The Odds API to the .env file.")
+        logger.error("Error: API_KEY not found or not set.")
+        logger.error("Please add your API key from The Odds API to .streamlit/secrets.toml or the API_KEY environment variable.")
         return None
+    return api_key
 
-    url = (
-        f"https://api.the-odds-api.com/v4/sports/{sport_key}/odds/"
-        f"?apiKey={api_key}"
-        "&regions=us"
-        "&markets=h2h,totals"
-        "&oddsFormat=decimal"
+def fetch_odds(sport_key, api_key, session=None, base_url=None, timeout=30,
+               regions=DEFAULT_REGIONS, markets=DEFAULT_MARKETS):
+    """Fetches the odds payload for one sport, raising requests exceptions on failure."""
+    session = session or get_session()
+    base_url = base_url or odds_api_base_url()
+    response = session.get(
+        f"{base_url}/sports/{sport_key}/odds/",
+        params={'apiKey': api_key, 'regions': regions, 'markets': markets, 'oddsFormat': 'decimal'},
+        timeout=timeout
     )
+    _record_quota(response.headers)
+    response.raise_for_status()
+    return response.json()
 
-    st.info(f"Fetching upcoming games from The Odds API for sport: {sport_key}")
+def _cache_path(sport_key, regions, markets):
+    filename = f"{sport_key}__{regions}__{markets}".replace(',', '-') + '.json'
+    return os.path.join(odds_cache_dir(), filename)
 
+def _read_json(path):
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
 
-        #st.info(f"Remaining requests: {response.headers['x-requests-remaining']}")
-        #st.info(f"Used requests: {response.headers['x-requests-used']}")
-        
-        games = response.json()
-        
-        if not games:
-            st.warning("No upcoming games found for this sport key.")
-            return []
-            
-        return games
+def _read_cache_entry(path):
+    """The cached {'fetched_at', 'games'} entry at path, or None if it is missing or malformed."""
+    entry = _read_json(path)
+    if (not isinstance(entry, dict) or not isinstance(entry.get('fetched_at'), (int, float))
+            or not isinstance(entry.get('games'), list)):
+        return None
+    return entry
+
+def _write_json_atomic(path, data):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def _record_quota(headers):
+    remaining = headers.get('x-requests-remaining')
+    used = headers.get('x-requests-used')
+    if remaining is None and used is None:
+        return
+    with _quota_lock:
+        _quota.update({'remaining': remaining, 'used': used, 'updated_at': time.time()})
+        _write_json_atomic(os.path.join(odds_cache_dir(), 'quota.json'), _quota)
 
-    except requests.exceptions.RequestException as e:
-        st.error(f"Error fetching data from The Odds API: {e}")
+def get_quota_status():
+    """Returns the last seen x-requests-remaining/used values, persisted across processes."""
+    with _quota_lock:
+        if not _quota:
+            _quota.update(_read_json(os.path.join(odds_cache_dir(), 'quota.json')) or {})
+        return dict(_quota)
+
+def _refresh_in_background(path, sport_key, api_key, session, base_url, regions, markets):
+    with _refreshes_lock:
+        if path in _refreshes_in_flight:
+            return
+        _refreshes_in_flight.add(path)
+
+    def refresh():
         try:
-            error_details = response.json()
-            st.error(f"API Error Details: {error_details}")
+            games = fetch_odds(sport_key, api_key, session, base_url, regions=regions, markets=markets)
+            _write_json_atomic(path, {'fetched_at': time.time(), 'games': games})
+        except (requests.exceptions.RequestException, ValueError):
+            pass
+        finally:
+            with _refreshes_lock:
+                _refreshes_in_flight.discard(path)
+
+    threading.Thread(target=refresh, daemon=True).start()
+
+def fetch_odds_cached(sport_key, api_key, session=None, base_url=None,
+                      regions=DEFAULT_REGIONS, markets=DEFAULT_MARKETS, ttl=None, stale_ttl=None):
+    """Like fetch_odds, but served from the on-disk response cache when possible.
+
+    Entries younger than ttl are returned as is. Entries up to stale_ttl
+    seconds past ttl are returned immediately while a background request
+    refreshes them. Anything older, or an entry that is not a valid cache
+    entry, is fetched synchronously.
+    """
+    ttl = odds_cache_ttl() if ttl is None else ttl
+    stale_ttl = odds_cache_stale_ttl() if stale_ttl is None else stale_ttl
+    path = _cache_path(sport_key, regions, markets)
+    entry = _read_cache_entry(path)
+
+    if entry is not None:
+        age = time.time() - entry['fetched_at']
+        if age < ttl:
+            return entry['games']
+        if age < ttl + stale_ttl:
+            _refresh_in_background(path, sport_key, api_key, session, base_url, regions, markets)
+            return entry['games']
+
+    games = fetch_odds(sport_key, api_key, session, base_url, regions=regions, markets=markets)
+    _write_json_atomic(path, {'fetched_at': time.time(), 'games': games})
+    return games
+
+def _report_fetch_error(sport_key, error):
+    logger.error(f"Error fetching data from The Odds API for {sport_key}: {error}")
+    response = getattr(error, 'response', None)
+    if response is not None:
+        try:
+            logger.error(f"API Error Details: {response.json()}")
         except ValueError:
-            st.error(f"API returned non-JSON response: {response.text}")
+            logger.error(f"API returned non-JSON response: {response.text}")
+
+def get_upcoming_games(sport_key, api_key=None, base_url=None):
+    """Fetches upcoming games and their odds from The Odds API."""
+    api_key = api_key or get_api_key()
+    if not api_key:
         return None
 
+    logger.info(f"Fetching upcoming games from The Odds API for sport: {sport_key}")
+
+    try:
+        games = fetch_odds_cached(sport_key, api_key, base_url=base_url)
+    except (requests.exceptions.RequestException, ValueError) as e:
+        _report_fetch_error(sport_key, e)
+        return None
+
+    if not games:
+        logger.warning("No upcoming games found for this sport key.")
+        return []
+    return games
+
+def get_upcoming_games_many(sport_keys, api_key=None, base_url=None, max_workers=None):
+    """Fetches several sports concurrently over the shared session.
+
+    Returns a dict mapping each sport key to its games, [] when the sport has
+    no games, or None when that sport's request failed. One failing league
+    does not affect the others.
+    """
+    sport_keys = list(sport_keys)
+    api_key = api_key or get_api_key()
+    if not api_key:
+        return {sport_key: None for sport_key in sport_keys}
+    if not sport_keys:
+        return {}
+
+    logger.info(f"Fetching upcoming games from The Odds API for: {', '.join(sport_keys)}")
+
+    session = get_session()
+    results = {}
+    with ThreadPoolExecutor(max_workers=max_workers or len(sport_keys)) as executor:
+        futures = {sport_key: executor.submit(fetch_odds_cached, sport_key, api_key, session, base_url) for sport_key in sport_keys}
+        for sport_key, future in futures.items():
+            try:
+                results[sport_key] = future.result() or []
+            except (requests.exceptions.RequestException, ValueError) as e:
+                _report_fetch_error(sport_key, e)
+                results[sport_key] = None
+    return results
+
 if __name__ == '__main__':
-    st.info("--- Testing API Client ---")
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    logger.info("--- Testing API Client ---")
     
     for league_name, sport_key in AVAILABLE_LEAGUES.items():
-        st.info(f"--- Fetching upcoming games for {league_name} ({sport_key}) ---")
+        logger.info(f"--- Fetching upcoming games for {league_name} ({sport_key}) ---")
         upcoming_games = get_upcoming_games(sport_key=sport_key)
         
         if upcoming_games:
-            st.info(f"Successfully fetched {len(upcoming_games)} upcoming games for {league_name}.")
+            logger.info(f"Successfully fetched {len(upcoming_games)} upcoming games for {league_name}.")
             
             if len(upcoming_games) > 0:
                 first_game = upcoming_games[0]
-                st.info("--- Example Game ---")
-                st.info(f"ID: {first_game.get('id')}")
-                st.info(f"Sport: {first_game.get('sport_title')}")
-                st.info(f"Teams: {first_game.get('home_team')} vs. {first_game.get('away_team')}")
-                st.info(f"Start Time: {first_game.get('commence_time')}")
+                logger.info("--- Example Game ---")
+                logger.info(f"ID: {first_game.get('id')}")
+                logger.info(f"Sport: {first_game.get('sport_title')}")
+                logger.info(f"Teams: {first_game.get('home_team')} vs. {first_game.get('away_team')}")
+                logger.info(f"Start Time: {first_game.get('commence_time')}")
                 
                 for bookmaker in first_game.get('bookmakers', []):
                     if any(market['key'] == 'totals' for market in bookmaker.get('markets', [])):
-                        st.info(f"Bookmaker: {bookmaker.get('title')}")
+                        logger.info(f"Bookmaker: {bookmaker.get('title')}")
                         for market in bookmaker.get('markets', []):
                             if market['key'] == 'totals':
-                                st.info(f"  Market: Over/Under")
+                                logger.info(f"  Market: Over/Under")
                                 for outcome in market.get('outcomes', []):
-                                    st.info(f"    - {outcome['name']} {outcome['point']}: {outcome['price']}")
+                                    logger.info(f"    - {outcome['name']} {outcome['point']}: {outcome['price']}")
                         break
         else:
-            st.warning(f"Failed to fetch upcoming games for {league_name}. Please check your API key and network connection.")
\ No newline at end of file
+            logger.warning(f"Failed to fetch upcoming games for {league_name}. Please check your API key and network connection.")
+
+    logger.info(f"Odds API quota: {get_quota_status()}")
\ No newline at end of file
@@ -0,0 +1,57 @@
+import os
+try:
+    import tomllib
+except ModuleNotFoundError:  # Python < 3.11: secrets come from the environment only
+    tomllib = None
+
+SECRETS_FILE = os.environ.get('SECRETS_FILE', '.streamlit/secrets.toml')
+
+def environment_source(name):
+    return os.environ.get(name)
+
+def toml_source(path=SECRETS_FILE):
+    """A source reading top-level keys of a TOML file, such as Streamlit's secrets.toml.
+
+    The file is read on first use; a missing or malformed file has no keys.
+    """
+    values = None
+
+    def lookup(name):
+        nonlocal values
+        if values is None and tomllib is None:
+            values = {}
+        if values is None:
+            try:
+                with open(path, 'rb') as f:
+                    values = tomllib.load(f)
+            except (OSError, tomllib.TOMLDecodeError):
+                values = {}
+        return values.get(name)
+
+    return lookup
+
+_sources = [environment_source, toml_source()]
+
+def set_sources(*sources):
+    """Replaces the ordered lookups behind get_setting and get_secret.
+
+    A source is a callable taking a name and returning its value or None.
+    The default is the environment, then .streamlit/secrets.toml (or
+    SECRETS_FILE), so batch jobs and the Streamlit app share one secrets
+    file; the app puts st.secrets in front.
+    """
+    _sources[:] = sources
+
+def get_sources():
+    return list(_sources)
+
+def get_setting(name, default=None):
+    """The first value any source has for name, or default."""
+    for source in _sources:
+        value = source(name)
+        if value is not None:
+            return value
+    return default
+
+def get_secret(name):
+    return get_setting(name)
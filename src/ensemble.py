@@ -0,0 +1,30 @@
+import numpy as np
+
+class OutOfFoldStackingModel:
+    """Stacking ensemble assembled from already-fitted parts.
+
+    estimators are (name, fitted classifier) pairs refit on the full
+    training data, and final_estimator is a classifier fitted on their
+    out-of-fold positive-class probabilities. It mirrors the predict and
+    predict_proba interface of sklearn's StackingClassifier, so
+    predict.predict_over_under can use either.
+    """
+
+    def __init__(self, estimators, final_estimator):
+        self.estimators = list(estimators)
+        self.final_estimator = final_estimator
+        self.classes_ = final_estimator.classes_
+
+    @property
+    def named_estimators_(self):
+        return dict(self.estimators)
+
+    def transform(self, X):
+        """The meta-features: each base model's probability of the positive class."""
+        return np.column_stack([estimator.predict_proba(X)[:, 1] for _, estimator in self.estimators])
+
+    def predict_proba(self, X):
+        return self.final_estimator.predict_proba(self.transform(X))
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
@@ -0,0 +1,312 @@
+import json
+import os
+import numpy as np
+
+FLAT_MODEL_PATH = 'models/stacking_model_flat.npz'
+FORMAT_VERSION = 1
+
+NODE_FIELDS = ['feature', 'threshold', 'children', 'missing_left', 'value', 'roots']
+
+# Rows scored per traversal step; bounds the (rows x trees) node-index matrix.
+CHUNK_CELLS = 1 << 21
+
+def _sigmoid(z):
+    return 1.0 / (1.0 + np.exp(-z))
+
+class FlatTreeEnsemble:
+    """One boosted or bagged tree ensemble as flat node arrays.
+
+    Every tree's nodes are concatenated; roots holds each tree's first node
+    and children[2 * node] and children[2 * node + 1] its left and right
+    child. An internal node sends a row right when x[feature] > threshold,
+    or, for a missing value, when missing_left is not set. Leaves are their
+    own children, so all trees can be advanced together for `depth` steps
+    without checking which rows already reached a leaf.
+
+    kind is 'logit_sum' (boosting: sigmoid of bias plus the leaf values) or
+    'mean' (bagging: the average leaf probability). float32_inputs marks
+    models that compare float32 copies of the features, as XGBoost and
+    scikit-learn trees do; LightGBM compares float64 values.
+    """
+
+    def __init__(self, name, kind, float32_inputs, depth, bias, feature, threshold, children, missing_left, value, roots):
+        self.name = name
+        self.kind = kind
+        self.float32_inputs = float32_inputs
+        self.depth = depth
+        self.bias = bias
+        self.feature = feature
+        self.threshold = threshold
+        self.children = children
+        self.missing_left = missing_left
+        self.value = value
+        self.roots = roots
+        self.internal = children[1::2] != np.arange(len(feature))
+
+    @classmethod
+    def from_trees(cls, name, kind, float32_inputs, bias, trees):
+        """Builds the ensemble from per-tree dicts of node arrays indexed from 0, with -1 children at leaves."""
+        arrays = {field: [] for field in NODE_FIELDS if field != 'roots'}
+        roots, offset, depth = [], 0, 0
+        for tree in trees:
+            left, right = np.asarray(tree['left']), np.asarray(tree['right'])
+            is_leaf = left < 0
+            own = np.arange(len(left)) + offset
+            roots.append(offset)
+            arrays['feature'].append(np.where(is_leaf, 0, tree['feature']))
+            arrays['threshold'].append(np.where(is_leaf, np.inf, tree['threshold']))
+            arrays['children'].append(np.column_stack([np.where(is_leaf, own, left + offset), np.where(is_leaf, own, right + offset)]).ravel())
+            arrays['missing_left'].append(np.where(is_leaf, True, tree['missing_left']))
+            arrays['value'].append(np.where(is_leaf, tree['value'], 0.0))
+            depth = max(depth, _tree_depth(left, right))
+            offset += len(left)
+        return cls(
+            name, kind, float32_inputs, depth, float(bias),
+            feature=np.concatenate(arrays['feature']).astype(np.int32),
+            threshold=np.concatenate(arrays['threshold']).astype(np.float64),
+            children=np.concatenate(arrays['children']).astype(np.int32),
+            missing_left=np.concatenate(arrays['missing_left']).astype(bool),
+            value=np.concatenate(arrays['value']).astype(np.float64),
+            roots=np.asarray(roots, dtype=np.int32),
+        )
+
+    def leaf_values(self, X, has_missing=True):
+        """(rows, trees) leaf values reached by each row of the float64 matrix X.
+
+        The (tree, row) cells are laid out tree by tree, so consecutive
+        lookups stay within one tree's nodes. Every other step, cells that
+        reached a leaf are dropped once they are a quarter of those left,
+        which keeps deep but unbalanced boosted trees cheap.
+        """
+        if self.float32_inputs:
+            X = X.astype(np.float32).astype(np.float64)
+        n_rows, n_trees = len(X), len(self.roots)
+        by_feature = np.ascontiguousarray(X.T).ravel()
+        nodes = np.repeat(self.roots, n_rows)
+        rows = np.tile(np.arange(n_rows, dtype=np.int32), n_trees)
+        cells = np.arange(len(nodes))
+        current = nodes
+        for step in range(self.depth):
+            x = by_feature[self.feature[current] * n_rows + rows]
+            go_right = x > self.threshold[current]
+            if has_missing:
+                go_right = np.where(np.isnan(x), ~self.missing_left[current], go_right)
+            current = self.children[2 * current + go_right]
+            if step % 2 == 1:
+                keep = self.internal[current]
+                if keep.sum() < 0.75 * len(keep):
+                    nodes[cells] = current
+                    cells, current, rows = (np.compress(keep, values) for values in (cells, current, rows))
+        nodes[cells] = current
+        return self.value[nodes].reshape(n_trees, n_rows).T
+
+    def positive_probability(self, X, has_missing=True):
+        values = self.leaf_values(X, has_missing)
+        if self.kind == 'logit_sum':
+            return _sigmoid(self.bias + values.sum(axis=1))
+        return values.mean(axis=1)
+
+    def metadata(self):
+        return {'name': self.name, 'kind': self.kind, 'float32_inputs': self.float32_inputs, 'depth': self.depth, 'bias': self.bias}
+
+    def arrays(self):
+        return {f'{self.name}.{field}': getattr(self, field) for field in NODE_FIELDS}
+
+def _tree_depth(left, right):
+    depth, level = 0, [0]
+    while True:
+        level = [child for node in level if left[node] >= 0 for child in (left[node], right[node])]
+        if not level:
+            return depth
+        depth += 1
+
+class FlatStackingModel:
+    """A stacking ensemble evaluated with NumPy alone.
+
+    Holds each base model as a FlatTreeEnsemble and the logistic-regression
+    meta-learner as coefficients over their positive-class probabilities.
+    It has the predict and predict_proba interface of the fitted
+    StackingClassifier it was exported from, so predict.predict_over_under
+    can use either, but loading and scoring it import neither XGBoost,
+    LightGBM nor scikit-learn.
+    """
+
+    def __init__(self, features, classes, base_models, coef, intercept, source=None):
+        self.features = list(features)
+        self.classes_ = np.asarray(classes)
+        self.base_models = list(base_models)
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.source = source
+
+    @classmethod
+    def from_stacking(cls, model, features, source=None):
+        """Flattens a fitted StackingClassifier or OutOfFoldStackingModel of XGBoost, LightGBM and forest classifiers.
+
+        The fitted objects are read through their own attributes, so this
+        module still imports none of their libraries.
+        """
+        if getattr(model, 'passthrough', False) or any(method != 'predict_proba' for method in getattr(model, 'stack_method_', [])):
+            raise ValueError("Only stacking on base-model probabilities without passthrough can be exported.")
+        final_estimator = getattr(model, 'final_estimator_', None) or model.final_estimator
+        if list(model.classes_) != [0, 1] or final_estimator.coef_.shape != (1, len(model.named_estimators_)):
+            raise ValueError("Only a binary stack with a logistic-regression meta-learner can be exported.")
+        base_models = [_flatten_estimator(name, estimator) for name, estimator in model.named_estimators_.items()]
+        return cls(features, model.classes_, base_models, final_estimator.coef_[0], final_estimator.intercept_[0], source)
+
+    def transform(self, X):
+        """The meta-features: each base model's probability of the positive class."""
+        X = self._matrix(X)
+        has_missing = bool(np.isnan(X).any())
+        return np.column_stack([model.positive_probability(X, has_missing) for model in self.base_models])
+
+    def predict_proba(self, X):
+        X = self._matrix(X)
+        if len(X) == 0:
+            return np.empty((0, 2))
+        chunk_rows = max(1, CHUNK_CELLS // max(len(model.roots) for model in self.base_models))
+        meta = np.concatenate([self.transform(X[start:start + chunk_rows]) for start in range(0, len(X), chunk_rows)])
+        positive = _sigmoid(meta @ self.coef + self.intercept)
+        return np.column_stack([1.0 - positive, positive])
+
+    def predict(self, X):
+        return self.classes_[np.argmax(self.predict_proba(X), axis=1)]
+
+    def _matrix(self, X):
+        if hasattr(X, 'columns'):
+            X = X[self.features]
+        return np.asarray(X, dtype=np.float64)
+
+    def save(self, path):
+        """Writes the model as plain arrays plus JSON metadata.
+
+        A path ending in .npz gets one uncompressed archive; any other path
+        becomes a directory of .npy files and metadata.json, which load can
+        memory-map.
+        """
+        metadata = {
+            'format_version': FORMAT_VERSION,
+            'features': self.features,
+            'classes': self.classes_.tolist(),
+            'base_models': [model.metadata() for model in self.base_models],
+            'source': self.source,
+        }
+        arrays = {'meta.coef': self.coef, 'meta.intercept': np.array([self.intercept])}
+        for model in self.base_models:
+            arrays.update(model.arrays())
+        if path.endswith('.npz'):
+            with open(path, 'wb') as f:
+                np.savez(f, metadata=np.array(json.dumps(metadata)), **arrays)
+            return
+        os.makedirs(path, exist_ok=True)
+        for key, values in arrays.items():
+            np.save(os.path.join(path, f'{key}.npy'), values)
+        with open(os.path.join(path, 'metadata.json'), 'w') as f:
+            json.dump(metadata, f)
+
+    @classmethod
+    def load(cls, path, mmap_mode=None):
+        """Loads a model written by save; mmap_mode (e.g. 'r') maps a directory's arrays instead of reading them.
+
+        Mapped arrays stay in the page cache, so processes serving the same
+        model share one copy of its trees.
+        """
+        if os.path.isdir(path):
+            with open(os.path.join(path, 'metadata.json')) as f:
+                metadata = json.load(f)
+            return cls._from_arrays(path, metadata, lambda key: np.load(os.path.join(path, f'{key}.npy'), mmap_mode=mmap_mode))
+        with np.load(path, allow_pickle=False) as archive:
+            return cls._from_arrays(path, json.loads(archive['metadata'].item()), archive.__getitem__)
+
+    @classmethod
+    def _from_arrays(cls, path, metadata, array):
+        if metadata['format_version'] != FORMAT_VERSION:
+            raise ValueError(f"'{path}' has flat model format {metadata['format_version']}, expected {FORMAT_VERSION}.")
+        base_models = [
+            FlatTreeEnsemble(**info, **{field: array(f"{info['name']}.{field}") for field in NODE_FIELDS})
+            for info in metadata['base_models']
+        ]
+        return cls(metadata['features'], metadata['classes'], base_models,
+                   array('meta.coef'), array('meta.intercept')[0], metadata['source'])
+
+def _flatten_estimator(name, estimator):
+    if list(estimator.classes_) != [0, 1]:
+        raise ValueError(f"Base model '{name}' is not a binary classifier over classes 0 and 1.")
+    if hasattr(estimator, 'get_booster'):
+        return _flatten_xgboost(name, estimator.get_booster())
+    if hasattr(estimator, 'booster_'):
+        return _flatten_lightgbm(name, estimator.booster_)
+    if hasattr(estimator, 'estimators_') and all(hasattr(tree, 'tree_') for tree in estimator.estimators_):
+        return _flatten_forest(name, estimator)
+    raise TypeError(f"Cannot flatten base model '{name}' of type {type(estimator).__name__}.")
+
+def _flatten_xgboost(name, booster):
+    """XGBoost: x < split (float32) goes left; rewritten as x <= the next float32 below the split."""
+    learner = json.loads(booster.save_raw('json'))['learner']
+    if learner['objective']['name'] != 'binary:logistic' or learner['gradient_booster']['name'] != 'gbtree':
+        raise ValueError(f"Base model '{name}' must be a binary:logistic gbtree booster.")
+    base_score = np.float32(learner['learner_model_param']['base_score'].strip('[]'))
+    trees = []
+    for tree in learner['gradient_booster']['model']['trees']:
+        if any(tree['split_type']):
+            raise ValueError(f"Base model '{name}' has categorical splits, which cannot be flattened.")
+        split = np.asarray(tree['split_conditions'], dtype=np.float32)
+        left = np.asarray(tree['left_children'])
+        trees.append({
+            'feature': tree['split_indices'],
+            'threshold': np.nextafter(split, np.float32(-np.inf)),
+            'left': left,
+            'right': tree['right_children'],
+            'missing_left': np.asarray(tree['default_left'], dtype=bool),
+            'value': split.astype(np.float64),
+        })
+    return FlatTreeEnsemble.from_trees(name, 'logit_sum', True, np.log(base_score / (1 - base_score)), trees)
+
+def _flatten_lightgbm(name, booster):
+    """LightGBM: x <= threshold (float64) goes left; a missing value is treated per the node's missing_type."""
+    model = booster.dump_model()
+    if model['objective'].split()[0] != 'binary' or model['num_class'] != 1 or model['average_output']:
+        raise ValueError(f"Base model '{name}' must be a binary LightGBM booster.")
+    sigmoid = float(dict(part.split(':') for part in model['objective'].split()[1:]).get('sigmoid', 1.0))
+    trees = []
+    for info in model['tree_info']:
+        tree = {'feature': [], 'threshold': [], 'left': [], 'right': [], 'missing_left': [], 'value': []}
+        _append_lightgbm_node(info['tree_structure'], tree, sigmoid)
+        trees.append(tree)
+    return FlatTreeEnsemble.from_trees(name, 'logit_sum', False, 0.0, trees)
+
+def _append_lightgbm_node(node, tree, sigmoid):
+    index = len(tree['left'])
+    for field in tree:
+        tree[field].append(0)
+    if 'leaf_value' in node:
+        tree['left'][index] = tree['right'][index] = -1
+        # The sigmoid scale is folded into the leaves so the evaluator's plain sigmoid applies.
+        tree['value'][index] = sigmoid * node['leaf_value']
+        return index
+    if node['decision_type'] != '<=' or node['missing_type'] not in ('None', 'NaN'):
+        raise ValueError(f"Unsupported LightGBM split: {node['decision_type']} with missing_type {node['missing_type']}.")
+    tree['feature'][index] = node['split_feature']
+    tree['threshold'][index] = node['threshold']
+    # missing_type None replaces a missing value with 0.0 before comparing.
+    tree['missing_left'][index] = node['default_left'] if node['missing_type'] == 'NaN' else 0.0 <= node['threshold']
+    tree['left'][index] = _append_lightgbm_node(node['left_child'], tree, sigmoid)
+    tree['right'][index] = _append_lightgbm_node(node['right_child'], tree, sigmoid)
+    return index
+
+def _flatten_forest(name, forest):
+    """scikit-learn forest: float32(x) <= threshold goes left; the leaf value is its positive-class fraction."""
+    positive = list(forest.classes_).index(1)
+    trees = []
+    for estimator in forest.estimators_:
+        tree = estimator.tree_
+        counts = tree.value[:, 0, :]
+        trees.append({
+            'feature': tree.feature,
+            'threshold': tree.threshold,
+            'left': tree.children_left,
+            'right': tree.children_right,
+            'missing_left': getattr(tree, 'missing_go_to_left', np.zeros(tree.node_count, dtype=bool)).astype(bool),
+            'value': counts[:, positive] / counts.sum(axis=1),
+        })
+    return FlatTreeEnsemble.from_trees(name, 'mean', True, 0.0, trees)
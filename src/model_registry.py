@@ -0,0 +1,252 @@
+import argparse
+import datetime
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from src.flat_model import FlatStackingModel
+
+REGISTRY_DIR = 'models/registry'
+ACTIVE_FILE = 'ACTIVE'
+MANIFEST_FILE = 'manifest.json'
+MODEL_FILE = 'model.joblib'
+FLAT_MODEL_DIR = 'flat'
+
+LOADERS = ['joblib', 'joblib_mmap', 'flat', 'flat_mmap']
+
+def _write_atomic(path, text):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def load_artifact(version_dir, loader):
+    """Loads one version's model with the named loader from LOADERS.
+
+    joblib, and through the pickle the ML libraries, is imported only by
+    the joblib loaders.
+    """
+    if loader.startswith('flat'):
+        return FlatStackingModel.load(os.path.join(version_dir, FLAT_MODEL_DIR), mmap_mode='r' if loader == 'flat_mmap' else None)
+    import joblib
+    return joblib.load(os.path.join(version_dir, MODEL_FILE), mmap_mode='r' if loader == 'joblib_mmap' else None)
+
+class ModelRegistry:
+    """Versioned store of trained models under root, with one active version.
+
+    Each version is an immutable directory root/vNNNN/ holding the joblib
+    model, its flat NumPy export as a directory of .npy files (when the
+    model can be flattened) and manifest.json: features, training-data
+    fingerprint, metrics and cold load times. root/ACTIVE names the version
+    predict.py serves. Versions and the pointer are written atomically, so
+    readers never see a partial model.
+
+    Uncompressed joblib files and .npy directories can both be loaded
+    memory-mapped. Only the flat model's arrays stay mapped, though:
+    scikit-learn copies tree nodes into its own buffers on unpickling, so
+    worker processes share one copy of the forest only through the flat
+    export.
+    """
+
+    def __init__(self, root=REGISTRY_DIR):
+        self.root = root
+
+    def versions(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(name for name in os.listdir(self.root) if name.startswith('v') and os.path.exists(self.manifest_path(name)))
+
+    def version_dir(self, version):
+        return os.path.join(self.root, version)
+
+    def manifest_path(self, version):
+        return os.path.join(self.root, version, MANIFEST_FILE)
+
+    def artifact_path(self, version):
+        """The file or directory load() reads for a version: the flat export if it has one, else the joblib model.
+
+        Unlike the manifest, which benchmark() rewrites, it never changes, so
+        callers can cache the loaded model on it.
+        """
+        flat_dir = os.path.join(self.root, version, FLAT_MODEL_DIR)
+        return flat_dir if os.path.isdir(flat_dir) else os.path.join(self.root, version, MODEL_FILE)
+
+    def manifest(self, version):
+        with open(self.manifest_path(version)) as f:
+            return json.load(f)
+
+    def active_version(self):
+        """The active version, or None if the registry is empty or has no pointer."""
+        try:
+            with open(os.path.join(self.root, ACTIVE_FILE)) as f:
+                version = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return version or None
+
+    def activate(self, version):
+        if not os.path.exists(self.manifest_path(version)):
+            raise ValueError(f"No model version '{version}' in '{self.root}'.")
+        _write_atomic(os.path.join(self.root, ACTIVE_FILE), version + '\n')
+
+    def register(self, model, features, data_fingerprint=None, metrics=None, details=None, flat_model=None, activate=True, benchmark=True):
+        """Stores model (and its flat export, if given) as the next version and returns the version name.
+
+        The version is assembled in a temporary directory and renamed into
+        place. With benchmark, cold load times are measured in fresh
+        interpreters and recorded in the manifest.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        staging_dir = tempfile.mkdtemp(dir=self.root, prefix='.staging-')
+        try:
+            os.chmod(staging_dir, 0o755)
+            import joblib
+            joblib.dump(model, os.path.join(staging_dir, MODEL_FILE))
+            if flat_model is not None:
+                flat_model.save(os.path.join(staging_dir, FLAT_MODEL_DIR))
+            manifest = {
+                'created_at': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+                'model_type': type(model).__name__,
+                'features': list(features),
+                'data_fingerprint': data_fingerprint,
+                'metrics': metrics or {},
+                'details': details or {},
+                'flat_model': flat_model is not None,
+                'load_seconds': benchmark_load(staging_dir, flat_model is not None) if benchmark else {},
+            }
+            version = self._claim_version(staging_dir, manifest)
+        except BaseException:
+            shutil.rmtree(staging_dir, ignore_errors=True)
+            raise
+        if activate:
+            self.activate(version)
+        return version
+
+    def _claim_version(self, staging_dir, manifest):
+        existing = [int(name[1:]) for name in os.listdir(self.root) if name.startswith('v') and name[1:].isdigit()]
+        number = max(existing, default=0) + 1
+        while True:
+            version = f'v{number:04d}'
+            with open(os.path.join(staging_dir, MANIFEST_FILE), 'w') as f:
+                json.dump({'version': version, **manifest}, f, indent=2)
+            try:
+                os.rename(staging_dir, self.version_dir(version))
+                return version
+            except OSError:
+                if not os.path.exists(self.version_dir(version)):
+                    raise
+                number += 1
+
+    def load(self, version=None, mmap=True):
+        """Loads a version (the active one by default), preferring its memory-mapped flat export."""
+        version = version or self.active_version()
+        if version is None:
+            raise FileNotFoundError(f"No active model in '{self.root}'.")
+        has_flat = self.manifest(version)['flat_model']
+        loader = ('flat' if has_flat else 'joblib') + ('_mmap' if mmap else '')
+        return load_artifact(self.version_dir(version), loader)
+
+    def benchmark(self, version, repeats=3):
+        """Re-measures a version's cold load times and records them in its manifest."""
+        manifest = self.manifest(version)
+        manifest['load_seconds'] = benchmark_load(self.version_dir(version), manifest['flat_model'], repeats)
+        _write_atomic(self.manifest_path(version), json.dumps(manifest, indent=2))
+        return manifest['load_seconds']
+
+def measure_load(version_dir, loader):
+    """Seconds to import the loader's libraries and load the model, in this (fresh) process."""
+    start = time.perf_counter()
+    load_artifact(version_dir, loader)
+    return time.perf_counter() - start
+
+def benchmark_load(version_dir, has_flat, repeats=1):
+    """Median cold load seconds per loader, each measured in a fresh interpreter."""
+    results = {}
+    for loader in LOADERS if has_flat else [loader for loader in LOADERS if loader.startswith('joblib')]:
+        seconds = []
+        for _ in range(repeats):
+            output = subprocess.run(
+                [sys.executable, '-m', 'src.model_registry', 'measure-load', version_dir, loader],
+                capture_output=True, text=True, check=True
+            ).stdout
+            seconds.append(float(output.strip().splitlines()[-1]))
+        results[loader] = sorted(seconds)[len(seconds) // 2]
+    return results
+
+def model_features(model):
+    """The feature names model was fitted on, or None if neither it nor its base estimators record them.
+
+    StackingClassifier sets feature_names_in_ itself; OutOfFoldStackingModel
+    does not, but its fitted base estimators do.
+    """
+    features = getattr(model, 'feature_names_in_', None)
+    if features is None:
+        for _, estimator in getattr(model, 'estimators', []):
+            features = getattr(estimator, 'feature_names_in_', None)
+            if features is not None:
+                break
+    return None if features is None else [str(name) for name in features]
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect and manage the versioned model registry.")
+    parser.add_argument('--root', default=REGISTRY_DIR)
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('list', help="List versions with their metrics; * marks the active one.")
+    activate_parser = commands.add_parser('activate', help="Make VERSION the model predict.py serves.")
+    activate_parser.add_argument('version')
+    benchmark_parser = commands.add_parser('benchmark', help="Re-measure cold load times of VERSION (default: the active one).")
+    benchmark_parser.add_argument('version', nargs='?')
+    benchmark_parser.add_argument('--repeats', type=int, default=3)
+    register_parser = commands.add_parser('register', help="Register an existing joblib model, e.g. one trained before the registry.")
+    register_parser.add_argument('path')
+    register_parser.add_argument('--features', nargs='+', help="Feature names, for a model that does not record them.")
+    register_parser.add_argument('--no-activate', action='store_true')
+    measure_parser = commands.add_parser('measure-load')
+    measure_parser.add_argument('version_dir')
+    measure_parser.add_argument('loader', choices=LOADERS)
+    args = parser.parse_args()
+
+    registry = ModelRegistry(args.root)
+    if args.command == 'measure-load':
+        print(measure_load(args.version_dir, args.loader))
+    elif args.command == 'list':
+        active = registry.active_version()
+        for version in registry.versions():
+            manifest = registry.manifest(version)
+            metrics = ', '.join(f"{name} {value:.4f}" for name, value in manifest['metrics'].items() if isinstance(value, float))
+            loads = ', '.join(f"{loader} {seconds * 1000:.0f} ms" for loader, seconds in manifest['load_seconds'].items())
+            print(f"{'*' if version == active else ' '} {version}  {manifest['created_at']}  {manifest['model_type']}  {metrics or 'no metrics'}  [{loads}]")
+    elif args.command == 'activate':
+        registry.activate(args.version)
+        print(f"Active model: {args.version}")
+    elif args.command == 'benchmark':
+        version = args.version or registry.active_version()
+        if version is None:
+            parser.error(f"No active model in '{args.root}'; name the VERSION to benchmark.")
+        for loader, seconds in registry.benchmark(version, args.repeats).items():
+            print(f"{version} {loader:>12}: {seconds * 1000:8.1f} ms")
+    elif args.command == 'register':
+        import joblib
+        model = joblib.load(args.path)
+        features = args.features or model_features(model)
+        if features is None:
+            parser.error(f"'{args.path}' does not record its feature names; pass them with --features.")
+        try:
+            flat_model = FlatStackingModel.from_stacking(model, features)
+        except (AttributeError, TypeError, ValueError) as e:
+            print(f"Registering without a flat export: {e}")
+            flat_model = None
+        version = registry.register(model, features, details={'registered_from': args.path}, flat_model=flat_model, activate=not args.no_activate)
+        print(f"Registered '{args.path}' as {version}.")
+
+
+if __name__ == '__main__':
+    main()
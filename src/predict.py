@@ -1,453 +1,360 @@
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
 import pandas as pd
-import joblib
-from src.api_client import get_upcoming_games, AVAILABLE_LEAGUES
+from src.api_client import get_api_key, get_upcoming_games, get_upcoming_games_many, AVAILABLE_LEAGUES
+from src.flat_model import FLAT_MODEL_PATH, FlatStackingModel
+from src.model_registry import ModelRegistry
+from src.prediction_cache import PredictionCache
+from src.resource_cache import resource_cache
+from src.storage import RAW_CSV, RAW_DATASET, resolve_games_path
+from src.team_state import TEAM_STATE_PATH, TeamHistoryIndex, TeamState, read_history, team_window_sums
+from src.team_names import TEAM_NAME_MAP, standardize_team_name, team_name_resolver
 import numpy as np
-import streamlit as st
-
-TEAM_NAME_MAP = {
-    "St. John's Red Storm": "St. John'S",
-    "CSU Bakersfield Roadrunners": "Cal State Bakersfield",
-    "Missouri St Bears": "Missouri State",
-    "St. Mary's Gaels": "Saint Mary'S (Ca)",
-    "Usc Trojans": "Usc",
-    "Ole Miss Rebels": "Mississippi",
-    "Ohio St Buckeyes": "Ohio State",
-    "North Carolina St Wolfpack": "North Carolina State",
-    "Lsu Tigers": "Lsu",
-    "Byu Cougars": "Byu",
-    "Loyola-Chicago Ramblers": "Loyola Chicago",
-    "Central Florida Knights": "Central Florida",
-    "Nc-Greensboro Spartans": "Unc Greensboro",
-    "Long Beach State Beach": "Long Beach State",
-    "Boise St Broncos": "Boise State",
-    "Michigan St Spartans": "Michigan State",
-    "Washington St Cougars": "Washington State",
-    "Oregon St Beavers": "Oregon State",
-    "Kansas St Wildcats": "Kansas State",
-    "Okla State Cowboys": "Oklahoma State",
-    "Florida St Seminoles": "Florida State",
-    "Arizona St Sun Devils": "Arizona State",
-    "Georgia Tech Yellow Jackets": "Georgia Tech",
-    "Va Tech Hokies": "Virginia Tech",
-    "Wvu Mountaineers": "West Virginia",
-    "Penn State Nittany Lions": "Penn State",
-    "Miss State Bulldogs": "Mississippi State",
-    "Kent State Golden Flashes": "Kent State",
-    "Iowa State Cyclones": "Iowa State",
-    "East Carolina Pirates": "East Carolina",
-    "South Carolina Gamecocks": "South Carolina",
-    "Middle Tennessee Blue Raiders": "Middle Tennessee",
-    "Florida Gulf Coast Eagles": "Florida Gulf Coast",
-    "College of Charleston Cougars": "Charleston",
-    "St Louis Billikens": "Saint Louis",
-    "Saint Joseph's Hawks": "Saint Joseph'S",
-    "North Carolina Tar Heels": "North Carolina",
-    "UTEP Miners": "Utep",
-    "UNLV Rebels": "Unlv",
-    "Cal Poly Mustangs": "Cal Poly",
-    "Abilene Christian Wildcats": "Abilene Christian",
-    "S. Dakota State Jackrabbits": "South Dakota State",
-    "Boston U Terriers": "Boston University",
-    "UMass Lowell River Hawks": "Um-Lowell",
-    "Central Conn State Blue Devils": "Central Connecticut",
-    "Nc-Wilmington Seahawks": "Unc Wilmington",
-    "Stephen F Austin Lumberjacks": "Stephen F Austin",
-    "S Carolina Upstate Spartans": "Sc Upstate",
-    "Little Rock Trojans": "Arkansas-Little Rock",
-    "Eastern Washington Eagles": "Eastern Washington",
-    "Western Carolina Catamounts": "Western Carolina",
-    "Northern Kentucky Norse": "Northern Kentucky",
-    "South Dakota Coyotes": "South Dakota",
-    "Eastern Illinois Panthers": "Eastern Illinois",
-    "Southeast Missouri State Redhawks": "Se Missouri State",
-    "Western Illinois Leathernecks": "Western Illinois",
-    "Southern Illinois Salukis": "Southern Illinois",
-    "Cal Baptist Lancers": "California Baptist",
-    "North Alabama Lions": "North Alabama",
-    "South Alabama Jaguars": "South Alabama",
-    "Central Arkansas Bears": "Central Arkansas",
-    "Southern Utah Thunderbirds": "Southern Utah",
-    "Utah Tech Trailblazers": "Utah Tech",
-    "California Baptist Lancers": "California Baptist",
-    "Louisiana-Monroe Warhawks": "Ul Monroe",
-    "Louisiana-Lafayette Ragin' Cajuns": "Louisiana",
-    "Appalachian State Mountaineers": "Appalachian State",
-    "Georgia State Panthers": "Georgia State",
-    "Coastal Carolina Chanticleers": "Coastal Carolina",
-    "UL Monroe Warhawks": "Ul Monroe",
-    "Arkansas State Red Wolves": "Arkansas State",
-    "Ga Southern Eagles": "Georgia Southern",
-    "Texas St Bobcats": "Texas State",
-    "Ut-Arlington Mavericks": "Ut Arlington",
-    "Wichita St Shockers": "Wichita State",
-    "Middle Tenn Blue Raiders": "Middle Tennessee",
-    "Old Dominion Monarchs": "Old Dominion",
-    "Uab Blazers": "Uab",
-    "Western Kentucky Hilltoppers": "Western Kentucky",
-    "Florida Atlantic Owls": "Florida Atlantic",
-    "Tx-San Antonio Roadrunners": "Ut San Antonio",
-    "Louisiana Tech Bulldogs": "Louisiana Tech",
-    "Bowling Green Falcons": "Bowling Green",
-    "Eastern Michigan Eagles": "Eastern Michigan",
-    "Central Michigan Chippewas": "Central Michigan",
-    "Western Michigan Broncos": "Western Michigan",
-    "Northern Illinois Huskies": "Northern Illinois",
-    "Ball State Cardinals": "Ball State",
-    "Miami-Ohio RedHawks": "Miami (Oh)",
-    "Kent St Golden Flashes": "Kent State",
-    "Akron Zips": "Akron",
-    "Ohio Bobcats": "Ohio",
-    "South Alabama Jaguars": "South Alabama",
-    "Ga. Southern Eagles": "Georgia Southern",
-    "Louisiana Ragin' Cajuns": "Louisiana",
-    "Appalachian St Mountaineers": "Appalachian State",
-    "Arkansas St Red Wolves": "Arkansas State",
-    "Coastal Caro Chanticleers": "Coastal Carolina",
-    "Texas-Arlington Mavericks": "Ut Arlington",
-    "Little Rock Trojans": "Arkansas-Little Rock",
-    "UMKC Kangaroos": "Umkc",
-    "North Dakota State Bison": "North Dakota State",
-    "South Dakota State Jackrabbits": "South Dakota State",
-    "Western Illinois Leathernecks": "Western Illinois",
-    "Southeast Missouri St Redhawks": "Se Missouri State",
-    "Eastern Illinois Panthers": "Eastern Illinois",
-    "Southern Illinois Salukis": "Southern Illinois",
-    "Cal Poly Mustangs": "Cal Poly",
-    "Cal St Fullerton Titans": "Cal State Fullerton",
-    "CSUN Matadors": "Cs Northridge",
-    "UC Riverside Highlanders": "Uc Riverside",
-    "UC Davis Aggies": "Uc Davis",
-    "UC Irvine Anteaters": "Uc Irvine",
-    "UC Santa Barbara Gauchos": "Uc Santa Barbara",
-    "Long Beach St Beach": "Long Beach State",
-    "Hawai'i Rainbow Warriors": "Hawaii",
-    "St. Thomas (MN) Tommies": "St Thomas",
-    "UMass-Lowell River Hawks": "Um-Lowell",
-    "Stonehill Skyhawks": "Stonehill",
-    "Central Arkansas Bears": "Central Arkansas",
-    "North Florida Ospreys": "North Florida",
-    "Florida Gulf Coast Eagles": "Florida Gulf Coast",
-    "Kennesaw State Owls": "Kennesaw State",
-    "Jacksonville State Gamecocks": "Jacksonville State",
-    "North Alabama Lions": "North Alabama",
-    "Eastern Kentucky Colonels": "Eastern Kentucky",
-    "Southern Indiana Screaming Eagles": "Southern Indiana",
-    "UT Martin Skyhawks": "Ut Martin",
-    "Tennessee Tech Golden Eagles": "Tennessee Tech",
-    "SIUE Cougars": "Siue",
-    "Morehead State Eagles": "Morehead State",
-    "Western Illinois Leathernecks": "Western Illinois",
-    "Lindenwood Lions": "Lindenwood",
-    "Little Rock Trojans": "Arkansas-Little Rock",
-    "Omaha Mavericks": "Omaha",
-    "Denver Pioneers": "Denver",
-    "St. Thomas-Minnesota Tommies": "St Thomas",
-    "Tarleton State Texans": "Tarleton State",
-    "UT Rio Grande Valley Vaqueros": "Ut Rio Grande Valley",
-    "Grand Canyon Antelopes": "Grand Canyon",
-    "California Baptist Lancers": "California Baptist",
-    "Southern Utah Thunderbirds": "Southern Utah",
-    "Utah Valley Wolverines": "Utah Valley",
-    "Seattle U Redhawks": "Seattle",
-    "New Mexico St Aggies": "New Mexico State",
-    "Stephen F. Austin Lumberjacks": "Stephen F Austin",
-    "Sam Houston State Bearkats": "Sam Houston State",
-    "Florida Intl Golden Panthers": "Florida International",
-    "Western Kentucky Hilltoppers": "Western Kentucky",
-    "Middle Tennessee Blue Raiders": "Middle Tennessee",
-    "Charlotte 49ers": "Charlotte",
-    "Texas-San Antonio Roadrunners": "Ut San Antonio",
-    "Florida Atlantic Owls": "Florida Atlantic",
-    "North Texas Mean Green": "North Texas",
-    "UAB Blazers": "Uab",
-    "Louisiana Tech Bulldogs": "Louisiana Tech",
-    "Old Dominion Monarchs": "Old Dominion",
-    "Rice Owls": "Rice",
-    "UTEP Miners": "Utep",
-    "Wichita State Shockers": "Wichita State",
-    "East Carolina Pirates": "East Carolina",
-    "UCF Knights": "Central Florida",
-    "Memphis Tigers": "Memphis",
-    "South Florida Bulls": "South Florida",
-    "Houston Cougars": "Houston",
-    "Cincinnati Bearcats": "Cincinnati",
-    "Tulane Green Wave": "Tulane",
-    "Temple Owls": "Temple",
-    "SMU Mustangs": "Smu",
-    "UConn Huskies": "Connecticut",
-    "BYU Cougars": "Byu",
-    "UC Santa Barbara Gauchos": "Uc Santa Barbara",
-    "Loyola Chicago Ramblers": "Loyola Chicago",
-    "St. Louis Billikens": "Saint Louis",
-    "Richmond Spiders": "Richmond",
-    "St. Bonaventure Bonnies": "Saint Bonaventure",
-    "George Mason Patriots": "George Mason",
-    "George Washington Revolutionaries": "George Washington",
-    "La Salle Explorers": "La Salle",
-    "VCU Rams": "Vcu",
-    "UMass Minutemen": "Um_Ass",
-    "Dayton Flyers": "Dayton",
-    "Saint Joseph's Hawks": "Saint Joseph'S",
-    "North Carolina Tar Heels": "North Carolina",
-    "Fordham Rams": "Fordham",
-    "Rhode Island Rams": "Rhode Island",
-    "St. Joseph's Hawks": "Saint Joseph'S",
-
-    "Atlanta Hawks": "Atlanta",
-    "Boston Celtics": "Boston",
-    "Brooklyn Nets": "Brooklyn",
-    "Charlotte Hornets": "Charlotte",
-    "Chicago Bulls": "Chicago",
-    "Cleveland Cavaliers": "Cleveland",
-    "Dallas Mavericks": "Dallas",
-    "Denver Nuggets": "Denver",
-    "Detroit Pistons": "Detroit",
-    "Golden State Warriors": "Golden State",
-    "Houston Rockets": "Houston",
-    "Indiana Pacers": "Indiana",
-    "Los Angeles Clippers": "La Clippers",
-    "Los Angeles Lakers": "La Lakers",
-    "Memphis Grizzlies": "Memphis",
-    "Miami Heat": "Miami",
-    "Milwaukee Bucks": "Milwaukee",
-    "Minnesota Timberwolves": "Minnesota",
-    "New Orleans Pelicans": "New Orleans",
-    "New York Knicks": "New York",
-    "Oklahoma City Thunder": "Oklahoma City",
-    "Orlando Magic": "Orlando",
-    "Philadelphia 76ers": "Philadelphia",
-    "Phoenix Suns": "Phoenix",
-    "Portland Trail Blazers": "Portland",
-    "Sacramento Kings": "Sacramento",
-    "San Antonio Spurs": "San Antonio",
-    "Toronto Raptors": "Toronto",
-    "Utah Jazz": "Utah",
-    "Washington Wizards": "Washington",
-
-    "Atlanta Dream": "Atlanta",
-    "Chicago Sky": "Chicago",
-    "Connecticut Sun": "Connecticut",
-    "Dallas Wings": "Dallas",
-    "Indiana Fever": "Indiana",
-    "Las Vegas Aces": "Las Vegas",
-    "Los Angeles Sparks": "Los Angeles",
-    "Minnesota Lynx": "Minnesota",
-    "New York Liberty": "New York",
-    "Phoenix Mercury": "Phoenix",
-    "Seattle Storm": "Seattle",
-    "Washington Mystics": "Washington",
-}
-
-def standardize_team_name(team_name):
-    normalized_input = team_name.title()
-
-    if normalized_input in TEAM_NAME_MAP:
-        return TEAM_NAME_MAP[normalized_input].lower()
-    
-    for key, value in TEAM_NAME_MAP.items():
-        if normalized_input == key.title():
-             return value.lower()
-
-    team_name_lower = team_name.lower()
-    
-    common_suffixes = [
-        ' state', ' tech', ' a&m', ' am', ' red storm', ' roadrunners', ' bears', ' gaels', ' trojans', ' rebels',
-        ' buckeyes', ' wolfpack', ' tigers', ' cougars', ' ramblers', ' knights', ' spartans', ' beavers',
-        ' wildcats', ' cowboys', ' seminoles', ' sun devils', ' yellow jackets', ' hokies', ' mountaineers',
-        ' nittany lions', ' bulldogs', ' golden flashes', ' cyclones', ' pirates', ' gamecocks', ' blue raiders',
-        ' eagles', ' seahawks', ' lumberjacks', ' salukis', ' leathernecks', ' redhawks', ' broncos', ' chippewas',
-        ' panthers', ' river hawks', ' thunderbirds', ' vaqueros', ' anteaters', ' gauchos', ' matadors',
-        ' banana slugs', ' fighting hawaiians', ' shockers', ' monarchs', ' blazers', ' hilltoppers', ' owls',
-        ' mean green', ' cardinals', ' huskie', ' bobcats', ' zips', ' aggies', ' bearkats', ' 49ers',
-        ' green wave', ' grizzlies', ' heat', ' bucks', ' timberwolves', ' pelicans', ' knicks', ' thunder',
-        ' magic', ' 76ers', ' suns', ' trail blazers', ' kings', ' spurs', ' raptors', ' jazz', ' wizards',
-        ' dream', ' sky', ' sun', ' wings', ' fever', ' aces', ' sparks', ' lynx', ' liberty', ' mercury',
-        ' storm', ' mystics'
-    ]
-    city_suffixes = [
-        ' lakers', ' clippers', ' nets', ' celtics', ' hornets', ' bulls', ' cavaliers', ' mavericks',
-        ' pistons', ' warriors', ' rockets', ' pacers', ' grizzlies', ' heat', ' bucks', ' timberwolves',
-        ' pelicans', ' knicks', ' thunder', ' magic', ' 76ers', ' suns', ' trail blazers', ' kings',
-        ' spurs', ' raptors', ' jazz', ' wizards', ' dream', ' sky', ' sun', ' wings', ' fever', ' aces',
-        ' sparks', ' lynx', ' liberty', ' mercury', ' storm', ' mystics'
-    ]
-
-    for suffix in common_suffixes + city_suffixes:
-        if team_name_lower.endswith(suffix):
-            base_name = team_name_lower.replace(suffix, '').strip()
-            if base_name:
-                return base_name
-
-    return team_name_lower.split(' ')[0] if team_name_lower else team_name_lower
-
-def get_team_history(team_name, historical_df):
-    std_team_name = standardize_team_name(team_name)
-    history = historical_df[
-        (historical_df['HomeTeam'].str.lower().str.contains(std_team_name)) |
-        (historical_df['AwayTeam'].str.lower().str.contains(std_team_name))
-    ].copy()
-    return history.sort_values(by='Date', ascending=False)
-
-def calculate_features_for_game(home_team, away_team, historical_df, window_size=10):
-    home_history = get_team_history(home_team, historical_df)
-    away_history = get_team_history(away_team, historical_df)
-
-    std_home_team = standardize_team_name(home_team)
-    std_away_team = standardize_team_name(away_team)
-
-    if len(home_history) == 0 and len(away_history) == 0:
-        st.warning(f"Skipping {home_team} vs {away_team}: No historical data for either team.")
-        return None
 
-    home_window = min(len(home_history), window_size)
-    away_window = min(len(away_history), window_size)
-
-    home_recent = home_history.head(home_window)
-    away_recent = away_history.head(away_window)
-
-    home_stats = {'mov': [], 'pts_for': [], 'pts_against': [], 'ou_hits': []}
-    if home_window > 0:
-        for _, game in home_recent.iterrows():
-            ou_line_val = game.get('OU_Line', 0)
-            if pd.isna(ou_line_val):
-                ou_line_val = 0
-
-            ou_hit = 1 if (game['HomeScore'] + game['AwayScore']) > ou_line_val else 0
-            if std_home_team in game['HomeTeam'].lower():
-                home_stats['mov'].append(game['HomeScore'] - game['AwayScore'])
-                home_stats['pts_for'].append(game['HomeScore'])
-                home_stats['pts_against'].append(game['AwayScore'])
-                home_stats['ou_hits'].append(ou_hit)
-            else:
-                home_stats['mov'].append(game['AwayScore'] - game['HomeScore'])
-                home_stats['pts_for'].append(game['AwayScore'])
-                home_stats['pts_against'].append(game['HomeScore'])
-                home_stats['ou_hits'].append(ou_hit)
-
-    away_stats = {'mov': [], 'pts_for': [], 'pts_against': [], 'ou_hits': []}
-    if away_window > 0:
-        for _, game in away_recent.iterrows():
-            ou_line_val = game.get('OU_Line', 0)
-            if pd.isna(ou_line_val):
-                ou_line_val = 0
-
-            ou_hit = 1 if (game['HomeScore'] + game['AwayScore']) > ou_line_val else 0
-            if std_away_team in game['AwayTeam'].lower():
-                away_stats['mov'].append(game['AwayScore'] - game['HomeScore'])
-                away_stats['pts_for'].append(game['AwayScore'])
-                away_stats['pts_against'].append(game['HomeScore'])
-                away_stats['ou_hits'].append(ou_hit)
-            else:
-                away_stats['mov'].append(game['HomeScore'] - game['AwayScore'])
-                away_stats['pts_for'].append(game['HomeScore'])
-                away_stats['pts_against'].append(game['HomeScore'])
-                away_stats['ou_hits'].append(ou_hit)
-
-    features = {
-        'Home_Avg_MOV': np.mean(home_stats['mov']) if home_stats['mov'] else 0,
-        'Home_Avg_Pts_For': np.mean(home_stats['pts_for']) if home_stats['pts_for'] else 0,
-        'Home_Avg_Pts_Against': np.mean(home_stats['pts_against']) if home_stats['pts_against'] else 0,
-        'Home_Avg_OU_Hit_Rate': np.mean(home_stats['ou_hits']) if home_stats['ou_hits'] else 0,
-        'Away_Avg_MOV': np.mean(away_stats['mov']) if away_stats['mov'] else 0,
-        'Away_Avg_Pts_For': np.mean(away_stats['pts_for']) if away_stats['pts_for'] else 0,
-        'Away_Avg_Pts_Against': np.mean(away_stats['pts_against']) if away_stats['pts_against'] else 0,
-        'Away_Avg_OU_Hit_Rate': np.mean(away_stats['ou_hits']) if away_stats['ou_hits'] else 0
+logger = logging.getLogger(__name__)
+
+FEATURE_COLS = [
+    'Home_Avg_MOV', 'Home_Avg_Pts_For', 'Home_Avg_Pts_Against', 'Home_Avg_OU_Hit_Rate',
+    'Away_Avg_MOV', 'Away_Avg_Pts_For', 'Away_Avg_Pts_Against', 'Away_Avg_OU_Hit_Rate',
+    'Avg_MOV_Diff', 'Avg_Pts_For_Diff', 'Avg_Pts_Against_Diff', 'Avg_OU_Hit_Rate_Diff'
+]
+
+MODEL_PATH = 'models/xgb_lgbm_rf_stacking_model.joblib'
+
+PREFERRED_BOOKMAKERS = ['draftkings', 'fanduel', 'betmgm', 'betonlineag', 'bovada']
+
+PREDICTION_COLUMNS = ['League', 'Match', 'Prediction', 'Probability']
+
+EXIT_OK = 0
+EXIT_CONFIG_ERROR = 3
+EXIT_ODDS_FAILED = 4
+EXIT_PARTIAL = 5
+
+def get_team_history(team_name, historical_df, team_index=None, n=None):
+    if team_index is None:
+        team_index = TeamHistoryIndex(historical_df)
+    return team_index.history(standardize_team_name(team_name), n=n)
+
+def _team_window_sums(std_team_names, window_size, as_home, historical_df, team_index, team_state):
+    """Window sums and counts per key, from the team-state snapshot where it covers the key.
+
+    Keys the snapshot lacks (names outside the alias table and the history)
+    fall back to the history index, which is only loaded when needed.
+    """
+    sums = np.zeros((len(std_team_names), 4))
+    counts = np.zeros(len(std_team_names), dtype=np.intp)
+    found = np.zeros(len(std_team_names), dtype=bool)
+    if team_state is not None and team_state.window_size == window_size:
+        rows = team_state.rows(std_team_names)
+        found = rows >= 0
+        sums[found] = (team_state.home_sums if as_home else team_state.away_sums)[rows[found]]
+        counts[found] = team_state.games[rows[found]]
+
+    missing = np.flatnonzero(~found)
+    if len(missing):
+        if team_index is None:
+            team_index = TeamHistoryIndex(historical_df) if historical_df is not None else load_historical_data()[1]
+        sums[missing], counts[missing] = team_window_sums([std_team_names[i] for i in missing], team_index, window_size, as_home)
+    return sums, counts
+
+def _window_means(sums, counts):
+    """Turns window sums into means; teams without history get zeros."""
+    means = np.zeros_like(sums)
+    has_games = counts > 0
+    means[has_games] = sums[has_games] / counts[has_games, None]
+    return means
+
+def calculate_slate_features(matchups, historical_df=None, window_size=10, team_index=None, team_state=None):
+    """Builds the feature matrix for a whole slate of (home_team, away_team) pairs in one pass.
+
+    With a TeamState, each matchup is a home-key and an away-key lookup in the
+    snapshot plus a subtraction; otherwise the windows come from the history.
+    Returns a DataFrame with one row per matchup and FEATURE_COLS as columns.
+    Rows where neither team has any history are all NaN.
+    """
+    std_home = team_name_resolver.resolve_many([home for home, _ in matchups])
+    std_away = team_name_resolver.resolve_many([away for _, away in matchups])
+    home_slots = {key: slot for slot, key in enumerate(dict.fromkeys(std_home))}
+    away_slots = {key: slot for slot, key in enumerate(dict.fromkeys(std_away))}
+
+    sources = (historical_df, team_index, team_state)
+    home_sums, home_counts = _team_window_sums(list(home_slots), window_size, True, *sources)
+    away_sums, away_counts = _team_window_sums(list(away_slots), window_size, False, *sources)
+    home_means = _window_means(home_sums, home_counts)
+    away_means = _window_means(away_sums, away_counts)
+    home_rows = np.array([home_slots[key] for key in std_home], dtype=np.intp)
+    away_rows = np.array([away_slots[key] for key in std_away], dtype=np.intp)
+    home_means, home_counts = home_means[home_rows], home_counts[home_rows]
+    away_means, away_counts = away_means[away_rows], away_counts[away_rows]
+
+    features = np.hstack([home_means, away_means, home_means - away_means])
+    features[(home_counts == 0) & (away_counts == 0)] = np.nan
+    return pd.DataFrame(features, columns=FEATURE_COLS)
+
+def calculate_features_for_game(home_team, away_team, historical_df, window_size=10, team_index=None):
+    features = calculate_slate_features([(home_team, away_team)], historical_df, window_size, team_index).iloc[0]
+    if features.isna().all():
+        logger.warning(f"Skipping {home_team} vs {away_team}: No historical data for either team.")
+        return None
+    return features.to_dict()
+
+def _read_historical_data(path):
+    historical_df = read_history(path)
+    return historical_df, TeamHistoryIndex(historical_df)
+
+def _load_joblib(path):
+    # Unpickling imports XGBoost, LightGBM and scikit-learn, so joblib is only imported when a model needs it.
+    import joblib
+    return joblib.load(path)
+
+def load_model(path=None, flat_path=None, registry=None):
+    """Returns the stacking model, loaded once per process and reloaded when the file changes.
+
+    By default serves the active version of the model registry,
+    memory-mapped, when one is set; an explicit path or flat_path is served
+    as given. Otherwise serves the flat NumPy export, which loads without
+    XGBoost, LightGBM or scikit-learn, unless the joblib model beside it is
+    not the one it was exported from; then, or without an export, the
+    joblib model is loaded.
+    """
+    return load_model_version(path, flat_path, registry)[0]
+
+def load_model_version(path=None, flat_path=None, registry=None):
+    """Returns (model, version) for the model load_model serves.
+
+    version is 'registry:<version>' for a registry model and the content
+    hash of the file otherwise, so it changes whenever the predictions can.
+    """
+    if registry is not None or (path is None and flat_path is None):
+        registry = registry or ModelRegistry()
+        version = registry.active_version()
+        if version is not None:
+            model = resource_cache.get('registry_model', registry.artifact_path(version), lambda _: registry.load(version))
+            return model, f'registry:{version}'
+    path, flat_path = path or MODEL_PATH, flat_path or FLAT_MODEL_PATH
+    if os.path.exists(flat_path):
+        flat_model = resource_cache.get('flat_model', flat_path, FlatStackingModel.load)
+        if not os.path.exists(path) or flat_model.source == resource_cache.fingerprint(path):
+            return flat_model, f'flat:{resource_cache.fingerprint(flat_path)}'
+    return resource_cache.get('model', path, _load_joblib), f'joblib:{resource_cache.fingerprint(path)}'
+
+def load_historical_data(path=None):
+    """Returns the cleaned history and its TeamHistoryIndex, cached like load_model.
+
+    Reads the Parquet warehouse when it has been built and the raw CSV otherwise.
+    """
+    path = path or resolve_games_path(RAW_DATASET, RAW_CSV)
+    return resource_cache.get('history', path, _read_historical_data)
+
+def load_team_state(path=TEAM_STATE_PATH, history_path=None, window_size=10):
+    """Returns the TeamState snapshot written by the feature pipeline.
+
+    The snapshot is used only if it was built from the current history with
+    the same window; otherwise, or when it is missing, an equivalent state is
+    built from the history in memory and cached until the history changes.
+    """
+    history_path = history_path or resolve_games_path(RAW_DATASET, RAW_CSV)
+    source = resource_cache.fingerprint(history_path)
+    if os.path.exists(path):
+        team_state = resource_cache.get('team_state', path, TeamState.load)
+        if team_state.source == source and team_state.window_size == window_size:
+            return team_state
+    team_index = load_historical_data(history_path)[1]
+    return resource_cache.get('team_state_rebuilt', history_path,
+                              lambda _: TeamState.from_index(team_index, window_size, source))
+
+def select_ou_line(game):
+    """Returns the totals line from the most preferred bookmaker offering one, or None."""
+    sorted_bookmakers = sorted(game.get('bookmakers', []), key=lambda b: (
+        PREFERRED_BOOKMAKERS.index(b['key']) if b['key'] in PREFERRED_BOOKMAKERS else len(PREFERRED_BOOKMAKERS),
+        not any(market['key'] == 'totals' for market in b.get('markets', []))
+    ))
+
+    for bookmaker in sorted_bookmakers:
+        for market in bookmaker.get('markets', []):
+            if market['key'] == 'totals' and market['outcomes'] and market['outcomes'][0]['point']:
+                return market['outcomes'][0]['point']
+    return None
+
+def predict_over_under(model, feature_df):
+    """Scores a whole feature matrix with one predict_proba call.
+
+    Returns (is_over, probability) arrays aligned with the rows of feature_df,
+    where probability is the model's confidence in the predicted side.
+    """
+    if len(feature_df) == 0:
+        return np.array([], dtype=bool), np.array([], dtype=float)
+    features = getattr(model, 'features', None) or list(getattr(model, 'feature_names_in_', FEATURE_COLS))
+    probabilities = model.predict_proba(feature_df[features])
+    predicted = model.classes_[np.argmax(probabilities, axis=1)]
+    return predicted == 1, probabilities.max(axis=1)
+
+def _prediction_record(sport_key, game, ou_line, over, probability):
+    return {
+        'League': sport_key.replace('basketball_', '').upper(),
+        'Match': f"{game['away_team']} at {game['home_team']}",
+        'Prediction': f"{'Over' if over else 'Under'} {ou_line}",
+        'Probability': float(probability)
     }
-    
-    features['Avg_MOV_Diff'] = features['Home_Avg_MOV'] - features['Away_Avg_MOV']
-    features['Avg_Pts_For_Diff'] = features['Home_Avg_Pts_For'] - features['Away_Avg_Pts_For']
-    features['Avg_Pts_Against_Diff'] = features['Home_Avg_Pts_Against'] - features['Away_Avg_Pts_Against']
-    features['Avg_OU_Hit_Rate_Diff'] = features['Home_Avg_OU_Hit_Rate'] - features['Away_Avg_OU_Hit_Rate']
-    
-    return features
 
-def generate_predictions(sport_key: str):
-    st.info(f"Generating predictions for {sport_key}...")
+def generate_predictions(sport_key: str, upcoming_games=None, prediction_cache=None):
+    """Predicts every upcoming game of one league that has an O/U line and team history.
+
+    With a PredictionCache, a game whose line, model version and history
+    are unchanged since it was last predicted is taken from the cache; only
+    the others are featurized and scored, and the league's cache entry is
+    then replaced by the current slate.
+    """
+    logger.info(f"Generating predictions for {sport_key}...")
 
     try:
-        model = joblib.load('models/xgb_lgbm_rf_stacking_model.joblib')
-        historical_df = pd.read_csv('data/raw/historical_basketball_data.csv', parse_dates=['Date'])
-        for col in ['HomeScore', 'AwayScore', 'OU_Line']:
-            historical_df[col] = pd.to_numeric(historical_df[col], errors='coerce')
-        historical_df.dropna(subset=['HomeScore', 'AwayScore', 'OU_Line'], inplace=True)
+        model, model_version = load_model_version()
+        team_state = load_team_state()
     except FileNotFoundError as e:
-        st.error(f"Error loading model or data: {e}.")
+        logger.error(f"Error loading model or data: {e}.")
         return []
 
-    upcoming_games = get_upcoming_games(sport_key)
+    if upcoming_games is None:
+        upcoming_games = get_upcoming_games(sport_key)
     if not upcoming_games:
-        st.warning(f"No upcoming games to predict for {sport_key}.")
+        logger.warning(f"No upcoming games to predict for {sport_key}.")
         return []
 
-    predictions = []
-    
+    slate = []
     for game in upcoming_games:
-        home_team = game['home_team']
-        away_team = game['away_team']
-        
-        ou_line = None
-        bookmakers = game.get('bookmakers', [])
-        preferred_books = ['draftkings', 'fanduel', 'betmgm', 'betonlineag', 'bovada']
-        sorted_bookmakers = sorted(bookmakers, key=lambda b: (
-            preferred_books.index(b['key']) if b['key'] in preferred_books else len(preferred_books),
-            not any(market['key'] == 'totals' for market in b.get('markets', []))
-        ))
-
-        for bookmaker in sorted_bookmakers:
-            for market in bookmaker.get('markets', []):
-                if market['key'] == 'totals':
-                    if market['outcomes']:
-                        ou_line = market['outcomes'][0]['point']
-                        break
-            if ou_line:
-                break
-        
+        ou_line = select_ou_line(game)
         if not ou_line:
-            st.warning(f"Skipping {home_team} vs {away_team}: No OU_Line found from preferred bookmakers.")
-            continue
-
-        features = calculate_features_for_game(home_team, away_team, historical_df)
-        
-        if features is None:
-            home_history_len = len(get_team_history(home_team, historical_df))
-            away_history_len = len(get_team_history(away_team, historical_df))
-            st.warning(f"Skipping {home_team} vs {away_team}: Not enough historical data (Home: {home_history_len}, Away: {away_history_len}).")
+            logger.warning(f"Skipping {game['home_team']} vs {game['away_team']}: No OU_Line found from preferred bookmakers.")
             continue
+        slate.append((game, ou_line))
 
-        feature_cols = [
-            'Home_Avg_MOV', 'Home_Avg_Pts_For', 'Home_Avg_Pts_Against', 'Home_Avg_OU_Hit_Rate',
-            'Away_Avg_MOV', 'Away_Avg_Pts_For', 'Away_Avg_Pts_Against', 'Away_Avg_OU_Hit_Rate',
-            'Avg_MOV_Diff', 'Avg_Pts_For_Diff', 'Avg_Pts_Against_Diff', 'Avg_OU_Hit_Rate_Diff'
-        ]
-        feature_df = pd.DataFrame([features], columns=feature_cols)
-
-        prediction_val = model.predict(feature_df)[0]
-        prediction_proba = model.predict_proba(feature_df)[0]
-
-        prediction_text = "Over" if prediction_val == 1 else "Under"
-        probability = prediction_proba[1] if prediction_val == 1 else prediction_proba[0]
+    if prediction_cache is None:
+        records = predict_slate([(sport_key, game, ou_line) for game, ou_line in slate], model, team_state)
+    else:
+        with prediction_cache.lock(sport_key):
+            cached = prediction_cache.load(sport_key)
+            keys = [prediction_cache.entry_key(game, ou_line, model_version, team_state.source) for game, ou_line in slate]
+            stale = [i for i, key in enumerate(keys) if key not in cached]
+            fresh = predict_slate([(sport_key, *slate[i]) for i in stale], model, team_state)
+            records = [cached.get(key) for key in keys]
+            for i, record in zip(stale, fresh):
+                records[i] = record
+            prediction_cache.save(sport_key, dict(zip(keys, records)))
+            prediction_cache.record(hits=len(slate) - len(stale), misses=len(stale))
+
+    for (game, _), record in zip(slate, records):
+        if record is None:
+            logger.warning(f"Skipping {game['home_team']} vs {game['away_team']}: No historical data for either team.")
+    predictions = [record for record in records if record is not None]
+
+    reused = f" ({len(slate) - len(stale)} of {len(slate)} games unchanged)" if prediction_cache is not None else ""
+    logger.info(f"Successfully generated {len(predictions)} predictions for {sport_key}{reused}.", extra={'success': True})
+    return predictions
 
-        predictions.append({
-            'League': sport_key.replace('basketball_', '').upper(),
-            'Match': f"{game['away_team']} at {game['home_team']}",
-            'Prediction': f"{prediction_text} {ou_line}",
-            'Probability': probability
-        })
+def predict_slate(slate, model, team_state):
+    """Featurizes and scores (sport_key, game, ou_line) entries in one model call.
 
-    st.success(f"Successfully generated {len(predictions)} predictions for {sport_key}.")
-    return predictions
+    Returns a prediction record per entry, or None where neither team has
+    history. Entries may mix leagues.
+    """
+    if not slate:
+        return []
+    matchups = [(game['home_team'], game['away_team']) for _, game, _ in slate]
+    feature_df = calculate_slate_features(matchups, team_state=team_state)
+    has_history = feature_df.notna().all(axis=1).to_numpy()
+    is_over, probabilities = predict_over_under(model, feature_df[has_history])
+
+    scored = iter(zip(is_over, probabilities))
+    return [_prediction_record(sport_key, game, ou_line, *next(scored)) if usable else None
+            for (sport_key, game, ou_line), usable in zip(slate, has_history)]
+
+def predict_leagues(sport_keys=None, api_key=None, prediction_cache=None):
+    """Fetches odds for several leagues concurrently and predicts each one.
+
+    Returns (predictions, failed), where failed lists the sport keys whose
+    odds could not be fetched. Raises FileNotFoundError when the model or
+    history is missing, and ValueError without an API key.
+    """
+    sport_keys = list(AVAILABLE_LEAGUES.values() if sport_keys is None else sport_keys)
+    api_key = api_key or get_api_key()
+    if not api_key:
+        raise ValueError("No API key for The Odds API.")
+    load_model_version()
+    load_team_state()
+
+    games_by_league = get_upcoming_games_many(sport_keys, api_key)
+    failed = [sport_key for sport_key in sport_keys if games_by_league[sport_key] is None]
+    predictions = []
+    for sport_key in sport_keys:
+        if games_by_league[sport_key] is not None:
+            predictions.extend(generate_predictions(sport_key, games_by_league[sport_key], prediction_cache))
+    return predictions, failed
+
+def write_predictions(predictions, path, output_format=None):
+    """Writes prediction records to path as JSON or Parquet ('-' is JSON on stdout).
+
+    The format follows the file extension unless output_format is given.
+    Files are replaced atomically, so a reader never sees a partial file.
+    """
+    output_format = output_format or ('parquet' if path.endswith('.parquet') else 'json')
+    if path == '-':
+        json.dump(predictions, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        return
+    directory = os.path.dirname(path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            if output_format == 'parquet':
+                pd.DataFrame(predictions, columns=PREDICTION_COLUMNS).to_parquet(f, index=False)
+            else:
+                f.write(json.dumps(predictions, indent=2).encode())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+def main(argv=None):
+    """Predicts today's games without Streamlit, for cron jobs and batch workers.
+
+    Exit codes: 0 when every league was predicted, 3 when the API key, model
+    or history is missing, 4 when no league's odds could be fetched and 5
+    when only some could (the others are still written).
+    """
+    parser = argparse.ArgumentParser(description="Predict today's Over/Under outcomes for every league.")
+    parser.add_argument('--leagues', nargs='+', choices=list(AVAILABLE_LEAGUES), default=list(AVAILABLE_LEAGUES))
+    parser.add_argument('--output', '-o', default='-', help="JSON or .parquet file to write; '-' (default) prints JSON.")
+    parser.add_argument('--format', choices=['json', 'parquet'], default=None, help="Default: from the output file extension.")
+    parser.add_argument('--no-cache', action='store_true', help="Predict every game instead of reusing cached predictions.")
+    parser.add_argument('--quiet', '-q', action='store_true', help="Only log warnings and errors.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO,
+                        format='%(asctime)s %(levelname)s %(message)s', stream=sys.stderr)
+
+    started = time.perf_counter()
+    try:
+        predictions, failed = predict_leagues([AVAILABLE_LEAGUES[league] for league in args.leagues],
+                                              prediction_cache=None if args.no_cache else PredictionCache())
+    except (FileNotFoundError, ValueError) as e:
+        logger.error(f"Cannot predict: {e}")
+        return EXIT_CONFIG_ERROR
+    if len(failed) == len(args.leagues):
+        logger.error("Odds could not be fetched for any league; nothing was written.")
+        return EXIT_ODDS_FAILED
+
+    write_predictions(predictions, args.output, args.format)
+    logger.info(f"Wrote {len(predictions)} predictions to {args.output} in {time.perf_counter() - started:.2f} s.")
+    if failed:
+        logger.warning(f"Odds could not be fetched for: {', '.join(failed)}.")
+        return EXIT_PARTIAL
+    return EXIT_OK
 
 
 if __name__ == '__main__':
-    all_predictions = []
-    for league_name, sport_key in AVAILABLE_LEAGUES.items():
-        predictions = generate_predictions(sport_key)
-        if predictions:
-            all_predictions.extend(predictions)
-    
-    if all_predictions:
-        st.info("\n--- All Upcoming Predictions ---")
-        pred_df = pd.DataFrame(all_predictions)
-        st.dataframe(pred_df)
-    else:
-        st.info("\nNo predictions were generated for any league.")
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,72 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from src.config import get_setting
+
+DEFAULT_PREDICTION_CACHE_DIR = 'data/cache/predictions'
+
+class PredictionCache:
+    """Per-league predictions keyed by a hash of everything they depend on.
+
+    Each league is one JSON file mapping entry keys to prediction records
+    (None for a game skipped for lack of history). An entry key hashes the
+    game's identity and teams, the selected O/U line, the model version and
+    the history fingerprint, so a line move, a new model or new results
+    invalidate exactly the games they affect.
+
+    Files are replaced atomically, so sessions and processes sharing the
+    directory never read a partial file. Within a process, lock(sport_key)
+    serializes the read-predict-write cycle of a league; across processes
+    the last writer wins, which can only cost a recomputation.
+    """
+
+    def __init__(self, cache_dir=None):
+        self.cache_dir = cache_dir or get_setting('PREDICTION_CACHE_DIR', DEFAULT_PREDICTION_CACHE_DIR)
+        self.hits = 0
+        self.misses = 0
+        self._locks = {}
+        self._locks_lock = threading.Lock()
+
+    @staticmethod
+    def entry_key(game, ou_line, model_version, history_version):
+        game_id = game.get('id') or f"{game.get('commence_time', '')}"
+        inputs = [game_id, game['home_team'], game['away_team'], repr(float(ou_line)), model_version, history_version]
+        return hashlib.blake2b(json.dumps(inputs).encode(), digest_size=16).hexdigest()
+
+    def lock(self, sport_key):
+        with self._locks_lock:
+            return self._locks.setdefault(sport_key, threading.Lock())
+
+    def path(self, sport_key):
+        return os.path.join(self.cache_dir, f'{sport_key}.json')
+
+    def load(self, sport_key):
+        """The league's entries, or {} if it has none or its file is unreadable."""
+        try:
+            with open(self.path(sport_key)) as f:
+                return json.load(f)['entries']
+        except (OSError, ValueError, KeyError):
+            return {}
+
+    def save(self, sport_key, entries):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({'entries': entries}, f)
+            os.replace(tmp_path, self.path(sport_key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def record(self, hits, misses):
+        with self._locks_lock:
+            self.hits += hits
+            self.misses += misses
+
+    def clear(self):
+        for name in os.listdir(self.cache_dir) if os.path.isdir(self.cache_dir) else []:
+            if name.endswith('.json'):
+                os.remove(os.path.join(self.cache_dir, name))
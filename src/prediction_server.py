@@ -0,0 +1,205 @@
+import argparse
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from src.api_client import AVAILABLE_LEAGUES
+from src.config import get_setting
+from src.predict import load_model_version, load_team_state, predict_slate
+
+logger = logging.getLogger(__name__)
+
+SERVER_HOST = get_setting('PREDICTION_SERVER_HOST', '127.0.0.1')
+SERVER_PORT = int(get_setting('PREDICTION_SERVER_PORT', 8765))
+MAX_BATCH_SIZE = 64
+MAX_WAIT_SECONDS = 0.005
+RELOAD_CHECK_SECONDS = 5.0
+REQUEST_TIMEOUT = 30.0
+
+class MicroBatcher:
+    """Groups items submitted from many threads into batches for one predict_batch call.
+
+    A batch is closed when it holds max_batch_size items or max_wait seconds
+    after its first item arrived, whichever comes first. One worker thread
+    runs the batches, so predict_batch never runs concurrently with itself.
+    """
+
+    def __init__(self, predict_batch, max_batch_size=MAX_BATCH_SIZE, max_wait=MAX_WAIT_SECONDS):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.batches = 0
+        self.items = 0
+        self._queue = queue.Queue()
+        self._worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self._worker.start()
+
+    def submit(self, item):
+        """Queues item; the returned Future resolves to its result."""
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def close(self):
+        self._queue.put(None)
+        self._worker.join()
+
+    def _next_batch(self):
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            try:
+                entry = self._queue.get(timeout=max(deadline - time.perf_counter(), 0))
+            except queue.Empty:
+                break
+            if entry is None:
+                self._queue.put(None)
+                break
+            batch.append(entry)
+        return batch
+
+    def _run(self):
+        while (batch := self._next_batch()) is not None:
+            items, futures = zip(*batch)
+            try:
+                results = self.predict_batch(list(items))
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+            else:
+                for future, result in zip(futures, results):
+                    future.set_result(result)
+            self.batches += 1
+            self.items += len(batch)
+
+class PredictionService:
+    """Keeps the served model and team state in memory and predicts batches of matchups.
+
+    Checks at most every reload_interval seconds whether a new model or
+    history was published, through the same cached loaders as the app.
+    """
+
+    def __init__(self, reload_interval=RELOAD_CHECK_SECONDS):
+        self.reload_interval = reload_interval
+        self._checked_at = None
+        self.refresh()
+
+    def refresh(self):
+        if self._checked_at is None or time.monotonic() - self._checked_at >= self.reload_interval:
+            (self.model, self.model_version), self.team_state = load_model_version(), load_team_state()
+            self._checked_at = time.monotonic()
+
+    def predict_batch(self, requests):
+        """Prediction records for (sport_key, game, ou_line) requests, None where there is no history."""
+        self.refresh()
+        return predict_slate(requests, self.model, self.team_state)
+
+def parse_request(payload):
+    """Turns {"league", "home_team", "away_team", "ou_line"} into a (sport_key, game, ou_line) request."""
+    if not isinstance(payload, dict):
+        raise ValueError("Each request must be a JSON object.")
+    league = str(payload.get('league', ''))
+    sport_key = AVAILABLE_LEAGUES.get(league.upper(), league)
+    if sport_key not in AVAILABLE_LEAGUES.values():
+        raise ValueError(f"Unknown league {league!r}; expected one of {', '.join(AVAILABLE_LEAGUES)}.")
+    teams = [payload.get('home_team'), payload.get('away_team')]
+    if not all(isinstance(team, str) and team for team in teams):
+        raise ValueError("home_team and away_team must be non-empty strings.")
+    ou_line = payload.get('ou_line')
+    if isinstance(ou_line, bool) or not isinstance(ou_line, (int, float)):
+        raise ValueError("ou_line must be a number.")
+    return sport_key, {'home_team': teams[0], 'away_team': teams[1]}, ou_line
+
+class PredictionHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+class PredictionRequestHandler(BaseHTTPRequestHandler):
+    """POST /predict with one request object or a list of them; GET /health for counters."""
+
+    protocol_version = 'HTTP/1.1'
+    # Headers and body are separate writes; without this, Nagle's algorithm holds the body for a delayed ACK.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        if self.path != '/health':
+            return self._send(404, {'error': f"No route {self.path}"})
+        batcher = self.server.batcher
+        self._send(200, {
+            'status': 'ok', 'model_version': self.server.service.model_version,
+            'batches': batcher.batches, 'requests': batcher.items,
+            'mean_batch_size': batcher.items / batcher.batches if batcher.batches else None,
+        })
+
+    def do_POST(self):
+        if self.path != '/predict':
+            return self._send(404, {'error': f"No route {self.path}"})
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'null')
+            requests = [parse_request(item) for item in payload] if isinstance(payload, list) else [parse_request(payload)]
+        except ValueError as e:
+            return self._send(400, {'error': str(e)})
+
+        futures = [self.server.batcher.submit(request) for request in requests]
+        try:
+            records = [future.result(REQUEST_TIMEOUT) for future in futures]
+        except Exception as e:
+            logger.exception("Prediction failed")
+            return self._send(500, {'error': f"Prediction failed: {e}"})
+        results = [record or {'error': "No historical data for either team."} for record in records]
+        if isinstance(payload, list):
+            return self._send(200, results)
+        self._send(200 if records[0] else 422, results[0])
+
+    def _send(self, status, body):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug(format, *args)
+
+def make_server(host=SERVER_HOST, port=SERVER_PORT, max_batch_size=MAX_BATCH_SIZE, max_wait=MAX_WAIT_SECONDS, service=None):
+    """A threading HTTP server answering prediction requests through one MicroBatcher.
+
+    Loads the model and team state before returning, so the first request
+    does not pay for them. Call serve_forever() to run it.
+    """
+    server = PredictionHTTPServer((host, port), PredictionRequestHandler)
+    server.service = service or PredictionService()
+    server.batcher = MicroBatcher(server.service.predict_batch, max_batch_size, max_wait)
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Over/Under predictions over HTTP with micro-batching.")
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT, help="0 picks a free port.")
+    parser.add_argument('--max-batch-size', type=int, default=MAX_BATCH_SIZE)
+    parser.add_argument('--max-wait-ms', type=float, default=MAX_WAIT_SECONDS * 1000,
+                        help="How long a batch waits for more requests after its first one.")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(message)s')
+
+    server = make_server(args.host, args.port, args.max_batch_size, args.max_wait_ms / 1000)
+    host, port = server.server_address[:2]
+    print(f"Serving predictions on http://{host}:{port} (model {server.service.model_version})", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.batcher.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+import hashlib
+import os
+import threading
+import time
+
+class ResourceCache:
+    """Process-wide cache for objects loaded from files such as the model and the history.
+
+    An entry is reused until its file (or any file under a dataset directory)
+    changes on disk. A changed mtime or size triggers a content-hash check,
+    so a touched but identical file is not reloaded.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._stats = {}
+        self._fingerprints = {}
+        # _lock guards the dictionaries only; checks and loads hold the lock of their own key,
+        # so a slow model load does not hold up lookups of the history or team state.
+        self._lock = threading.Lock()
+        self._key_locks = {}
+
+    def _key_lock(self, key):
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def get(self, name, path, loader):
+        """Returns loader(path), loading it only if path changed since the last call for name."""
+        with self._key_lock(('entry', name)):
+            signature = _file_signature(path)
+            with self._lock:
+                stats = self._stats.setdefault(name, {'hits': 0, 'misses': 0, 'loads': 0, 'load_seconds': 0.0, 'last_load_seconds': None})
+                entry = self._entries.get(name)
+
+            if entry is not None and entry['path'] == path:
+                if entry['signature'] == signature:
+                    with self._lock:
+                        stats['hits'] += 1
+                    return entry['value']
+                content_hash = _file_hash(path)
+                if entry['content_hash'] == content_hash:
+                    entry['signature'] = signature
+                    with self._lock:
+                        stats['hits'] += 1
+                    return entry['value']
+            else:
+                content_hash = _file_hash(path)
+
+            with self._lock:
+                stats['misses'] += 1
+            start = time.perf_counter()
+            value = loader(path)
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stats['loads'] += 1
+                stats['load_seconds'] += elapsed
+                stats['last_load_seconds'] = elapsed
+                self._entries[name] = {'path': path, 'signature': signature, 'content_hash': content_hash, 'value': value}
+            return value
+
+    def fingerprint(self, path):
+        """Content hash of path, rehashed only when its mtime or size changes."""
+        with self._key_lock(('fingerprint', path)):
+            signature = _file_signature(path)
+            with self._lock:
+                cached = self._fingerprints.get(path)
+            if cached is None or cached[0] != signature:
+                cached = (signature, _file_hash(path))
+                with self._lock:
+                    self._fingerprints[path] = cached
+            return cached[1]
+
+    def stats(self):
+        """Returns a copy of the per-resource hit/miss/load-time counters."""
+        with self._lock:
+            return {name: dict(counters) for name, counters in self._stats.items()}
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats.clear()
+            self._fingerprints.clear()
+
+def _files_under(path):
+    """The file itself, or every file below a dataset directory in a stable order."""
+    if not os.path.isdir(path):
+        return [path]
+    return sorted(os.path.join(root, name) for root, _, names in os.walk(path) for name in names)
+
+def _file_signature(path):
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No such file or directory: '{path}'")
+    signature = []
+    for file_path in _files_under(path):
+        stat = os.stat(file_path)
+        signature.append((file_path, stat.st_mtime_ns, stat.st_size))
+    return tuple(signature)
+
+def _file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.blake2b(digest_size=16)
+    for file_path in _files_under(path):
+        digest.update(os.path.relpath(file_path, path).encode())
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(chunk_size), b''):
+                digest.update(chunk)
+    return digest.hexdigest()
+
+resource_cache = ResourceCache()
@@ -0,0 +1,145 @@
+import os
+import sys
+import uuid
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+RAW_CSV = 'data/raw/historical_basketball_data.csv'
+RAW_DATASET = 'data/warehouse/raw_games'
+FEATURED_CSV = 'data/processed/featured_basketball_data_advanced.csv'
+FEATURED_DATASET = 'data/warehouse/featured_games'
+
+PARTITIONING = ds.partitioning(pa.schema([('League', pa.string()), ('Season', pa.int16())]), flavor='hive')
+
+def season_of(dates, leagues):
+    """Season label per game: the start year for NBA/NCAAB, the calendar year for the summer WNBA season."""
+    dates = pd.to_datetime(dates)
+    years = dates.dt.year
+    starts_in_autumn = (leagues.astype(str) != 'WNBA') & (dates.dt.month < 7)
+    return (years - starts_in_autumn.astype(int)).astype('Int16')
+
+def normalize_games(df):
+    """Casts a games table to the storage types.
+
+    Dates become datetimes, leagues and teams become categoricals, scores
+    become nullable int16 and results int8. Lines stay float64 so any line
+    round-trips exactly through the CSV export. Unparseable values become
+    missing, as pd.to_numeric(..., errors='coerce') did downstream. Other
+    columns, such as engineered features, are left as they are.
+    """
+    df = df.copy()
+    df['Date'] = pd.to_datetime(df['Date'], errors='coerce')
+    for col in ['League', 'HomeTeam', 'AwayTeam']:
+        df[col] = df[col].astype('category')
+    for col in ['HomeScore', 'AwayScore', 'TotalPoints']:
+        if col in df:
+            df[col] = pd.to_numeric(df[col], errors='coerce').round().astype('Int16')
+    df['OU_Line'] = pd.to_numeric(df['OU_Line'], errors='coerce').astype('float64')
+    if 'OU_Result' in df:
+        df['OU_Result'] = df['OU_Result'].astype('int8')
+    return df
+
+def write_games(df, dataset_dir, append=False):
+    """Writes games to a Parquet dataset partitioned by League and Season.
+
+    By default every League/Season partition present in df is replaced
+    wholesale. With append=True the rows are added as new files next to the
+    existing ones.
+    """
+    df = normalize_games(df).dropna(subset=['Date'])
+    df['Season'] = season_of(df['Date'], df['League'])
+    df = df.sort_values('Date', kind='stable')
+    df['League'] = df['League'].astype(str)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    ds.write_dataset(
+        table, dataset_dir, format='parquet', partitioning=PARTITIONING,
+        basename_template=f'part-{uuid.uuid4().hex}-{{i}}.parquet',
+        existing_data_behavior='overwrite_or_ignore' if append else 'delete_matching', preserve_order=True
+    )
+
+def _date_filter(expression, field, start_date, end_date, include_start):
+    if start_date is not None:
+        start = pd.Timestamp(start_date)
+        condition = field >= start if include_start else field > start
+        expression = condition if expression is None else expression & condition
+    if end_date is not None:
+        condition = field <= pd.Timestamp(end_date)
+        expression = condition if expression is None else expression & condition
+    return expression
+
+def read_games(path, columns=None, leagues=None, seasons=None, start_date=None, end_date=None, include_start=True):
+    """Reads games from a partitioned Parquet dataset or, for compatibility, a CSV file.
+
+    For datasets, columns are projected and the league, season and date
+    filters are pushed down, so only matching partitions and row groups are
+    read. CSV files are parsed in full and filtered afterwards. Either way
+    the result has the normalize_games types and is ordered by date, then
+    league, keeping file order within a league's day, so both sources give
+    the same rows in the same order. The Season partition key is only
+    returned when asked for in columns.
+    """
+    keep_season = columns is not None and 'Season' in columns
+    if not os.path.isdir(path):
+        df = normalize_games(pd.read_csv(path))
+        if keep_season:
+            df['Season'] = season_of(df['Date'], df['League'])
+        mask = pd.Series(True, index=df.index)
+        if leagues is not None:
+            mask &= df['League'].isin(leagues)
+        if seasons is not None:
+            mask &= season_of(df['Date'], df['League']).isin(seasons)
+        if start_date is not None:
+            start = pd.Timestamp(start_date)
+            mask &= df['Date'] >= start if include_start else df['Date'] > start
+        if end_date is not None:
+            mask &= df['Date'] <= pd.Timestamp(end_date)
+        df = df[mask.fillna(False)].sort_values(['Date', 'League'], kind='stable').reset_index(drop=True)
+        return df[columns] if columns is not None else df
+
+    dataset = ds.dataset(path, format='parquet', partitioning=PARTITIONING)
+    expression = None
+    if leagues is not None:
+        expression = ds.field('League').isin(list(leagues))
+    if seasons is not None:
+        condition = ds.field('Season').isin([int(season) for season in seasons])
+        expression = condition if expression is None else expression & condition
+    expression = _date_filter(expression, ds.field('Date'), start_date, end_date, include_start)
+
+    read_columns = None if columns is None else list(dict.fromkeys(list(columns) + ['Date', 'League']))
+    df = dataset.to_table(columns=read_columns, filter=expression).to_pandas()
+    df = df.sort_values(['Date', 'League'], kind='stable').reset_index(drop=True)
+    if columns is not None:
+        if 'League' in columns:
+            df['League'] = df['League'].astype('category')
+        return df[columns]
+    # Partition keys come back as trailing columns; put League back after Date as in the CSV files.
+    league = df.pop('League').astype('category')
+    df.insert(df.columns.get_loc('Date') + 1, 'League', league)
+    return df.drop(columns=['Season'])
+
+def resolve_games_path(dataset_dir, csv_path):
+    """Prefers the Parquet dataset when it has been built, otherwise the CSV file."""
+    return dataset_dir if os.path.isdir(dataset_dir) else csv_path
+
+def import_csv(csv_path, dataset_dir):
+    """Builds (or rebuilds the touched partitions of) a dataset from a CSV file."""
+    df = pd.read_csv(csv_path)
+    write_games(df, dataset_dir)
+    return len(df)
+
+def export_csv(path, csv_path):
+    """Writes a dataset (or CSV) back out as a plain CSV file."""
+    df = read_games(path)
+    df.to_csv(csv_path, index=False)
+    return len(df)
+
+
+if __name__ == '__main__':
+    usage = "usage: python -m src.storage (import CSV DATASET | export DATASET CSV)"
+    if len(sys.argv) != 4 or sys.argv[1] not in ('import', 'export'):
+        print(usage)
+        raise SystemExit(2)
+    command, source, target = sys.argv[1:]
+    count = import_csv(source, target) if command == 'import' else export_csv(source, target)
+    print(f"{command.title()}ed {count} games from {source} to {target}.")
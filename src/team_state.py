@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from src.storage import read_games
+from src.team_names import team_name_resolver
+
+HISTORY_COLS = ['Date', 'League', 'HomeTeam', 'AwayTeam', 'HomeScore', 'AwayScore', 'OU_Line']
+TEAM_STATE_PATH = 'data/processed/team_state.parquet'
+STAT_NAMES = ['MOV', 'Pts_For', 'Pts_Against', 'OU_Hits']
+
+def read_history(path):
+    """Reads the games used for serving features: every game with both scores and a line."""
+    historical_df = read_games(path, columns=HISTORY_COLS)
+    historical_df.dropna(subset=['HomeScore', 'AwayScore', 'OU_Line'], inplace=True)
+    return historical_df
+
+class TeamHistoryIndex:
+    """Inverted index from lowercase team names to date-ordered row positions in the history."""
+
+    def __init__(self, historical_df):
+        self.df = historical_df.sort_values(by='Date', ascending=False, kind='stable')
+        home_names = self.df['HomeTeam'].str.lower().to_numpy()
+        away_names = self.df['AwayTeam'].str.lower().to_numpy()
+        row_positions = pd.Series(np.arange(len(self.df)))
+        self.home_positions = row_positions.groupby(home_names).indices
+        self.away_positions = row_positions.groupby(away_names).indices
+        self.team_names = sorted(set(self.home_positions) | set(self.away_positions))
+        self.home_score = self.df['HomeScore'].to_numpy(dtype=float)
+        self.away_score = self.df['AwayScore'].to_numpy(dtype=float)
+        self.ou_line = self.df['OU_Line'].fillna(0).to_numpy(dtype=float)
+        self._lookup_cache = {}
+
+    def lookup(self, std_team_name):
+        """Returns (all, home, away) row positions, newest first, for rows whose team names contain std_team_name."""
+        if std_team_name in self._lookup_cache:
+            return self._lookup_cache[std_team_name]
+
+        empty = np.array([], dtype=np.intp)
+        matching_names = [name for name in self.team_names if std_team_name in name]
+        home = np.unique(np.concatenate([self.home_positions.get(name, empty) for name in matching_names] or [empty]))
+        away = np.unique(np.concatenate([self.away_positions.get(name, empty) for name in matching_names] or [empty]))
+        result = (np.union1d(home, away), home, away)
+        self._lookup_cache[std_team_name] = result
+        return result
+
+    def history(self, std_team_name, n=None):
+        """Returns the n most recent games (all if n is None) involving the team, newest first."""
+        positions = self.lookup(std_team_name)[0]
+        if n is not None:
+            positions = positions[:n]
+        return self.df.iloc[positions]
+
+def team_window_sums(std_team_names, team_index, window_size, as_home):
+    """Summed MOV, points for/against and O/U hits over each team's last window_size games.
+
+    as_home selects which side of a past game counts as the team's own when
+    both team names contain the key. Returns (sums (K, 4), counts (K,)).
+    """
+    windows, own_side = [], []
+    for std_team_name in std_team_names:
+        all_positions, home_positions, away_positions = team_index.lookup(std_team_name)
+        recent = all_positions[:window_size]
+        windows.append(recent)
+        own_side.append(np.isin(recent, home_positions if as_home else away_positions))
+
+    counts = np.array([len(w) for w in windows], dtype=np.intp)
+    positions = np.concatenate(windows) if windows else np.array([], dtype=np.intp)
+    is_own = np.concatenate(own_side) if own_side else np.array([], dtype=bool)
+    team_of_game = np.repeat(np.arange(len(windows)), counts)
+
+    home_score = team_index.home_score[positions]
+    away_score = team_index.away_score[positions]
+    ou_hits = ((home_score + away_score) > team_index.ou_line[positions]).astype(float)
+    if as_home:
+        pts_for = np.where(is_own, home_score, away_score)
+        opponent_pts = np.where(is_own, away_score, home_score)
+        pts_against = opponent_pts
+    else:
+        pts_for = np.where(is_own, away_score, home_score)
+        opponent_pts = np.where(is_own, home_score, away_score)
+        # Matches the original away-side loop, which records HomeScore as points against on both branches.
+        pts_against = home_score
+    mov = pts_for - opponent_pts
+
+    sums = np.zeros((len(windows), 4))
+    for col, values in enumerate([mov, pts_for, pts_against, ou_hits]):
+        sums[:, col] = np.bincount(team_of_game, weights=values, minlength=len(windows))
+    return sums, counts
+
+class TeamState:
+    """Latest rolling-window state per standardized team key, precomputed from the history.
+
+    Holds, for every key, the window sums as the home side and as the away
+    side, the number of games in the window and the date of the newest one,
+    so serving a matchup takes two row lookups instead of a history scan.
+    source identifies the history the state was built from.
+    """
+
+    def __init__(self, teams, home_sums, away_sums, games, last_dates, window_size, source=None):
+        self.teams = list(teams)
+        self.rows_by_team = {team: row for row, team in enumerate(self.teams)}
+        self.home_sums = np.asarray(home_sums, dtype=float)
+        self.away_sums = np.asarray(away_sums, dtype=float)
+        self.games = np.asarray(games, dtype=np.intp)
+        self.last_dates = pd.to_datetime(pd.Series(last_dates, dtype='datetime64[ns]')).to_numpy()
+        self.window_size = window_size
+        self.source = source
+
+    @classmethod
+    def from_index(cls, team_index, window_size=10, source=None, teams=None):
+        """Builds the state for every history team name and every alias target of the name resolver."""
+        if teams is None:
+            teams = sorted(set(team_index.team_names) | set(team_name_resolver.aliases.values()))
+        home_sums, games = team_window_sums(teams, team_index, window_size, as_home=True)
+        away_sums, _ = team_window_sums(teams, team_index, window_size, as_home=False)
+        dates = team_index.df['Date'].to_numpy()
+        newest = [team_index.lookup(team)[0][:1] for team in teams]
+        last_dates = [dates[positions[0]] if len(positions) else np.datetime64('NaT') for positions in newest]
+        return cls(teams, home_sums, away_sums, games, last_dates, window_size, source)
+
+    def rows(self, std_team_names):
+        """Row of each key in the state, -1 for keys it does not cover."""
+        return np.array([self.rows_by_team.get(name, -1) for name in std_team_names], dtype=np.intp)
+
+    def to_frame(self):
+        columns = {'Team': self.teams, 'Games': self.games, 'Last_Date': self.last_dates}
+        for prefix, sums in [('Home', self.home_sums), ('Away', self.away_sums)]:
+            for col, stat in enumerate(STAT_NAMES):
+                columns[f'{prefix}_{stat}_Sum'] = sums[:, col]
+        return pd.DataFrame(columns)
+
+    def save(self, path=TEAM_STATE_PATH):
+        table = pa.Table.from_pandas(self.to_frame(), preserve_index=False)
+        metadata = {b'window_size': str(self.window_size).encode(), b'source': (self.source or '').encode()}
+        pq.write_table(table.replace_schema_metadata({**table.schema.metadata, **metadata}), path)
+
+    @classmethod
+    def load(cls, path=TEAM_STATE_PATH):
+        table = pq.read_table(path)
+        metadata = table.schema.metadata
+        df = table.to_pandas()
+        home_sums = df[[f'Home_{stat}_Sum' for stat in STAT_NAMES]].to_numpy()
+        away_sums = df[[f'Away_{stat}_Sum' for stat in STAT_NAMES]].to_numpy()
+        return cls(df['Team'], home_sums, away_sums, df['Games'], df['Last_Date'],
+                   int(metadata[b'window_size']), metadata[b'source'].decode() or None)
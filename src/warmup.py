@@ -0,0 +1,70 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from src.api_client import fetch_odds_cached, get_session, odds_cache_ttl
+
+class Warmup:
+    """Loads the model and team state and prefetches odds for every league in background threads.
+
+    Created once per server process (app.py keeps it in st.cache_resource),
+    so the first visitor's page load overlaps the model and history loads
+    with the odds requests and later visitors find everything in memory.
+    Nothing here calls Streamlit: errors surface when a future's result is
+    read on the script thread. src.predict, with pandas and the model code,
+    is imported on the warm-up thread, so the page renders without waiting
+    for it.
+    """
+
+    def __init__(self, sport_keys, api_key=None):
+        self.sport_keys = list(sport_keys)
+        self.started_at = time.perf_counter()
+        self.timings = {}
+        self._executor = ThreadPoolExecutor(max_workers=len(self.sport_keys) + 1, thread_name_prefix='warmup')
+        self._odds_lock = threading.Lock()
+        self._odds, self._odds_api_key, self._odds_fetched_at = {}, None, None
+        self.resources = self._executor.submit(self._load_resources)
+        if api_key:
+            self.odds_futures(api_key)
+
+    def _timed(self, name, load):
+        start = time.perf_counter()
+        value = load()
+        self.timings[name] = time.perf_counter() - start
+        return value
+
+    def _load_resources(self):
+        from src.predict import load_model, load_team_state
+        return self._timed('model', load_model), self._timed('team_state', load_team_state)
+
+    def _fetch_odds(self, sport_key, api_key):
+        return self._timed(f'odds:{sport_key}', lambda: fetch_odds_cached(sport_key, api_key, get_session()))
+
+    def odds_futures(self, api_key):
+        """Futures of each league's odds payload fetched with api_key, reused while younger than the odds cache TTL.
+
+        The key is passed on every call rather than kept, so a key configured
+        after the first page load is used. Requests that failed, or were made
+        with another key, are submitted again. Later calls submit new
+        requests, which the on-disk odds cache answers without a network
+        round trip until its entries expire.
+        """
+        if not api_key:
+            return {}
+        with self._odds_lock:
+            if (api_key != self._odds_api_key or self._odds_fetched_at is None
+                    or time.perf_counter() - self._odds_fetched_at >= odds_cache_ttl()):
+                self._odds, self._odds_api_key, self._odds_fetched_at = {}, api_key, time.perf_counter()
+            for sport_key in self.sport_keys:
+                future = self._odds.get(sport_key)
+                if future is None or (future.done() and future.exception() is not None):
+                    self._odds[sport_key] = self._executor.submit(self._fetch_odds, sport_key, api_key)
+            return dict(self._odds)
+
+    def wait(self, timeout=None):
+        """Blocks until the model, team state and the odds requested so far are loaded; returns the per-step seconds."""
+        self.resources.result(timeout)
+        with self._odds_lock:
+            futures = list(self._odds.values())
+        for future in futures:
+            future.exception(timeout)
+        return dict(self.timings)